@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+"""基准测试共用的辅助函数"""
+
+import os
+import sys
+import importlib.util
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 让基准测试可以导入项目根目录下的模块（如模拟服务器）
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+def load_uploader():
+    """加载上传工具（文件名包含连字符，不能直接import）"""
+    spec = importlib.util.spec_from_file_location("uploader", os.path.join(ROOT_DIR, "greasy-fork-chrome-uploader.py"))
+    module = importlib.util.module_from_spec(spec)
+    # 注册模块，进程池中的函数（如audit_script）才能被pickle
+    sys.modules["uploader"] = module
+    spec.loader.exec_module(module)
+    return module
+
+def isolate_state(uploader, state_dir: str) -> None:
+    """把上传工具的配置、会话、各种缓存文件和输出目录指向临时目录，不影响真实数据"""
+    for name, filename in [
+        ("CONFIG_FILE", "config.json"),
+        ("SESSION_STATE_FILE", "greasyfork_session.json"),
+        ("FINGERPRINT_FILE", "upload_fingerprints.json"),
+        ("SELECTOR_CACHE_FILE", "selector_cache.json"),
+        ("SCRIPT_INDEX_FILE", "userscript_index.json"),
+        ("UPLOAD_HISTORY_STORE", "upload_history.jsonl"),
+        ("UPLOAD_HISTORY_FILE", "upload_history.md"),
+        ("REMOTE_CACHE_FILE", "remote_cache.json"),
+        ("JOB_QUEUE_FILE", "upload_queue.json"),
+        ("TIMINGS_FILE", "upload_timings.jsonl"),
+        ("AUDIT_REPORT_FILE", "audit_report.json"),
+        ("BUILD_CACHE_DIR", ".build_cache"),
+        ("REVIEW_DIR", "reviews"),
+        ("TRACE_DIR", "traces"),
+    ]:
+        if hasattr(uploader, name):
+            setattr(uploader, name, os.path.join(state_dir, filename))
+    # 丢弃已加载的进程内缓存
+    for name in ("_CONFIG", "_SELECTOR_CACHE"):
+        if hasattr(uploader, name):
+            setattr(uploader, name, None)
+
+def make_script(size_kb: int, version: str = "1.0", name: str = "基准测试脚本") -> str:
+    """生成指定大小（KB）的油猴脚本"""
+    header = f"// ==UserScript==\n// @name {name}\n// @version {version}\n// @match *://example.com/*\n// ==/UserScript==\n"
+    line = "console.log('greasy fork upload benchmark 性能测试');\n"
+    target = size_kb * 1024
+    repeat = max(0, (target - len(header.encode("utf-8"))) // len(line.encode("utf-8")))
+    return header + line * repeat
+
+def make_readme(size_kb: int) -> str:
+    """生成指定大小（KB）的README"""
+    line = "- 基准测试用的README内容 benchmark readme line\n"
+    target = size_kb * 1024
+    repeat = max(1, target // len(line.encode("utf-8")))
+    return "# 基准测试\n\n" + line * repeat
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+代码注入方式基准测试
+------------------------
+在无头Chromium中分别用fill、dom、upload三种方式把10 KB到5 MB的脚本写入
+版本表单，统计每种方式的耗时，并确认写入的内容大小正确。
+
+用法:
+    python benchmarks/bench_injection.py [--sizes 10,100,500,1000,5000] [--runs 3] [--json]
+"""
+
+import sys
+import json
+import time
+import argparse
+import statistics
+
+from bench_common import load_uploader, make_script
+
+# 与Greasy Fork版本表单结构一致的最小页面
+FORM_HTML = """<!DOCTYPE html>
+<html><body>
+<form id="new_script_version" enctype="multipart/form-data" method="post">
+<textarea class="code-textarea" name="script_version[code]" id="script_version_code"></textarea>
+<input type="file" name="code_upload" id="script_version_code_upload">
+</form>
+</body></html>
+"""
+
+# 读取注入结果的大小，用于确认内容完整
+READ_SIZE_SCRIPT = """() => {
+    const upload = document.querySelector('#script_version_code_upload');
+    if (upload.files.length) {
+        return upload.files[0].size;
+    }
+    return new Blob([document.querySelector('#script_version_code').value]).size;
+}"""
+
+def main():
+    parser = argparse.ArgumentParser(description="代码注入方式基准测试")
+    parser.add_argument("--sizes", default="10,100,500,1000,5000", help="脚本大小列表，单位KB（默认10,100,500,1000,5000）")
+    parser.add_argument("--strategies", default="fill,dom,upload", help="要测试的注入方式（默认fill,dom,upload）")
+    parser.add_argument("--runs", type=int, default=3, help="每个组合的运行次数（默认3）")
+    parser.add_argument("--json", action="store_true", help="以JSON格式输出结果")
+    args = parser.parse_args()
+
+    uploader = load_uploader()
+    sizes = [int(size) for size in args.sizes.split(",")]
+    strategies = args.strategies.split(",")
+    results = []
+
+    with uploader.sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        page = browser.new_page()
+        for size_kb in sizes:
+            content = make_script(size_kb)
+            expected = len(content.encode("utf-8"))
+            auto = None
+            for strategy in strategies:
+                durations = []
+                ok = True
+                for _ in range(args.runs):
+                    page.set_content(FORM_HTML)
+                    if auto is None:
+                        auto = uploader.choose_injection_strategy(page, content)
+                    start = time.perf_counter()
+                    uploader.inject_code(page, "#script_version_code", content, strategy)
+                    durations.append((time.perf_counter() - start) * 1000)
+                    ok = ok and page.evaluate(READ_SIZE_SCRIPT) == expected
+                results.append({
+                    "size_kb": size_kb,
+                    "strategy": strategy,
+                    "median_ms": round(statistics.median(durations), 1),
+                    "min_ms": round(min(durations), 1),
+                    "ok": ok,
+                    "auto_choice": auto,
+                })
+        browser.close()
+
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    else:
+        print(f"{'大小':>8}  {'方式':<7} {'中位数':>10} {'最小':>10}  自动选择")
+        for result in results:
+            mark = "" if result["ok"] else "  内容不完整!"
+            print(f"{result['size_kb']:>6}KB  {result['strategy']:<7} {result['median_ms']:>8.1f}ms {result['min_ms']:>8.1f}ms  {result['auto_choice']}{mark}")
+
+    sys.exit(0 if all(result["ok"] for result in results) else 1)
+
+if __name__ == "__main__":
+    main()
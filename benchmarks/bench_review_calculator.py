@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+亚马逊评论批量计算器基准测试
+------------------------
+生成随机的各星级评价数量，统计review_calculator的吞吐量：
+
+- compute: 数据已在内存中时，不同块大小下的纯计算速度
+- csv: 从CSV流式读取、计算并写出结果的端到端速度
+
+并用Node.js运行油猴脚本中的calculateWeightedAverage()和calculateRequiredReviews()，
+确认抽样行的结果（包括目标评分为5的特殊情况）与JS完全一致。没有安装node时跳过一致性检查。
+
+用法:
+    python benchmarks/bench_review_calculator.py [--rows 2000000] [--targets 4,4.3,4.5,5] [--verify 20000] [--json]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CALCULATOR_DIR = os.path.join(ROOT_DIR, "亚马逊差评计算器")
+sys.path.insert(0, CALCULATOR_DIR)
+
+import numpy as np
+import review_calculator
+
+USERSCRIPT = os.path.join(CALCULATOR_DIR, "亚马逊评论计算器.js")
+
+# 在node中运行脚本里的两个函数：从标准输入读取{"rows": [[5星..1星, 总评论数]], "targets": [...]}
+NODE_RUNNER = """
+%s
+%s
+const input = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+const output = input.rows.map((row) => {
+    const ratings = [5, 4, 3, 2, 1].map((stars, index) => ({ stars, count: row[index] }));
+    const current = calculateWeightedAverage(ratings);
+    return [current, ...input.targets.map((target) => calculateRequiredReviews(current, row[5], target))];
+});
+process.stdout.write(JSON.stringify(output));
+"""
+
+def make_counts(rows: int, seed: int = 0):
+    """生成随机的各星级数量和总评论数，包含没有评价、只有五星、总数与各星级之和不同等特殊情况"""
+    rng = np.random.default_rng(seed)
+    totals = rng.lognormal(mean=5, sigma=2, size=rows).astype(np.int64)
+    shares = rng.dirichlet([6, 2, 1, 0.7, 1.2], size=rows)
+    counts = np.floor(shares * totals[:, None]).astype(np.int64)
+    counts[::97] = 0
+    counts[1::89, 1:] = 0
+    totals = counts.sum(axis=1)
+    # 页面上的总评论数与各星级四舍五入后的数量之和不一定相等
+    totals[2::7] += rng.integers(-3, 4, size=len(totals[2::7]))
+    return counts, np.maximum(totals, 0)
+
+def extract_js_function(source: str, name: str) -> str:
+    """从油猴脚本中取出一个函数的源码（到同样缩进的右花括号为止）"""
+    match = re.search(r'^( *)function %s\(.*?^\1\}' % name, source, re.MULTILINE | re.DOTALL)
+    if not match:
+        raise RuntimeError(f"脚本中没有找到函数 {name}")
+    return match.group(0)
+
+def verify_with_node(counts, totals, targets, sample: int):
+    """用node运行脚本中的原始函数，返回(检查的行数, 不一致的行数)；没有node时返回None"""
+    node = shutil.which("node")
+    if not node or sample <= 0:
+        return None
+    with open(USERSCRIPT, "r", encoding="utf-8") as f:
+        source = f.read()
+    runner = NODE_RUNNER % (extract_js_function(source, "calculateWeightedAverage"), extract_js_function(source, "calculateRequiredReviews"))
+
+    counts, totals = counts[:sample], totals[:sample]
+    rows = np.column_stack([counts, totals]).tolist()
+    output = subprocess.run([node, "-e", runner], input=json.dumps({"rows": rows, "targets": list(targets)}), capture_output=True, text=True, check=True).stdout
+    expected = json.loads(output)
+
+    result = review_calculator.calculate(counts, targets, totals)
+    actual = np.column_stack([result["average"], result["required"]]).tolist()
+    mismatches = sum(1 for js_row, py_row in zip(expected, actual) if js_row != py_row)
+    return len(rows), mismatches
+
+def write_csv(path: str, counts, totals) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("asin,five_star,four_star,three_star,two_star,one_star,total_reviews\n")
+        for index, (row, total) in enumerate(zip(counts.tolist(), totals.tolist())):
+            f.write(f"B{index:09d},{row[0]},{row[1]},{row[2]},{row[3]},{row[4]},{total}\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="亚马逊评论批量计算器基准测试")
+    parser.add_argument("--rows", type=int, default=2_000_000, help="生成的ASIN数量（默认2000000）")
+    parser.add_argument("--targets", default="4,4.3,4.5,4.8,5", help="目标评分列表（默认4,4.3,4.5,4.8,5）")
+    parser.add_argument("--chunk-rows", default="10000,100000,500000", help="纯计算测试的块大小（默认10000,100000,500000）")
+    parser.add_argument("--verify", type=int, default=20000, help="与JS结果比较的行数（默认20000，0为不比较）")
+    parser.add_argument("--no-csv", action="store_true", help="跳过CSV端到端测试")
+    parser.add_argument("--json", action="store_true", help="以JSON格式输出结果")
+    args = parser.parse_args()
+
+    targets = [float(target) for target in args.targets.split(",")]
+    counts, totals = make_counts(args.rows)
+    results = []
+
+    for chunk_rows in [int(size) for size in args.chunk_rows.split(",")]:
+        start = time.perf_counter()
+        for offset in range(0, args.rows, chunk_rows):
+            review_calculator.calculate(counts[offset:offset + chunk_rows], targets, totals[offset:offset + chunk_rows])
+        duration = time.perf_counter() - start
+        results.append({"name": "compute", "chunk_rows": chunk_rows, "seconds": round(duration, 3), "rows_per_second": round(args.rows / duration)})
+
+    if not args.no_csv:
+        with tempfile.TemporaryDirectory() as work_dir:
+            input_path = os.path.join(work_dir, "ratings.csv")
+            output_path = os.path.join(work_dir, "result.csv")
+            write_csv(input_path, counts, totals)
+            start = time.perf_counter()
+            rows = review_calculator.process_file(input_path, targets, output_path)
+            duration = time.perf_counter() - start
+            results.append({"name": "csv", "chunk_rows": review_calculator.DEFAULT_CHUNK_ROWS, "seconds": round(duration, 3),
+                            "rows_per_second": round(rows / duration), "input_mb": round(os.path.getsize(input_path) / 1024 / 1024, 1)})
+
+    verified = verify_with_node(counts, totals, targets, args.verify)
+
+    if args.json:
+        print(json.dumps({"rows": args.rows, "targets": targets, "results": results,
+                          "verify": verified and {"rows": verified[0], "mismatches": verified[1]}}, indent=2, ensure_ascii=False))
+    else:
+        print(f"{args.rows} 个ASIN，目标评分 {', '.join(f'{target:g}' for target in targets)}")
+        print(f"{'测试':<8} {'块大小':>8} {'耗时':>9} {'行/秒':>14}")
+        for result in results:
+            print(f"{result['name']:<8} {result['chunk_rows']:>8} {result['seconds']:>8.3f}s {result['rows_per_second']:>14,}")
+        if verified is None:
+            print("未找到node，跳过与JS结果的一致性检查")
+        else:
+            print(f"与JS结果比较 {verified[0]} 行: {'全部一致' if not verified[1] else f'{verified[1]} 行不一致'}")
+
+    sys.exit(1 if verified and verified[1] else 0)
+
+if __name__ == "__main__":
+    main()
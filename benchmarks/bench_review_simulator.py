@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+亚马逊评论轨迹模拟基准测试
+------------------------
+生成随机的各星级评价数量，统计review_simulator的模拟速度（每秒完成的轨迹数），
+并用只有五星新评价的场景检查模拟结果：这时每条轨迹都是确定的，达到目标所需的评价数
+应等于用整数精确计算的 ceil((目标 * 总数 - 星级和) / (5 - 目标))。同时统计与脚本中
+calculateRequiredReviews()的差异：脚本先用浮点数算出平均分，恰好落在边界上时会多算1条。
+
+用法:
+    python benchmarks/bench_review_simulator.py [--rows 2000] [--simulations 500] [--targets 4,4.3,4.5] [--json]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from fractions import Fraction
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CALCULATOR_DIR = os.path.join(ROOT_DIR, "亚马逊差评计算器")
+sys.path.insert(0, CALCULATOR_DIR)
+
+import numpy as np
+import review_calculator
+import review_simulator
+from bench_review_calculator import make_counts
+
+# 改进后的新评价分布（5星到1星）
+IMPROVED = np.array([0.8, 0.1, 0.04, 0.02, 0.04])
+# 只有五星新评价，用于与公式比较
+ALL_FIVE = np.array([1.0, 0, 0, 0, 0])
+
+def exact_required(counts, targets):
+    """用整数精确计算只有五星新评价时达到各目标所需的评价数"""
+    star_sum = (counts @ review_calculator.STAR_WEIGHTS)[:, None]
+    total = counts.sum(axis=1)[:, None]
+    fractions = [Fraction(str(target)).limit_denominator(1000) for target in targets]
+    numerator = np.array([fraction.numerator for fraction in fractions])
+    denominator = np.array([fraction.denominator for fraction in fractions])
+    deficit = numerator * total - denominator * star_sum
+    step = 5 * denominator - numerator
+    return np.maximum(-(-deficit // step), 0)
+
+def verify_all_five(counts, targets, max_reviews: int):
+    """只有五星新评价时检查模拟结果，返回(比较的值个数, 不一致的个数, 与脚本公式不同的个数)"""
+    counts = counts[counts.sum(axis=1) > 0]
+    distributions = np.broadcast_to(ALL_FIVE, (len(counts), 1, 5))
+    passage = review_simulator.simulate_passage(counts, distributions, targets, 1, max_reviews, np.random.default_rng(0))[:, 0, 0]
+    exact = exact_required(counts, targets)
+    # 超过max_reviews的行模拟中不会达到
+    expected = np.where(exact <= max_reviews, exact, -1)
+    formula = review_calculator.calculate(counts, targets)["required"]
+    return passage.size, int((passage != expected).sum()), int(((passage != formula) & (expected >= 0)).sum())
+
+def main():
+    parser = argparse.ArgumentParser(description="亚马逊评论轨迹模拟基准测试")
+    parser.add_argument("--rows", type=int, default=2000, help="生成的ASIN数量（默认2000）")
+    parser.add_argument("--simulations", type=int, default=500, help="每个ASIN和场景的模拟次数（默认500）")
+    parser.add_argument("--targets", default="4,4.3,4.5", help="目标评分列表（默认4,4.3,4.5）")
+    parser.add_argument("--batch-asins", default="64,256,1024", help="每批ASIN数（默认64,256,1024）")
+    parser.add_argument("--max-reviews", type=int, default=review_simulator.DEFAULT_MAX_REVIEWS, help="每次模拟最多的新评价数")
+    parser.add_argument("--json", action="store_true", help="以JSON格式输出结果")
+    args = parser.parse_args()
+
+    targets = np.array(sorted(float(target) for target in args.targets.split(",")))
+    counts, _ = make_counts(args.rows)
+    distributions = review_simulator.build_distributions(counts, [("improved", IMPROVED)])
+    trajectories = args.rows * distributions.shape[1] * args.simulations
+    results = []
+
+    for batch_asins in [int(size) for size in args.batch_asins.split(",")]:
+        rng = np.random.default_rng(0)
+        start = time.perf_counter()
+        for offset in range(0, args.rows, batch_asins):
+            review_simulator.simulate_passage(counts[offset:offset + batch_asins], distributions[offset:offset + batch_asins],
+                                              targets, args.simulations, args.max_reviews, rng)
+        duration = time.perf_counter() - start
+        results.append({"batch_asins": batch_asins, "seconds": round(duration, 3), "trajectories_per_second": round(trajectories / duration)})
+
+    verified = verify_all_five(counts, targets, args.max_reviews)
+
+    if args.json:
+        print(json.dumps({"rows": args.rows, "simulations": args.simulations, "targets": targets.tolist(), "results": results,
+                          "verify": {"values": verified[0], "mismatches": verified[1], "formula_differences": verified[2]}}, indent=2, ensure_ascii=False))
+    else:
+        print(f"{args.rows} 个ASIN，2 个场景，每个场景 {args.simulations} 次模拟，目标评分 {', '.join(f'{target:g}' for target in targets)}")
+        print(f"{'每批ASIN':>8} {'耗时':>9} {'轨迹/秒':>14}")
+        for result in results:
+            print(f"{result['batch_asins']:>8} {result['seconds']:>8.3f}s {result['trajectories_per_second']:>14,}")
+        print(f"只有五星新评价时与精确结果比较 {verified[0]} 个值: {'全部一致' if not verified[1] else f'{verified[1]} 个不一致'}"
+              f"（其中 {verified[2]} 个与脚本公式相差，来自脚本的浮点误差）")
+
+    sys.exit(1 if verified[1] else 0)
+
+if __name__ == "__main__":
+    main()
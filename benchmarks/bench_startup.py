@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+上传工具冷启动基准测试
+------------------------
+多次以子进程方式运行不需要浏览器的只读命令（status、history、which），
+统计启动耗时的中位数，超过目标值或导入了Playwright时以非零状态退出。
+
+用法:
+    python benchmarks/bench_startup.py [--runs 20] [--target-ms 150]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+UPLOADER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "greasy-fork-chrome-uploader.py")
+
+# 参与测试的只读命令
+COMMANDS = ["status", "history", "which"]
+
+def time_command(argv, runs):
+    """运行命令runs次，返回每次的耗时（毫秒）"""
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(argv, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations
+
+def imports_playwright(command):
+    """检查命令运行过程中是否导入了Playwright"""
+    result = subprocess.run([sys.executable, "-X", "importtime", UPLOADER, command],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    return "playwright" in result.stderr
+
+def main():
+    parser = argparse.ArgumentParser(description="只读命令冷启动基准测试")
+    parser.add_argument("--runs", type=int, default=20, help="每个命令的运行次数（默认20）")
+    parser.add_argument("--target-ms", type=float, default=150.0, help="启动耗时中位数上限，单位毫秒（默认150）")
+    parser.add_argument("--json", action="store_true", help="以JSON格式输出结果")
+    args = parser.parse_args()
+
+    # Python解释器本身的启动耗时作为参考
+    baseline = statistics.median(time_command([sys.executable, "-c", "pass"], args.runs))
+
+    results = {"target_ms": args.target_ms, "interpreter_ms": round(baseline, 1), "commands": {}}
+    failed = False
+    for command in COMMANDS:
+        durations = time_command([sys.executable, UPLOADER, command], args.runs)
+        median = statistics.median(durations)
+        loads_playwright = imports_playwright(command)
+        ok = median <= args.target_ms and not loads_playwright
+        failed = failed or not ok
+        results["commands"][command] = {
+            "median_ms": round(median, 1),
+            "min_ms": round(min(durations), 1),
+            "imports_playwright": loads_playwright,
+            "ok": ok,
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    else:
+        print(f"解释器启动: {baseline:.1f} ms，目标: <= {args.target_ms:.0f} ms")
+        for command, result in results["commands"].items():
+            status = "通过" if result["ok"] else "未通过"
+            note = "（导入了Playwright）" if result["imports_playwright"] else ""
+            print(f"  {command:<8} 中位数 {result['median_ms']:>7.1f} ms  最小 {result['min_ms']:>7.1f} ms  {status}{note}")
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+上传流程端到端基准测试
+------------------------
+启动本地模拟Greasy Fork服务器，在无头Chromium中完整运行上传工具的各个流程，
+统计每个阶段的耗时：
+
+- launch: 启动浏览器
+- login_fresh: 没有会话缓存时的表单登录
+- login_reuse: 复用已保存的登录会话
+- update: update_script完整流程（不同脚本/README大小）
+- create: create_new_script完整流程
+- batch: batch_update在不同并发标签页数量下的总耗时
+
+所有配置、会话和缓存文件都放在临时目录中，不影响真实数据。
+
+用法:
+    python benchmarks/bench_upload_flow.py [--runs 3] [--latency-ms 0] [--output result.json]
+"""
+
+import os
+import json
+import time
+import tempfile
+import argparse
+import statistics
+import contextlib
+
+from bench_common import load_uploader, isolate_state, make_script, make_readme
+from greasyfork_mock_server import start_mock_server
+
+USERNAME = "bench@example.com"
+PASSWORD = "bench-secret"
+
+def summarize(name: str, durations, **extra):
+    """把多次运行的耗时（秒）整理成一条结果"""
+    values = [duration * 1000 for duration in durations]
+    result = {
+        "name": name,
+        "runs": len(values),
+        "median_ms": round(statistics.median(values), 1),
+        "min_ms": round(min(values), 1),
+        "max_ms": round(max(values), 1),
+    }
+    result.update(extra)
+    return result
+
+def timed(func, *args, **kwargs):
+    """运行函数并返回(耗时秒数, 返回值)"""
+    start = time.perf_counter()
+    value = func(*args, **kwargs)
+    return time.perf_counter() - start, value
+
+def write_file(path: str, content: str) -> str:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+def clear_session(uploader) -> None:
+    """删除登录会话缓存，使下一次登录走表单流程"""
+    if os.path.exists(uploader.SESSION_STATE_FILE):
+        os.remove(uploader.SESSION_STATE_FILE)
+
+def bench_launch_and_login(uploader, runs: int):
+    results = []
+    launch, fresh, reuse = [], [], []
+    with uploader.sync_playwright() as p:
+        for _ in range(runs):
+            duration, browser = timed(uploader.launch_browser, p)
+            launch.append(duration)
+            try:
+                clear_session(uploader)
+                context = uploader.new_browser_context(browser)
+                page = context.new_page()
+                duration, ok = timed(uploader.login_to_greasyfork, page)
+                if not ok:
+                    raise RuntimeError("模拟服务器登录失败")
+                fresh.append(duration)
+                context.close()
+
+                context = uploader.new_browser_context(browser)
+                page = context.new_page()
+                duration, ok = timed(uploader.login_to_greasyfork, page)
+                if not ok:
+                    raise RuntimeError("复用登录会话失败")
+                reuse.append(duration)
+                context.close()
+            finally:
+                browser.close()
+    results.append(summarize("launch", launch))
+    results.append(summarize("login_fresh", fresh))
+    results.append(summarize("login_reuse", reuse))
+    return results
+
+def bench_update(uploader, server, work_dir: str, sizes, runs: int, inject_strategy: str):
+    results = []
+    for script_kb, readme_kb in sizes:
+        script_id = f"{script_kb}{readme_kb:04d}"
+        server.state.add_script(script_id, make_script(1, "0.1"))
+        script_path = write_file(os.path.join(work_dir, f"update_{script_id}.user.js"), make_script(script_kb, "2.0"))
+        readme_path = write_file(os.path.join(work_dir, f"update_{script_id}.md"), make_readme(readme_kb))
+        durations = []
+        for _ in range(runs):
+            duration, ok = timed(uploader.update_script, script_id, script_path, readme_path, force=True, inject_strategy=inject_strategy)
+            if not ok:
+                raise RuntimeError(f"更新脚本失败: {script_id}")
+            durations.append(duration)
+        results.append(summarize("update", durations, script_kb=script_kb, readme_kb=readme_kb))
+    return results
+
+def bench_create(uploader, work_dir: str, runs: int, inject_strategy: str):
+    script_path = write_file(os.path.join(work_dir, "create.user.js"), make_script(50, "1.0", "新建基准测试脚本"))
+    readme_path = write_file(os.path.join(work_dir, "create.md"), make_readme(10))
+    durations = []
+    for _ in range(runs):
+        duration, _ = timed(uploader.create_new_script, script_path, readme_path, inject_strategy=inject_strategy)
+        durations.append(duration)
+    return [summarize("create", durations, script_kb=50, readme_kb=10)]
+
+def bench_batch(uploader, server, work_dir: str, count: int, levels, runs: int, inject_strategy: str):
+    jobs = []
+    for index in range(count):
+        script_id = str(5000 + index)
+        server.state.add_script(script_id, make_script(1, "0.1"))
+        script_path = write_file(os.path.join(work_dir, f"batch_{script_id}.user.js"), make_script(50, "2.0", f"批量脚本{index}"))
+        jobs.append({"script_id": script_id, "script_path": script_path})
+    results = []
+    for concurrency in levels:
+        durations = []
+        for _ in range(runs):
+            duration, done = timed(uploader.batch_update, jobs, concurrency=concurrency, force=True, inject_strategy=inject_strategy)
+            if len(done) != len(jobs):
+                raise RuntimeError(f"批量更新只完成了 {len(done)}/{len(jobs)} 个脚本")
+            durations.append(duration)
+        results.append(summarize("batch", durations, scripts=count, concurrency=concurrency))
+    return results
+
+def parse_sizes(spec: str):
+    """解析"脚本KB:READMEKB,..."格式的大小列表"""
+    sizes = []
+    for item in spec.split(","):
+        script_kb, _, readme_kb = item.partition(":")
+        sizes.append((int(script_kb), int(readme_kb or 0)))
+    return sizes
+
+def main():
+    parser = argparse.ArgumentParser(description="上传流程端到端基准测试")
+    parser.add_argument("--runs", type=int, default=3, help="每项测试的运行次数（默认3）")
+    parser.add_argument("--sizes", default="10:1,100:10,1000:50", help="update测试的脚本/README大小，格式 脚本KB:READMEKB,...（默认10:1,100:10,1000:50）")
+    parser.add_argument("--batch-size", type=int, default=8, help="批量更新的脚本数量（默认8）")
+    parser.add_argument("--concurrency", default="1,2,4,8", help="批量更新测试的并发标签页数量（默认1,2,4,8）")
+    parser.add_argument("--inject", default="auto", help="代码注入方式（默认auto）")
+    parser.add_argument("--latency-ms", type=float, default=0, help="模拟服务器每个请求的额外延迟，单位毫秒（默认0）")
+    parser.add_argument("--output", help="把结果以JSON格式写入文件")
+    parser.add_argument("--verbose", action="store_true", help="显示上传工具的输出")
+    args = parser.parse_args()
+
+    uploader = load_uploader()
+    server = start_mock_server(username=USERNAME, password=PASSWORD, latency=args.latency_ms / 1000)
+    uploader.GREASYFORK_URL = server.base_url
+    uploader.HEADLESS = True
+    uploader.wait_for_confirmation = lambda message: None
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        isolate_state(uploader, work_dir)
+        uploader.save_config({**uploader.default_config(), "username": USERNAME, "password": PASSWORD})
+
+        output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, "w"))
+        try:
+            with output:
+                results += bench_launch_and_login(uploader, args.runs)
+                results += bench_update(uploader, server, work_dir, parse_sizes(args.sizes), args.runs, args.inject)
+                results += bench_create(uploader, work_dir, args.runs, args.inject)
+                levels = [int(level) for level in args.concurrency.split(",")]
+                results += bench_batch(uploader, server, work_dir, args.batch_size, levels, args.runs, args.inject)
+        finally:
+            server.shutdown()
+
+    report = {
+        "latency_ms": args.latency_ms,
+        "inject": args.inject,
+        "requests": dict(server.state.requests),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print(f"{'阶段':<12} {'参数':<24} {'中位数':>10} {'最小':>10} {'最大':>10}")
+    for result in results:
+        params = ", ".join(f"{key}={value}" for key, value in result.items() if key not in ("name", "runs", "median_ms", "min_ms", "max_ms"))
+        print(f"{result['name']:<12} {params:<24} {result['median_ms']:>8.1f}ms {result['min_ms']:>8.1f}ms {result['max_ms']:>8.1f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -15,20 +15,31 @@ Greasy Fork Chrome上传工具
 import os
 import sys
 import re
+import io
+import copy
 import json
+import time
+import queue
+import tempfile
+import threading
+import glob
+import hashlib
 import argparse
 import getpass
+import importlib.util
+import itertools
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Callable
 from datetime import datetime
+from collections import deque
+from contextlib import contextmanager
+from urllib.parse import urlsplit, urlencode
 
 try:
-    from playwright.sync_api import sync_playwright
+    import fcntl
 except ImportError:
-    print("错误: 请先安装Playwright")
-    print("运行: pip install playwright")
-    print("然后: playwright install")
-    sys.exit(1)
+    # Windows上没有fcntl，配置文件不加锁
+    fcntl = None
 
 # 颜色定义
 class Colors:
@@ -44,56 +55,423 @@ def print_colored(text: str, color: str) -> None:
     """打印彩色文本"""
     print(f"{color}{text}{Colors.END}")
 
-def extract_metadata(script_path: str) -> tuple:
-    """从脚本中提取元数据"""
-    metadata = {
-        "name": "",
-        "description": "",
-        "version": "",
-    }
+def sync_playwright():
+    """按需导入Playwright
+
+    只有真正打开浏览器时才导入，status等只读命令无需安装Playwright也能快速启动。
+    """
+    try:
+        from playwright.sync_api import sync_playwright as _sync_playwright
+    except ImportError:
+        print("错误: 请先安装Playwright")
+        print("运行: pip install playwright")
+        print("然后: playwright install")
+        sys.exit(1)
+    return _sync_playwright()
+
+# 已读取的文本文件缓存: 绝对路径 -> ((修改时间, 大小), 内容)
+_TEXT_CACHE: Dict[str, tuple] = {}
+
+# 已解析的脚本缓存: 绝对路径 -> ((修改时间, 大小), ScriptArtifact)
+_ARTIFACT_CACHE: Dict[str, tuple] = {}
+
+def _file_key(path: str) -> tuple:
+    """文件缓存键，文件修改后自动失效"""
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+def read_text_file(path: str) -> str:
+    """读取文本文件，按(路径, 修改时间, 大小)缓存，同一文件在进程内只读取一次"""
+    path = os.path.abspath(path)
+    key = _file_key(path)
+    cached = _TEXT_CACHE.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    _TEXT_CACHE[path] = (key, content)
+    return content
+
+def parse_header_lines(lines, strict: bool = True) -> Optional[Dict[str, List[str]]]:
+    """单次遍历解析// ==UserScript==元数据块，读到==/UserScript==即停止
+
+    每个键对应一个值列表，以保留@match、@require、@grant等可重复的键。
+    strict为True时，元数据块之前只允许空行和注释，否则视为不是油猴脚本。
+    没有找到完整的元数据块时返回None。
+    """
+    header = None
+    for line in lines:
+        stripped = line.strip()
+        if header is None:
+            if stripped.startswith('//') and '==UserScript==' in stripped:
+                header = {}
+            elif strict and stripped and not stripped.startswith(('//', '/*', '*')):
+                # 元数据块之前出现了代码
+                return None
+            continue
+        
+        if '==/UserScript==' in stripped:
+            return header
+        match = re.match(r'//\s*@([\w:.-]+)(?:\s+(.*))?$', stripped)
+        if match:
+            header.setdefault(match.group(1), []).append((match.group(2) or "").strip())
+    
+    # 元数据块没有结束标记
+    return None
+
+class ScriptArtifact:
+    """油猴脚本文件：内容、元数据块和README，均只读取和解析一次"""
+    
+    def __init__(self, path: str, content: str):
+        self.path = path
+        self.content = content
+        self.header = parse_header_lines(io.StringIO(content), strict=False) or {}
+        self.metadata = {
+            "name": self.get("name"),
+            "description": self.get("description"),
+            "version": self.get("version"),
+        }
+    
+    def get(self, key: str, default: str = "") -> str:
+        """获取元数据键的第一个值"""
+        values = self.header.get(key)
+        return values[0] if values else default
+    
+    def get_all(self, key: str) -> List[str]:
+        """获取可重复元数据键（如match、require、grant）的全部值"""
+        return list(self.header.get(key, []))
+    
+    @property
+    def readme_path(self) -> Optional[str]:
+        return find_readme(self.path)
+    
+    @property
+    def readme(self) -> str:
+        return extract_readme(script_path=self.path)
+
+def load_script_artifact(script_path: str) -> ScriptArtifact:
+    """加载脚本，按(路径, 修改时间, 大小)缓存，所有调用方共享同一次读取"""
+    path = os.path.abspath(script_path)
+    key = _file_key(path)
+    cached = _ARTIFACT_CACHE.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+    
+    artifact = ScriptArtifact(path, read_text_file(path))
+    _ARTIFACT_CACHE[path] = (key, artifact)
+    return artifact
+
+def load_script(script_path: str, build_options: Optional[Dict[str, Any]] = None) -> tuple:
+    """读取脚本并返回(元数据, 要上传的内容)，开启构建时返回构建后的内容
+
+    Raises:
+        OSError, UnicodeDecodeError: 无法读取脚本文件
+        BuildError: 构建失败
+    """
+    artifact = load_script_artifact(script_path)
+    options = build_options if build_options is not None else BUILD_OPTIONS
+    if options is None:
+        return dict(artifact.metadata), artifact.content
+    return dict(artifact.metadata), build_script(artifact, **options)
+
+def extract_metadata(script_path: str, build_options: Optional[Dict[str, Any]] = None) -> tuple:
+    """从脚本中提取元数据，读取或构建失败时退出
     
+    开启构建（--build，或传入build_options）时返回构建后的脚本内容。
+    """
     try:
-        with open(script_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            
-        # 提取元数据
-        name_match = re.search(r'@name\s+(.+)', content)
-        if name_match:
-            metadata["name"] = name_match.group(1).strip()
-            
-        desc_match = re.search(r'@description\s+(.+)', content)
-        if desc_match:
-            metadata["description"] = desc_match.group(1).strip()
-            
-        version_match = re.search(r'@version\s+(.+)', content)
-        if version_match:
-            metadata["version"] = version_match.group(1).strip()
-            
-        return metadata, content
+        return load_script(script_path, build_options)
+    except BuildError as e:
+        print_colored(f"构建失败: {e}", Colors.RED)
+        sys.exit(1)
     except Exception as e:
         print_colored(f"读取脚本文件失败: {e}", Colors.RED)
         sys.exit(1)
 
+class BuildError(Exception):
+    """脚本构建失败（元数据校验不通过或本地@require文件不存在）"""
+
+# JS关键字之后出现的/是正则表达式的开始
+_REGEX_KEYWORDS = {"return", "typeof", "case", "do", "else", "in", "of", "new", "delete", "void", "throw", "instanceof", "yield", "await"}
+
+def _scan_quoted(source: str, start: int) -> int:
+    """返回从start开始的字符串字面量的结束位置（不跨行）"""
+    quote = source[start]
+    i = start + 1
+    while i < len(source):
+        ch = source[i]
+        if ch == '\\':
+            i += 2
+            continue
+        if ch == quote or ch == '\n':
+            return i + 1
+        i += 1
+    return len(source)
+
+def _scan_template(source: str, start: int) -> int:
+    """返回从start开始的模板字符串的结束位置，跳过${...}中嵌套的代码"""
+    i = start + 1
+    while i < len(source):
+        ch = source[i]
+        if ch == '\\':
+            i += 2
+        elif ch == '`':
+            return i + 1
+        elif source.startswith('${', i):
+            i = _scan_braces(source, i + 2)
+        else:
+            i += 1
+    return len(source)
+
+def _scan_braces(source: str, start: int) -> int:
+    """返回与start之前的{匹配的}之后的位置"""
+    depth = 1
+    i = start
+    while i < len(source):
+        ch = source[i]
+        if ch in '"\'':
+            i = _scan_quoted(source, i)
+            continue
+        if ch == '`':
+            i = _scan_template(source, i)
+            continue
+        if ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return len(source)
+
+def _scan_regex(source: str, start: int) -> int:
+    """返回从start开始的正则表达式字面量（含标志）的结束位置"""
+    i = start + 1
+    in_class = False
+    while i < len(source):
+        ch = source[i]
+        if ch == '\\':
+            i += 2
+            continue
+        if ch == '\n':
+            return i
+        if ch == '[':
+            in_class = True
+        elif ch == ']':
+            in_class = False
+        elif ch == '/' and not in_class:
+            i += 1
+            while i < len(source) and source[i].isalpha():
+                i += 1
+            return i
+        i += 1
+    return len(source)
+
+def _is_identifier_char(ch: str) -> bool:
+    return ch.isalnum() or ch in '_$'
+
+def strip_js(source: str) -> str:
+    """保守的JS压缩：删除注释（保留/*! */版权注释）、缩进、行尾空白和空行
+    
+    字符串、模板字符串和正则表达式原样保留；保留换行，不影响自动分号插入。
+    /是除号还是正则表达式的开始由之前的最后一个符号和标识符决定，两者都在扫描时逐字符更新。
+    """
+    pieces = []
+    # 当前的一段代码（不含字面量），空白在输出时合并
+    code = []
+    # 最后一个非空白字符；操作数之后的后缀++/--记为')'
+    last = ""
+    # 最后一个非空白符号是标识符时为该标识符（如return），否则为空
+    word = ""
+    word_end = -1
+    i = 0
+    n = len(source)
+    
+    def flush_code():
+        if code:
+            text = re.sub(r'[ \t\f\v]*\n\s*', '\n', ''.join(code))
+            pieces.append(re.sub(r'[ \t\f\v]+', ' ', text))
+            code.clear()
+    
+    while i < n:
+        ch = source[i]
+        if ch in '"\'`':
+            end = _scan_template(source, i) if ch == '`' else _scan_quoted(source, i)
+            flush_code()
+            pieces.append(source[i:end])
+            last = ch
+            word = ""
+            i = end
+            continue
+        if ch == '/' and source.startswith('//', i):
+            end = source.find('\n', i)
+            i = n if end == -1 else end
+            continue
+        if ch == '/' and source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            end = n if end == -1 else end + 2
+            if source.startswith('/*!', i):
+                flush_code()
+                pieces.append(source[i:end])
+            else:
+                code.append('\n' if '\n' in source[i:end] else ' ')
+            i = end
+            continue
+        if ch == '/':
+            if not last or last in '(,=:[!&|?{};+-*%<>~^' or word in _REGEX_KEYWORDS:
+                end = _scan_regex(source, i)
+                flush_code()
+                pieces.append(source[i:end])
+                last = '/'
+                word = ""
+                i = end
+                continue
+        if ch in '+-' and source.startswith(ch * 2, i):
+            # 紧跟在操作数之后的++/--是后缀运算符，之后的/是除号（如 i++ / 2）
+            postfix = bool(last) and (_is_identifier_char(last) or last in ')]')
+            code.append(ch * 2)
+            last = ')' if postfix else ch
+            word = ""
+            i += 2
+            continue
+        code.append(ch)
+        if _is_identifier_char(ch):
+            word = word + ch if word_end == i else ch
+            word_end = i + 1
+            last = ch
+        elif not ch.isspace():
+            last = ch
+            word = ""
+        i += 1
+    flush_code()
+    return ''.join(pieces).strip() + '\n'
+
+def minify_js(source: str) -> str:
+    """压缩脚本主体：安装了rjsmin时使用它（保留/*! */注释），否则使用strip_js"""
+    try:
+        import rjsmin
+    except ImportError:
+        return strip_js(source)
+    return rjsmin.jsmin(source, keep_bang_comments=True) + '\n'
+
+def split_userscript(content: str) -> tuple:
+    """把脚本拆分为(元数据块及之前的部分, 主体)，没有元数据块时前者为空"""
+    match = re.search(r'^[ \t]*//[ \t]*==/UserScript==[^\n]*(\n|$)', content, re.MULTILINE)
+    if not match:
+        return "", content
+    return content[:match.end()], content[match.end():]
+
+def _build_cache_path(stage: str, material: str) -> str:
+    digest = hashlib.sha256(f"{stage}\0{BUILD_CACHE_VERSION}\0{material}".encode('utf-8')).hexdigest()
+    return os.path.join(BUILD_CACHE_DIR, f"{stage}-{digest[:32]}.js")
+
+def cached_build_stage(stage: str, source: str, func, material: str = "") -> tuple:
+    """按内容哈希缓存构建步骤的输出，返回(输出, 是否命中缓存)
+    
+    material为影响输出的其他内容（如被内联的文件），与输入一起计算哈希。
+    """
+    path = _build_cache_path(stage, material + "\0" + source)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read(), True
+    except OSError:
+        pass
+    
+    output = func(source)
+    try:
+        os.makedirs(BUILD_CACHE_DIR, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=BUILD_CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(output)
+        os.replace(temp_path, path)
+    except OSError as e:
+        print_colored(f"写入构建缓存失败: {e}", Colors.YELLOW)
+    return output, False
+
+def is_local_require(url: str) -> bool:
+    return not re.match(r'^https?://', url)
+
+def load_local_requires(artifact: ScriptArtifact) -> List[tuple]:
+    """读取脚本中本地@require（相对路径或file://）的文件，返回[(url, 内容)]"""
+    requires = []
+    base_dir = os.path.dirname(artifact.path)
+    for url in artifact.get_all("require"):
+        if not is_local_require(url):
+            continue
+        path = os.path.join(base_dir, url[len("file://"):] if url.startswith("file://") else url)
+        if not os.path.exists(path):
+            raise BuildError(f"@require文件不存在: {url}")
+        requires.append((url, read_text_file(path)))
+    return requires
+
+def inline_requires(content: str, requires: List[tuple]) -> str:
+    """把本地@require文件的内容按顺序放到主体之前，并从元数据块中删除对应的@require"""
+    header, body = split_userscript(content)
+    for url, _ in requires:
+        header = re.sub(rf'^[ \t]*//[ \t]*@require[ \t]+{re.escape(url)}[ \t]*\n', '', header, count=1, flags=re.MULTILINE)
+    inlined = "".join(source if source.endswith("\n") else source + "\n" for _, source in requires)
+    return header + inlined + body
+
+def validate_userscript(artifact: ScriptArtifact, inline: bool = False) -> List[str]:
+    """校验元数据，返回警告列表；缺少Greasy Fork必需的字段时抛出BuildError"""
+    if not artifact.header:
+        raise BuildError("没有找到 // ==UserScript== 元数据块")
+    missing = [f"@{key}" for key in ("name", "description", "version") if not artifact.get(key)]
+    if missing:
+        raise BuildError(f"缺少必需的元数据: {', '.join(missing)}")
+    
+    warnings = []
+    for key in ("namespace", "license"):
+        if not artifact.get(key):
+            warnings.append(f"缺少@{key}")
+    if not re.match(r'^[\w.+-]+$', artifact.get("version")):
+        warnings.append(f"@version格式不规范: {artifact.get('version')}")
+    if not inline:
+        for url in artifact.get_all("require"):
+            if is_local_require(url):
+                warnings.append(f"本地@require在Greasy Fork上无法加载，可使用--inline-requires内联: {url}")
+    return warnings
+
+def build_script(artifact: ScriptArtifact, inline: bool = False, minify: bool = True) -> str:
+    """上传前的构建：校验元数据、内联本地@require、压缩主体（保留元数据块）
+    
+    每个步骤的输出按内容哈希缓存在BUILD_CACHE_DIR中，文件没有变化时直接使用缓存。
+    """
+    for warning in validate_userscript(artifact, inline):
+        print_colored(f"警告: {warning}", Colors.YELLOW)
+    
+    content = artifact.content
+    hits = []
+    if inline:
+        requires = load_local_requires(artifact)
+        if requires:
+            # 被内联文件的内容也参与缓存键
+            material = "\0".join(f"{url}\0{source}" for url, source in requires)
+            content, hit = cached_build_stage("inline", content, lambda source: inline_requires(source, requires), material)
+            hits.append(hit)
+    if minify:
+        header, body = split_userscript(content)
+        body, hit = cached_build_stage("minify", body, minify_js)
+        hits.append(hit)
+        content = header + body
+    
+    before = len(artifact.content.encode('utf-8'))
+    after = len(content.encode('utf-8'))
+    source = "缓存" if hits and all(hits) else "构建"
+    saved = (1 - after / before) * 100 if before else 0
+    print_colored(f"构建完成 ({source}): {before} -> {after} 字节 (减少 {saved:.0f}%)", Colors.BLUE)
+    return content
+
 def extract_readme(readme_path: Optional[str] = None, script_path: Optional[str] = None) -> str:
     """提取README内容"""
     if not readme_path and script_path:
         # 尝试在脚本同目录下查找README文件
-        script_dir = os.path.dirname(os.path.abspath(script_path))
-        possible_readmes = [
-            os.path.join(script_dir, "README.md"),
-            os.path.join(script_dir, "readme.md"),
-            os.path.join(script_dir, "README.txt"),
-        ]
-        
-        for path in possible_readmes:
-            if os.path.exists(path):
-                readme_path = path
-                break
+        readme_path = find_readme(script_path)
     
     if readme_path and os.path.exists(readme_path):
         try:
-            with open(readme_path, 'r', encoding='utf-8') as f:
-                return f.read()
+            return read_text_file(readme_path)
         except Exception as e:
             print_colored(f"读取README文件失败: {e}", Colors.YELLOW)
     
@@ -105,37 +483,429 @@ PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
 CONFIG_FILE = os.path.join(PROJECT_DIR, "config.json")
 CONFIG_EXAMPLE_FILE = os.path.join(PROJECT_DIR, "config.json.example")
 
-# 上传历史记录文件
+# 登录会话缓存文件（Playwright storage state）
+SESSION_STATE_FILE = os.path.join(PROJECT_DIR, "greasyfork_session.json")
+
+# 上传指纹缓存文件（按脚本ID记录上次上传内容的哈希）
+FINGERPRINT_FILE = os.path.join(PROJECT_DIR, "upload_fingerprints.json")
+
+# 参与指纹比较的字段及显示名称
+FINGERPRINT_FIELDS = {
+    "code": "脚本代码",
+    "readme": "附加信息",
+    "name": "名称",
+    "description": "描述",
+    "version": "版本",
+}
+
+# 油猴脚本索引文件（快速更新模式查找最近修改的脚本时使用）
+SCRIPT_INDEX_FILE = os.path.join(PROJECT_DIR, "userscript_index.json")
+SCRIPT_INDEX_VERSION = 1
+
+# 建立索引时跳过的依赖和构建目录
+INDEX_IGNORED_DIRS = {"node_modules", "bower_components", "vendor", "dist", "build", "__pycache__"}
+
+# audit命令的JSON报告
+AUDIT_REPORT_FILE = os.path.join(PROJECT_DIR, "audit_report.json")
+
+# 脚本数量达到此值时才使用进程池（进程启动的开销大于解析少量脚本的时间）
+AUDIT_PARALLEL_THRESHOLD = 64
+
+# @match/@include超过此数量时提示合并
+AUDIT_MAX_MATCHES = 10
+
+# 超过此大小（字节）的脚本给出提示
+AUDIT_MAX_SIZE = 1024 * 1024
+
+# Greasy Fork要求的元数据键
+AUDIT_REQUIRED_KEYS = ("name", "description", "version")
+
+# 合法的版本号：数字开头，点分段，段内可带字母后缀（如1.2.3、2.0b1）
+AUDIT_VERSION_PATTERN = re.compile(r'^\d+[0-9A-Za-z+_-]*(\.[0-9A-Za-z+_-]+)*$')
+
+# 合法的@match模式：协议://主机/路径，主机只能是*、*.域名或完整域名
+AUDIT_MATCH_PATTERN = re.compile(r'^(\*|https?|file|ftp|urn)://(\*|(\*\.)?[^/*]+)?/.*$')
+
+# 上传历史记录（只追加写入的JSONL，每行一条记录）
+UPLOAD_HISTORY_STORE = os.path.join(PROJECT_DIR, "upload_history.jsonl")
+
+# 由上传历史记录生成的Markdown表格
 UPLOAD_HISTORY_FILE = os.path.join(PROJECT_DIR, "upload_history.md")
 
-def load_config() -> Dict[str, Any]:
-    """加载配置文件"""
-    default_config = {
+# 历史记录字段及Markdown表头
+HISTORY_FIELDS = ["date", "time", "script_name", "script_id", "version", "operation_type", "remarks"]
+HISTORY_HEADERS = ["日期", "时间", "脚本名称", "脚本ID", "版本", "操作类型", "备注"]
+
+# Greasy Fork站点地址
+GREASYFORK_URL = "https://greasyfork.org/zh-CN"
+
+# 附加信息（README）在版本表单中的字段名
+ADDITIONAL_INFO_FIELD = "script_version[additional_info][0][attribute_value]"
+
+# 选择器缓存文件（记录每个表单字段上次匹配成功的选择器）
+SELECTOR_CACHE_FILE = os.path.join(PROJECT_DIR, "selector_cache.json")
+
+# 表单字段的候选选择器，按优先级排列
+FORM_FIELD_SELECTORS = {
+    "update": {
+        "code": ["#script_version_code", 'textarea[name="script_version[code]"]'],
+        "changelog": ["#script_version_changelog", 'textarea[name="script_version[changelog]"]'],
+        "additional_info": [
+            "#script-version-additional-info-0",
+            'textarea[name="script_version[additional_info][0][attribute_value]"]',
+            "#script_additional_info",
+        ],
+    },
+    "new": {
+        "name": ["#script_name", 'input[name="script[name]"]'],
+        "description": ["#script_description", 'input[name="script[description]"]'],
+        "code": ["#script_code", 'textarea[name="script[code]"]', "#script_version_code"],
+        "additional_info": [
+            "#script-version-additional-info-0",
+            'textarea[name="script_version[additional_info][0][attribute_value]"]',
+            "#script_additional_info",
+        ],
+    },
+}
+
+# 一次调用中按顺序检查所有候选选择器，返回第一个存在的
+FIRST_MATCH_SCRIPT = "(selectors) => selectors.find((selector) => document.querySelector(selector)) || null"
+
+# 等待表单必需字段出现的最长时间（毫秒），字段出现后立即继续
+FIELD_WAIT_TIMEOUT = 30000
+
+# 代码注入：小于此大小时使用page.fill
+INJECT_FILL_MAX_BYTES = 64 * 1024
+
+# 代码注入：不小于此大小且页面有代码上传框时使用文件上传
+INJECT_UPLOAD_MIN_BYTES = 1024 * 1024
+
+# 代码注入方式
+INJECT_STRATEGIES = ["auto", "fill", "dom", "upload"]
+
+# 代码文件上传框
+CODE_UPLOAD_SELECTOR = 'input[type="file"][name="code_upload"]'
+
+# 直接设置文本框的值并触发input/change事件（页面挂了CodeMirror编辑器时同步更新编辑器）
+SET_VALUE_SCRIPT = """(el, value) => {
+    const editor = el.nextElementSibling && el.nextElementSibling.CodeMirror;
+    if (editor) {
+        editor.setValue(value);
+    }
+    el.value = value;
+    el.dispatchEvent(new Event('input', { bubbles: true }));
+    el.dispatchEvent(new Event('change', { bubbles: true }));
+}"""
+
+# 在页面中计算字段当前值的SHA-256（与SET_VALUE_SCRIPT一样优先读取CodeMirror编辑器），
+# 只把哈希传回Python，大字段不必整段传输；页面不支持crypto.subtle时返回null
+FIELD_HASH_SCRIPT = """async (el) => {
+    const editor = el.nextElementSibling && el.nextElementSibling.CodeMirror;
+    const value = editor ? editor.getValue() : el.value;
+    if (!window.crypto || !window.crypto.subtle) {
+        return null;
+    }
+    const digest = await window.crypto.subtle.digest('SHA-256', new TextEncoder().encode(value));
+    return Array.from(new Uint8Array(digest), (b) => b.toString(16).padStart(2, '0')).join('');
+}"""
+
+# 读取表单字段的名称和当前值（与SET_VALUE_SCRIPT一样优先读取CodeMirror编辑器）
+READ_FIELD_SCRIPT = """(el) => {
+    const editor = el.nextElementSibling && el.nextElementSibling.CodeMirror;
+    return { name: el.name, value: editor ? editor.getValue() : el.value };
+}"""
+
+# HTTP引擎使用的User-Agent
+HTTP_USER_AGENT = "greasy-fork-chrome-uploader/1.0 (+https://github.com/monty8800/amazon-seller-tools)"
+
+# macOS上Chrome的默认路径
+DEFAULT_CHROME_PATH = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
+
+# 浏览器请求拦截的默认策略（配置文件中的resource_policy可覆盖）：
+#   block_types: 拦截的资源类型（Playwright的resource_type）
+#   block_hosts: 额外拦截的主机（包括子域名），与DEFAULT_BLOCKED_HOSTS合并
+#   allow_hosts: 始终放行的主机，优先于以上规则
+DEFAULT_RESOURCE_POLICY = {
+    "block_types": ["image", "media", "font"],
+    "block_hosts": [],
+    "allow_hosts": [],
+}
+
+# 默认拦截的统计和广告主机
+DEFAULT_BLOCKED_HOSTS = [
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googlesyndication.com",
+    "googleadservices.com",
+    "doubleclick.net",
+    "adservice.google.com",
+    "carbonads.net",
+    "carbonads.com",
+    "buysellads.com",
+    "ethicalads.io",
+    "scorecardresearch.com",
+    "quantserve.com",
+]
+
+# 是否拦截与填写表单无关的请求（--no-block关闭）
+BLOCK_RESOURCES = True
+
+# 是否以无头模式启动浏览器（--headless或基准测试使用）
+HEADLESS = False
+
+# 审核模式（--headless）：填写完成后生成审核包并立即关闭浏览器，不等待用户确认
+REVIEW_MODE = False
+
+# 审核包目录，每个审核包一个子目录
+REVIEW_DIR = os.path.join(PROJECT_DIR, "reviews")
+
+# 审核包中各字段值的文件名
+REVIEW_FIELD_FILES = {
+    "name": "name.txt",
+    "description": "description.txt",
+    "code": "code.js",
+    "changelog": "changelog.txt",
+    "additional_info": "additional_info.md",
+}
+
+# 批量更新时同时加载的标签页数量
+DEFAULT_BATCH_CONCURRENCY = 4
+
+# 更新前是否通过HTTP检查已发布的版本（--no-remote-check关闭）
+REMOTE_CHECK = True
+
+# 已发布代码的条件请求缓存（地址 -> ETag、Last-Modified和解析结果）
+REMOTE_CACHE_FILE = os.path.join(PROJECT_DIR, "remote_cache.json")
+
+# Greasy Fork发布时会替换的元数据行，比较代码时忽略
+REMOTE_IGNORED_KEYS_PATTERN = re.compile(r'^[ \t]*//[ \t]*@(downloadURL|updateURL)\b.*(\r?\n|$)', re.MULTILINE)
+
+# 构建缓存目录（按内容哈希保存各构建步骤的输出）
+BUILD_CACHE_DIR = os.path.join(PROJECT_DIR, ".build_cache")
+
+# 构建逻辑变化时递增，使旧的缓存失效
+BUILD_CACHE_VERSION = 2
+
+# 上传前的构建选项（--build），为None时直接上传原文件
+BUILD_OPTIONS: Optional[Dict[str, Any]] = None
+
+# 批量任务队列文件（记录每个任务的状态和尝试次数，--resume从这里继续）
+JOB_QUEUE_FILE = os.path.join(PROJECT_DIR, "upload_queue.json")
+
+# 任务失败后的最多尝试次数
+JOB_MAX_ATTEMPTS = 3
+
+# 重试的退避时间（秒）：第n次失败后等待 JOB_RETRY_BASE_DELAY * 2^(n-1)，不超过JOB_RETRY_MAX_DELAY
+JOB_RETRY_BASE_DELAY = 5
+JOB_RETRY_MAX_DELAY = 120
+
+# 两次提交之间的最短间隔（秒），并发时全局生效，避免超出Greasy Fork的发布频率限制
+POST_MIN_INTERVAL = 5.0
+
+# 守护进程的Unix套接字（放在临时目录，避免项目路径过长超出套接字路径长度限制）
+DAEMON_SOCKET = os.path.join(tempfile.gettempdir(), f"greasyfork-uploader-{os.getuid() if hasattr(os, 'getuid') else 0}.sock")
+
+# 守护进程默认保持的已登录浏览器上下文数量
+DEFAULT_DAEMON_WORKERS = 2
+
+# 监视模式检查文件变化的间隔（毫秒）
+WATCH_POLL_INTERVAL = 500
+
+# 监视模式的去抖时间（毫秒）：文件在这段时间内不再变化才重新填写，连续保存只触发一次
+WATCH_DEBOUNCE = 400
+
+# 阶段耗时记录文件（--timings未指定路径时使用），每个阶段一行JSON
+TIMINGS_FILE = os.path.join(PROJECT_DIR, "upload_timings.jsonl")
+
+# Playwright追踪文件目录（--trace）
+TRACE_DIR = os.path.join(PROJECT_DIR, "traces")
+
+# 是否记录Playwright追踪（--trace）
+TRACE_ENABLED = False
+
+# 阶段耗时记录的输出文件，为None时不写文件
+_TIMINGS_PATH: Optional[str] = None
+
+# 阶段耗时回调，每个阶段结束时以span字典调用
+_TIMING_HOOKS: List[Callable[[Dict[str, Any]], None]] = []
+
+# 本进程的运行ID，用于区分不同运行写入同一文件的记录
+_TIMING_RUN_ID = f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{os.getpid()}"
+_TIMING_SPAN_IDS = itertools.count(1)
+_TIMING_LOCAL = threading.local()
+_TIMING_WRITE_LOCK = threading.Lock()
+
+def enable_timings(path: Optional[str] = None) -> str:
+    """开启阶段耗时记录，写入path（默认TIMINGS_FILE），返回实际路径"""
+    global _TIMINGS_PATH
+    _TIMINGS_PATH = os.path.abspath(path or TIMINGS_FILE)
+    return _TIMINGS_PATH
+
+def add_timing_hook(hook: Callable[[Dict[str, Any]], None]) -> None:
+    """注册阶段耗时回调，供包装脚本汇总多次运行的耗时"""
+    _TIMING_HOOKS.append(hook)
+
+def remove_timing_hook(hook: Callable[[Dict[str, Any]], None]) -> None:
+    """移除阶段耗时回调"""
+    if hook in _TIMING_HOOKS:
+        _TIMING_HOOKS.remove(hook)
+
+def _emit_span(span: Dict[str, Any]) -> None:
+    for hook in list(_TIMING_HOOKS):
+        try:
+            hook(span)
+        except Exception as e:
+            print_colored(f"阶段耗时回调出错: {e}", Colors.YELLOW)
+    if _TIMINGS_PATH:
+        line = json.dumps(span, ensure_ascii=False)
+        try:
+            with _TIMING_WRITE_LOCK, open(_TIMINGS_PATH, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+        except OSError as e:
+            print_colored(f"写入阶段耗时失败: {e}", Colors.YELLOW)
+
+@contextmanager
+def timing_span(phase: str, **attrs):
+    """记录一个阶段的耗时
+    
+    产出span字典，阶段内可继续补充属性（如填写的字节数、匹配的选择器）。
+    嵌套的阶段通过parent关联；阶段内抛出的异常记录在error中并继续抛出。
+    """
+    stack = _TIMING_LOCAL.__dict__.setdefault("stack", [])
+    span = {
+        "run": _TIMING_RUN_ID,
+        "id": next(_TIMING_SPAN_IDS),
+        "parent": stack[-1]["id"] if stack else None,
+        "phase": phase,
+        "start": datetime.now().isoformat(timespec="milliseconds"),
+    }
+    span.update(attrs)
+    stack.append(span)
+    start = time.perf_counter()
+    try:
+        yield span
+    except BaseException as e:
+        span["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        span["duration_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        stack.pop()
+        _emit_span(span)
+
+def start_trace(context) -> None:
+    """开启Playwright追踪（--trace）"""
+    if TRACE_ENABLED:
+        context.tracing.start(screenshots=True, snapshots=True, sources=False)
+
+def stop_trace(context, name: str) -> None:
+    """保存Playwright追踪文件，可用 playwright show-trace 查看"""
+    if not TRACE_ENABLED:
+        return
+    try:
+        os.makedirs(TRACE_DIR, exist_ok=True)
+        path = os.path.join(TRACE_DIR, f"{name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.zip")
+        context.tracing.stop(path=path)
+        print_colored(f"Playwright追踪已保存: {path}", Colors.BLUE)
+    except Exception as e:
+        print_colored(f"保存Playwright追踪失败: {e}", Colors.YELLOW)
+
+# 进程内只加载一次的配置
+_CONFIG: Optional[Dict[str, Any]] = None
+
+def default_config() -> Dict[str, Any]:
+    """默认配置"""
+    return {
         "username": "",
         "password": "",
         "last_script_id": "",
+        # 脚本文件路径 -> Greasy Fork脚本ID
+        "script_ids": {},
+        # 浏览器请求拦截策略，见DEFAULT_RESOURCE_POLICY
+        "resource_policy": {},
     }
-    
+
+@contextmanager
+def file_lock(path: str):
+    """对path对应的.lock文件加排他锁，防止多个进程同时读改写（不支持fcntl的平台上不加锁）"""
+    with open(path + ".lock", 'a') as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+def write_json_atomic(path: str, data: Any, mode: Optional[int] = None) -> None:
+    """先写入同目录下的临时文件再重命名，写入中断时原文件保持完整"""
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        if mode is not None:
+            os.chmod(temp_path, mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def _read_config_file() -> Dict[str, Any]:
+    """从磁盘读取配置，缺少的键使用默认值"""
+    config = default_config()
     if os.path.exists(CONFIG_FILE):
         try:
             with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
+                config.update(json.load(f))
         except Exception as e:
             print_colored(f"读取配置文件失败: {e}", Colors.RED)
-    
-    return default_config
+    return config
+
+def load_config() -> Dict[str, Any]:
+    """加载配置文件（每个进程只读取一次，返回副本）"""
+    global _CONFIG
+    if _CONFIG is None:
+        _CONFIG = _read_config_file()
+    return copy.deepcopy(_CONFIG)
 
 def save_config(config: Dict[str, Any]) -> None:
     """保存配置文件"""
+    global _CONFIG
     try:
-        with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=2, ensure_ascii=False)
-        # 设置权限为仅用户可读写
-        os.chmod(CONFIG_FILE, 0o600)
+        with file_lock(CONFIG_FILE):
+            # 设置权限为仅用户可读写
+            write_json_atomic(CONFIG_FILE, config, mode=0o600)
+        _CONFIG = copy.deepcopy(config)
         print_colored("配置已安全保存", Colors.GREEN)
     except Exception as e:
         print_colored(f"保存配置文件失败: {e}", Colors.RED)
 
+def update_config(changes: Dict[str, Any], script_ids: Optional[Dict[str, str]] = None) -> None:
+    """在文件锁内重新读取配置、合并修改后写回，不会覆盖其他进程同时写入的内容
+
+    Args:
+        changes: 要修改的顶层配置项
+        script_ids: 要合并到脚本路径映射中的条目
+    """
+    global _CONFIG
+    try:
+        with file_lock(CONFIG_FILE):
+            config = _read_config_file()
+            config.update(changes)
+            if script_ids:
+                config["script_ids"] = dict(config.get("script_ids") or {}, **script_ids)
+            write_json_atomic(CONFIG_FILE, config, mode=0o600)
+        _CONFIG = config
+    except Exception as e:
+        print_colored(f"保存配置文件失败: {e}", Colors.RED)
+
+def get_script_id_for_path(script_path: str) -> str:
+    """从配置的路径映射中查找脚本对应的Greasy Fork脚本ID"""
+    script_ids = load_config().get("script_ids") or {}
+    return str(script_ids.get(os.path.abspath(script_path), ""))
+
 def get_credentials(username=None, password=None, save_config_flag=False) -> tuple:
     """获取登录凭据"""
     config = load_config()
@@ -159,293 +929,2372 @@ def get_credentials(username=None, password=None, save_config_flag=False) -> tup
     
     return config["username"], config["password"]
 
-def login_to_greasyfork(page, skip_login=False, username=None, password=None):
-    """登录到Greasy Fork"""
-    # 如果用户指定跳过登录，则直接返回
-    if skip_login:
-        print_colored("跳过登录步骤，使用现有浏览器会话", Colors.BLUE)
-        return True
+def has_saved_session() -> bool:
+    """检查登录会话缓存是否存在且仍有未过期的Cookie（不访问网络）"""
+    if not os.path.exists(SESSION_STATE_FILE):
+        return False
+    
+    try:
+        with open(SESSION_STATE_FILE, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except Exception:
+        return False
+    
+    now = datetime.now().timestamp()
+    # expires为-1表示会话Cookie，由服务器端决定是否有效
+    return any(cookie.get("expires", -1) == -1 or cookie["expires"] > now for cookie in state.get("cookies", []))
+
+class ResourceBlocker:
+    """浏览器上下文的请求拦截：按资源类型和主机拦截与填写表单无关的请求，并统计数量
+    
+    被拦截的请求不会发出，无法得知其大小；loaded_bytes按响应的Content-Length
+    统计实际加载的字节数，可与 --no-block 时对比。
+    """
+    
+    def __init__(self, policy: Dict[str, List[str]]):
+        self.block_types = set(policy["block_types"])
+        self.block_hosts = list(DEFAULT_BLOCKED_HOSTS) + list(policy["block_hosts"])
+        self.allow_hosts = list(policy["allow_hosts"])
+        # 拦截原因（资源类型或"tracking"）-> 数量
+        self.blocked: Dict[str, int] = {}
+        self.allowed = 0
+        self.loaded_bytes = 0
+    
+    @staticmethod
+    def _match_host(host: str, hosts: List[str]) -> bool:
+        return any(host == item or host.endswith("." + item) for item in hosts)
+    
+    def block_reason(self, request) -> Optional[str]:
+        """返回拦截原因，放行时返回None"""
+        host = urlsplit(request.url).hostname or ""
+        if self._match_host(host, self.allow_hosts):
+            return None
+        if self._match_host(host, self.block_hosts):
+            return "tracking"
+        if request.resource_type in self.block_types:
+            return request.resource_type
+        return None
+    
+    def handle_route(self, route, request) -> None:
+        reason = self.block_reason(request)
+        if reason:
+            self.blocked[reason] = self.blocked.get(reason, 0) + 1
+            route.abort("blockedbyclient")
+        else:
+            self.allowed += 1
+            route.continue_()
+    
+    def handle_response(self, response) -> None:
+        try:
+            self.loaded_bytes += int(response.headers.get("content-length", 0))
+        except ValueError:
+            pass
+    
+    @property
+    def blocked_total(self) -> int:
+        return sum(self.blocked.values())
+    
+    def summary(self) -> str:
+        detail = ", ".join(f"{reason} {count}" for reason, count in sorted(self.blocked.items()))
+        return f"已拦截 {self.blocked_total} 个请求{f' ({detail})' if detail else ''}，放行 {self.allowed} 个，加载 {self.loaded_bytes // 1024} KB"
+
+# 浏览器上下文 -> 请求拦截器
+_RESOURCE_BLOCKERS: Dict[Any, ResourceBlocker] = {}
+
+def load_resource_policy() -> Dict[str, List[str]]:
+    """读取请求拦截策略，配置文件中的resource_policy覆盖默认值"""
+    policy = copy.deepcopy(DEFAULT_RESOURCE_POLICY)
+    policy.update(load_config().get("resource_policy") or {})
+    return policy
+
+def install_resource_blocker(context) -> Optional[ResourceBlocker]:
+    """为浏览器上下文开启请求拦截（BLOCK_RESOURCES为False时不拦截）"""
+    if not BLOCK_RESOURCES:
+        return None
+    blocker = ResourceBlocker(load_resource_policy())
+    context.route("**/*", blocker.handle_route)
+    context.on("response", blocker.handle_response)
+    _RESOURCE_BLOCKERS[context] = blocker
+    return blocker
+
+def report_resource_blocking(context, span: Optional[Dict[str, Any]] = None) -> None:
+    """显示上下文的请求拦截统计，并记录到阶段耗时中"""
+    blocker = _RESOURCE_BLOCKERS.pop(context, None)
+    if not blocker:
+        return
+    print_colored(blocker.summary(), Colors.BLUE)
+    if span is not None:
+        span.update(blocked_requests=blocker.blocked_total, blocked=dict(blocker.blocked), allowed_requests=blocker.allowed, loaded_bytes=blocker.loaded_bytes)
+
+def new_browser_context(browser):
+    """创建浏览器上下文，如有登录会话缓存则直接载入，并按策略拦截无关请求"""
+    if has_saved_session():
+        context = browser.new_context(storage_state=SESSION_STATE_FILE)
+    else:
+        context = browser.new_context()
+    install_resource_blocker(context)
+    return context
+
+def save_session_state(context) -> None:
+    """保存登录后的Cookie和localStorage，供下次运行复用"""
+    try:
+        context.storage_state(path=SESSION_STATE_FILE)
+        # 会话等同于登录凭据，设置权限为仅用户可读写
+        os.chmod(SESSION_STATE_FILE, 0o600)
+    except Exception as e:
+        print_colored(f"保存登录会话失败: {e}", Colors.YELLOW)
+
+def is_session_valid(context) -> bool:
+    """用一次不渲染页面的请求检查当前上下文是否仍处于登录状态"""
+    if not context.cookies():
+        return False
+    
+    try:
+        # 未登录时新建脚本页面会重定向到登录页
+        response = context.request.get(f"{GREASYFORK_URL}/scripts/new", max_redirects=0, timeout=5000)
+        return response.status == 200
+    except Exception:
+        return False
+
+def login_to_greasyfork(page, skip_login=False, username=None, password=None, session_valid: Optional[bool] = None):
+    """登录到Greasy Fork
+    
+    session_valid为预检中已得到的登录会话检查结果，为None时在此检查。
+    """
+    with timing_span("login") as span:
+        # 如果用户指定跳过登录，则直接返回
+        if skip_login:
+            print_colored("跳过登录步骤，使用现有浏览器会话", Colors.BLUE)
+            span.update(method="skip", ok=True)
+            return True
+        
+        # 优先复用已保存的登录会话
+        with timing_span("session_check", preflight=session_valid is not None) as check:
+            check["valid"] = session_valid if session_valid is not None else is_session_valid(page.context)
+        if check["valid"]:
+            print_colored("已复用保存的登录会话", Colors.GREEN)
+            span.update(method="reuse", ok=True)
+            return True
+        
+        print_colored("正在登录Greasy Fork...", Colors.BLUE)
+        span["method"] = "form"
+        span["ok"] = False
+        
+        # 获取登录凭据
+        username, password = get_credentials(username, password)
+        
+        # 访问登录页面
+        with timing_span("goto", page="sign_in"):
+            page.goto(f"{GREASYFORK_URL}/users/sign_in", wait_until="domcontentloaded")
+        
+        # 填写登录表单（DOM解析完成后表单即可填写）
+        try:
+            # 使用安全获取的凭据
+            with timing_span("fill_credentials"):
+                page.fill("#user_email", username)
+                page.fill("#user_password", password)
+            
+            # 点击登录按钮，等待跳转后的页面DOM就绪
+            with timing_span("submit_login"):
+                with page.expect_navigation(wait_until="domcontentloaded", timeout=FIELD_WAIT_TIMEOUT):
+                    page.click('input[name="commit"]')
+            
+            # 登录成功后页面导航栏中有用户链接，失败则停留在登录页，无需等待超时
+            if page.query_selector(".user-profile-link"):
+                print_colored("登录成功！", Colors.GREEN)
+                save_session_state(page.context)
+                span["ok"] = True
+                return True
+            print_colored("警告: 登录可能失败，尝试继续操作...", Colors.YELLOW)
+            return False
+        except Exception as e:
+            print_colored(f"登录过程出错: {e}", Colors.RED)
+            return False
+
+def compute_fingerprint(metadata: Dict[str, str], content: str, readme_content: str) -> Dict[str, str]:
+    """计算脚本的内容指纹（代码和README取哈希，元数据保留原值）"""
+    return {
+        "code": hashlib.sha256(content.encode('utf-8')).hexdigest(),
+        "readme": hashlib.sha256(readme_content.encode('utf-8')).hexdigest(),
+        "name": metadata["name"],
+        "description": metadata["description"],
+        "version": metadata["version"],
+    }
+
+def load_fingerprints() -> Dict[str, Dict[str, str]]:
+    """加载指纹缓存（按脚本ID索引）"""
+    if os.path.exists(FINGERPRINT_FILE):
+        try:
+            with open(FINGERPRINT_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print_colored(f"读取指纹缓存失败: {e}", Colors.YELLOW)
+    return {}
+
+def get_changed_fields(script_id: str, fingerprint: Dict[str, str]) -> List[str]:
+    """与上次上传的指纹比较，返回发生变化的字段；没有记录时视为全部变化"""
+    previous = load_fingerprints().get(script_id)
+    if not previous:
+        return list(FINGERPRINT_FIELDS)
+    return [field for field in FINGERPRINT_FIELDS if previous.get(field) != fingerprint.get(field)]
+
+def check_script_changed(script_id: str, fingerprint: Dict[str, str], force: bool = False) -> bool:
+    """上传前检查脚本是否有变化，并显示变化的字段"""
+    changed = get_changed_fields(script_id, fingerprint)
+    if not changed:
+        if force:
+            print_colored(f"脚本 (ID: {script_id}) 与上次上传相同，已指定--force，继续更新", Colors.YELLOW)
+            return True
+        print_colored(f"脚本 (ID: {script_id}) 与上次上传相同，跳过更新", Colors.GREEN)
+        return False
+    
+    print(f"  变化内容: {', '.join(FINGERPRINT_FIELDS[field] for field in changed)}")
+    return True
+
+def record_fingerprint(script_id: str, fingerprint: Dict[str, str]) -> None:
+    """上传完成后记录脚本指纹（在文件锁内读改写，并发的上传任务不会互相覆盖）"""
+    try:
+        with file_lock(FINGERPRINT_FILE):
+            fingerprints = load_fingerprints()
+            fingerprints[script_id] = dict(fingerprint, uploaded_at=datetime.now().isoformat(timespec="seconds"))
+            write_json_atomic(FINGERPRINT_FILE, fingerprints)
+    except Exception as e:
+        print_colored(f"保存指纹缓存失败: {e}", Colors.YELLOW)
+
+def resolve_chrome_path(chrome_path: Optional[str] = None) -> Optional[str]:
+    """确定Chrome可执行文件路径，未找到时返回None以使用Playwright默认浏览器"""
+    if chrome_path:
+        return chrome_path
+    
+    # macOS上Chrome的默认路径
+    if os.path.exists(DEFAULT_CHROME_PATH):
+        return DEFAULT_CHROME_PATH
+    
+    print_colored(f"警告: 未找到Chrome浏览器，将使用Playwright默认浏览器", Colors.YELLOW)
+    return None
+
+def launch_browser(p, chrome_path: Optional[str] = None):
+    """启动Chrome浏览器"""
+    print_colored("正在启动Chrome浏览器...", Colors.BLUE)
+    
+    with timing_span("launch", chrome=chrome_path or "playwright"):
+        if chrome_path:
+            return p.chromium.launch(
+                executable_path=chrome_path,
+                headless=HEADLESS,
+                channel="chrome"
+            )
+        return p.chromium.launch(headless=HEADLESS)
+
+def wait_for_confirmation(message: str) -> None:
+    """表单填写完成后等待用户确认再关闭浏览器（基准测试等场景可替换为不阻塞的实现）"""
+    print_colored(message, Colors.YELLOW)
+    input()
+
+def print_script_info(metadata: Dict[str, str], script_id: Optional[str] = None) -> None:
+    """显示脚本信息"""
+    print_colored("脚本信息:", Colors.BLUE)
+    print(f"  名称: {Colors.YELLOW}{metadata['name']}{Colors.END}")
+    print(f"  描述: {metadata['description']}")
+    print(f"  版本: {Colors.YELLOW}{metadata['version']}{Colors.END}")
+    if script_id:
+        print(f"  脚本ID: {Colors.YELLOW}{script_id}{Colors.END}")
+    print("")
+
+def choose_injection_strategy(page, content: str, strategy: str = "auto") -> str:
+    """根据脚本大小选择代码注入方式
+    
+    小脚本直接page.fill；较大的脚本直接设置DOM的value再触发事件，避免逐字输入；
+    特别大的脚本在页面有代码文件上传框时改用上传。
+    """
+    if strategy != "auto":
+        return strategy
+    
+    size = len(content.encode('utf-8'))
+    if size < INJECT_FILL_MAX_BYTES:
+        return "fill"
+    if size >= INJECT_UPLOAD_MIN_BYTES and page.query_selector(CODE_UPLOAD_SELECTOR):
+        return "upload"
+    return "dom"
+
+def inject_code(page, selector: str, content: str, strategy: str = "auto", filename: str = "script.user.js") -> str:
+    """把脚本代码写入表单，返回实际使用的注入方式
+    
+    Args:
+        page: 页面
+        selector: 代码文本框的选择器
+        content: 脚本代码
+        strategy: auto/fill/dom/upload
+        filename: 使用上传方式时的文件名
+    """
+    strategy = choose_injection_strategy(page, content, strategy)
+    
+    if strategy == "upload":
+        page.set_input_files(CODE_UPLOAD_SELECTOR, files=[{
+            "name": filename,
+            "mimeType": "application/javascript",
+            "buffer": content.encode('utf-8'),
+        }])
+    elif strategy == "dom":
+        page.eval_on_selector(selector, SET_VALUE_SCRIPT, content)
+    else:
+        page.fill(selector, content)
+    return strategy
+
+# 进程内的选择器缓存: 表单 -> {字段: 上次匹配成功的选择器}
+_SELECTOR_CACHE: Optional[Dict[str, Dict[str, str]]] = None
+
+def load_selector_cache() -> Dict[str, Dict[str, str]]:
+    """加载选择器缓存（每个进程只读取一次）"""
+    global _SELECTOR_CACHE
+    if _SELECTOR_CACHE is None:
+        _SELECTOR_CACHE = {}
+        if os.path.exists(SELECTOR_CACHE_FILE):
+            try:
+                with open(SELECTOR_CACHE_FILE, 'r', encoding='utf-8') as f:
+                    _SELECTOR_CACHE = json.load(f)
+            except Exception as e:
+                print_colored(f"读取选择器缓存失败: {e}", Colors.YELLOW)
+    return _SELECTOR_CACHE
+
+def remember_selector(form_key: str, field: str, selector: str) -> None:
+    """记录某个表单字段实际匹配的选择器，下次优先尝试"""
+    cache = load_selector_cache()
+    if cache.get(form_key, {}).get(field) == selector:
+        return
+    cache.setdefault(form_key, {})[field] = selector
+    try:
+        write_json_atomic(SELECTOR_CACHE_FILE, cache)
+    except Exception as e:
+        print_colored(f"保存选择器缓存失败: {e}", Colors.YELLOW)
+
+def resolve_field(page, form_key: str, field: str, timeout: float = 0) -> Optional[str]:
+    """找到表单字段在当前页面中实际可用的选择器
+    
+    所有候选选择器（上次成功的排在最前）在一次evaluate中同时检查，
+    timeout大于0时先用合并的选择器列表等待任一候选出现，出现即返回，不会等满超时。
+    
+    Args:
+        page: 页面
+        form_key: 表单（update/new）
+        field: 字段名，见FORM_FIELD_SELECTORS
+        timeout: 最长等待时间（毫秒），0表示不等待
+    
+    Returns:
+        匹配的选择器，找不到时返回None
+    """
+    candidates = FORM_FIELD_SELECTORS[form_key][field]
+    cached = load_selector_cache().get(form_key, {}).get(field)
+    if cached in candidates:
+        candidates = [cached] + [selector for selector in candidates if selector != cached]
+    
+    with timing_span("resolve_selector", form=form_key, field=field, timeout=timeout) as span:
+        if timeout:
+            try:
+                page.wait_for_selector(", ".join(candidates), state="attached", timeout=timeout)
+            except Exception:
+                span["selector"] = None
+                return None
+        
+        selector = page.evaluate(FIRST_MATCH_SCRIPT, candidates)
+        span["selector"] = selector
+        span["cached"] = selector is not None and selector == cached
+        if selector:
+            remember_selector(form_key, field, selector)
+        return selector
+
+def fill_form_field(page, form_key: str, field: str, value: str, label: str, inject_strategy: Optional[str] = None, selector: Optional[str] = None) -> bool:
+    """查找并填写表单字段；inject_strategy不为空时按代码注入方式写入，已知selector时不再查找"""
+    with timing_span("fill", form=form_key, field=field, bytes=len(value.encode('utf-8')), ok=False) as span:
+        try:
+            selector = selector or resolve_field(page, form_key, field)
+            span["selector"] = selector
+            if not selector:
+                print_colored(f"警告: 未找到{label}编辑框", Colors.YELLOW)
+                return False
+            
+            if inject_strategy:
+                used = inject_code(page, selector, value, inject_strategy)
+                print_colored(f"已填写{label} ({used}, {span['bytes'] // 1024} KB)", Colors.GREEN)
+            else:
+                used = "fill"
+                page.fill(selector, value)
+                print_colored(f"已填写{label}", Colors.GREEN)
+            span.update(strategy=used, ok=True)
+            return True
+        except Exception as e:
+            print_colored(f"填写{label}失败: {e}", Colors.RED)
+            span["error"] = str(e)
+            return False
+
+def build_changelog(metadata: Dict[str, str]) -> str:
+    """根据版本号生成更新说明"""
+    return f"更新到版本 {metadata['version']}" if metadata['version'] else "更新脚本"
+
+def field_value_matches(page, selector: str, value: str) -> bool:
+    """比较页面中字段的当前值与要填写的值（比较SHA-256），无法比较时视为不同"""
+    with timing_span("diff", selector=selector, bytes=len(value.encode('utf-8'))) as span:
+        # 文本框的值中换行统一为\n
+        expected = hashlib.sha256(value.replace('\r\n', '\n').encode('utf-8')).hexdigest()
+        try:
+            actual = page.eval_on_selector(selector, FIELD_HASH_SCRIPT)
+        except Exception:
+            actual = None
+        span["match"] = actual == expected
+        return span["match"]
+
+def fill_update_form(page, metadata: Dict[str, str], content: str, readme_content: str, inject_strategy: str = "auto") -> Dict[str, str]:
+    """在已打开的更新脚本页面中填写表单
+    
+    版本页面会预先填入当前发布的代码和附加信息，与页面中已有内容相同的字段不再填写。
+    
+    Returns:
+        字段名称 -> 结果（已更新/未变化/失败）
+    """
+    # 等待代码编辑框出现（DOM解析完成即可，不等待图片等资源加载）
+    code_selector = resolve_field(page, "update", "code", timeout=FIELD_WAIT_TIMEOUT)
+    if not code_selector:
+        print_colored("警告: 页面加载超时，尝试继续操作...", Colors.YELLOW)
+    
+    # 填写表单
+    print_colored("正在填写表单...", Colors.BLUE)
+    
+    # (字段, 值, 名称, 注入方式, 已知的选择器)
+    fields = [
+        ("code", content, "脚本代码", inject_strategy, code_selector),
+        ("changelog", build_changelog(metadata), "更新说明", None, None),
+    ]
+    # 更新附加信息（如果有README且有附加信息编辑框）
+    if readme_content:
+        fields.append(("additional_info", readme_content, "附加信息", None, None))
+    
+    summary = {}
+    for field, value, label, strategy, selector in fields:
+        selector = selector or resolve_field(page, "update", field)
+        if selector and field_value_matches(page, selector, value):
+            summary[label] = "未变化"
+            continue
+        summary[label] = "已更新" if fill_form_field(page, "update", field, value, label, strategy, selector) else "失败"
+    
+    print_colored("表单变化: " + ", ".join(f"{label} {result}" for label, result in summary.items()), Colors.BLUE)
+    return summary
+
+def fill_new_form(page, metadata: Dict[str, str], content: str, readme_content: str, script_type: str = "public", inject_strategy: str = "auto") -> None:
+    """在已打开的新建脚本页面中填写表单"""
+    # 等待表单出现
+    name_selector = resolve_field(page, "new", "name", timeout=FIELD_WAIT_TIMEOUT)
+    if not name_selector:
+        print_colored("警告: 页面加载超时，尝试继续操作...", Colors.YELLOW)
+    
+    # 填写表单
+    print_colored("正在填写表单...", Colors.BLUE)
+    
+    # 填写脚本名称和描述
+    fill_form_field(page, "new", "name", metadata["name"], "脚本名称", selector=name_selector)
+    fill_form_field(page, "new", "description", metadata["description"], "脚本描述")
+    
+    # 设置脚本类型
+    try:
+        page.check(f'input[name="script[script_type]"][value="{script_type}"]')
+        print_colored(f"已设置脚本类型为: {script_type}", Colors.GREEN)
+    except Exception as e:
+        print_colored(f"设置脚本类型失败: {e}", Colors.RED)
+    
+    # 填写脚本代码
+    fill_form_field(page, "new", "code", content, "脚本代码", inject_strategy)
+    
+    # 填写附加信息（如果有README）
+    if readme_content:
+        fill_form_field(page, "new", "additional_info", readme_content, "附加信息")
+
+class Preflight:
+    """与Playwright和浏览器启动并行进行的预检工作
+    
+    后台线程读取脚本和README、计算指纹、预先加载配置和选择器缓存；确定要上传后，
+    再用保存的会话Cookie通过HTTP检查登录状态、检查已发布的版本。主线程只在需要结果时等待。
+    预检在守护线程中进行，跳过上传时不必等待仍在进行的网络请求就能退出。
+    """
+    
+    def __init__(self, script_path: str, readme_path: Optional[str] = None):
+        # 各项预检在后台线程中的耗时（秒）
+        self.durations: Dict[str, float] = {}
+        # 主线程等待预检结果的时间（秒）
+        self.waited = 0.0
+        self.script = self._start("script", self._load_script, script_path, readme_path)
+        self.session = None
+        self.drift = None
+    
+    def _start(self, name: str, func, *args):
+        """在守护线程中运行func，返回Future"""
+        from concurrent.futures import Future
+        future = Future()
+        
+        def run():
+            start = time.perf_counter()
+            try:
+                result = func(*args)
+            except BaseException as e:
+                # 包括extract_metadata的SystemExit，由等待结果的主线程抛出
+                self.durations[name] = time.perf_counter() - start
+                future.set_exception(e)
+            else:
+                self.durations[name] = time.perf_counter() - start
+                future.set_result(result)
+        
+        threading.Thread(target=run, name=f"preflight-{name}", daemon=True).start()
+        return future
+    
+    def start_session_check(self) -> None:
+        """开始检查登录会话，在确定要上传后调用"""
+        self.session = self._start("session", self._check_session)
+    
+    def start_drift_check(self, script_id: str, metadata: Dict[str, str], content: str, readme_content: str, fingerprint: Dict[str, str], force: bool = False) -> None:
+        """开始检查已发布的版本（check_remote_drift），与浏览器启动重叠"""
+        self.drift = self._start("remote_check", check_remote_drift, script_id, metadata, content, readme_content, fingerprint, force)
+    
+    @staticmethod
+    def _load_script(script_path: str, readme_path: Optional[str]):
+        metadata, content = extract_metadata(script_path)
+        readme_content = extract_readme(readme_path, script_path)
+        fingerprint = compute_fingerprint(metadata, content, readme_content)
+        # 预先加载之后会用到的配置和选择器缓存
+        load_config()
+        load_selector_cache()
+        return metadata, content, readme_content, fingerprint
+    
+    @staticmethod
+    def _check_session() -> Optional[bool]:
+        """用保存的会话Cookie检查登录状态，无法判断时返回None，由浏览器再检查一次"""
+        if not has_saved_session():
+            return False
+        try:
+            session = GreasyForkHttpSession(GREASYFORK_URL, timeout=5)
+            session.load_session_cookies()
+            return session.is_logged_in()
+        except Exception:
+            return None
+    
+    def _wait(self, future):
+        start = time.perf_counter()
+        try:
+            return future.result()
+        finally:
+            self.waited += time.perf_counter() - start
+    
+    def script_result(self):
+        """返回(metadata, content, readme_content, fingerprint)"""
+        return self._wait(self.script)
+    
+    def session_result(self) -> Optional[bool]:
+        """返回登录会话是否有效，未检查时返回None"""
+        if self.session is None:
+            return None
+        return self._wait(self.session)
+    
+    def drift_result(self) -> bool:
+        """返回已发布版本的检查是否允许继续更新，未检查时返回True"""
+        if self.drift is None:
+            return True
+        return self._wait(self.drift)
+    
+    @property
+    def saved_ms(self) -> float:
+        """并行进行节省的时间：预检总耗时减去主线程的等待时间"""
+        return max(0.0, sum(self.durations.values()) - self.waited) * 1000
+    
+    def report(self, span: Optional[Dict[str, Any]] = None) -> None:
+        total = sum(self.durations.values()) * 1000
+        print_colored(f"预检耗时 {total:.0f} ms，与浏览器启动并行进行，节省约 {self.saved_ms:.0f} ms", Colors.BLUE)
+        if span is not None:
+            span.update(preflight_ms=round(total, 2), preflight_saved_ms=round(self.saved_ms, 2))
+
+def update_script(script_id: str, script_path: str, readme_path: Optional[str] = None, chrome_path: Optional[str] = None, skip_login: bool = False, force: bool = False, inject_strategy: str = "auto") -> bool:
+    """更新现有脚本（使用本地Chrome）
+    
+    脚本内容与上次上传相同时不启动浏览器，直接返回False；
+    force为True时忽略指纹缓存强制更新。
+    """
+    print_colored(f"准备更新脚本 (ID: {script_id})...", Colors.BLUE)
+    
+    with timing_span("update_script", script_id=script_id, ok=False) as span:
+        # 读取脚本和计算指纹在后台线程中进行
+        preflight = Preflight(script_path, readme_path)
+        
+        # 设置Chrome可执行文件路径
+        chrome_path = resolve_chrome_path(chrome_path)
+        
+        # 指纹决定是否需要启动浏览器，只需等待读取脚本（毫秒级）
+        with timing_span("read_script"):
+            metadata, content, readme_content, fingerprint = preflight.script_result()
+        span.update(script_bytes=len(content.encode('utf-8')), readme_bytes=len(readme_content.encode('utf-8')))
+        
+        # 显示脚本信息
+        print_script_info(metadata, script_id)
+        
+        # 内容没有变化时不启动浏览器，也不发出任何网络请求
+        if not check_script_changed(script_id, fingerprint, force):
+            span["skipped"] = True
+            return False
+        
+        # 检查登录会话和已发布的版本在后台进行，与Playwright和浏览器的启动重叠
+        if not skip_login:
+            preflight.start_session_check()
+        preflight.start_drift_check(script_id, metadata, content, readme_content, fingerprint, force)
+        with sync_playwright() as p:
+            try:
+                # 启动Chrome浏览器
+                browser = launch_browser(p, chrome_path)
+                
+                # 已发布的版本与本地相同时不再打开页面
+                if not preflight.drift_result():
+                    span["skipped"] = True
+                    return False
+                
+                # 创建新的上下文和页面
+                with timing_span("new_context"):
+                    context = new_browser_context(browser)
+                    start_trace(context)
+                    page = context.new_page()
+                
+                # 先登录
+                session_valid = preflight.session_result()
+                preflight.report(span)
+                login_success = login_to_greasyfork(page, skip_login=skip_login, session_valid=session_valid)
+                
+                # 访问更新页面
+                print_colored(f"正在打开Greasy Fork更新脚本页面 (ID: {script_id})...", Colors.BLUE)
+                with timing_span("goto", page="versions/new"):
+                    page.goto(f"{GREASYFORK_URL}/scripts/{script_id}/versions/new", wait_until="domcontentloaded")
+                
+                # 审核模式下先记录页面中预先填入的已发布内容，用于生成差异
+                baseline = read_form_values(page, "update") if REVIEW_MODE else None
+                
+                # 填写表单
+                with timing_span("fill_form"):
+                    fill_update_form(page, metadata, content, readme_content, inject_strategy)
+                
+                # 审核模式：保存审核包，通过review approve提交后才记录指纹
+                if REVIEW_MODE:
+                    with timing_span("review_bundle"):
+                        save_review_bundle(page, "update", script_path, metadata, content, fingerprint, script_id=script_id, baseline=baseline)
+                    span["ok"] = True
+                    return False
+                
+                print_colored("\n表单已填写完成！", Colors.GREEN)
+                print_colored("请手动检查表单内容并点击提交按钮。", Colors.YELLOW)
+                with timing_span("confirm"):
+                    wait_for_confirmation("完成后请按Enter键关闭浏览器...")
+                
+                record_fingerprint(script_id, fingerprint)
+                span["ok"] = True
+                return True
+                
+            except Exception as e:
+                print_colored(f"操作失败: {e}", Colors.RED)
+                span["error"] = str(e)
+            finally:
+                if 'context' in locals():
+                    report_resource_blocking(context, span)
+                    stop_trace(context, f"update-{script_id}")
+                # 关闭浏览器
+                if 'browser' in locals():
+                    browser.close()
+    
+    return False
+
+def refill_update_form(page, changed: List[str], metadata: Dict[str, str], content: str, readme_content: str, inject_strategy: str = "auto") -> None:
+    """在已填写的更新页面中只重新填写变化的字段（字段名见FINGERPRINT_FIELDS）"""
+    # 名称和描述包含在代码的元数据块中，更新表单没有单独的输入框
+    if {"code", "name", "description"} & set(changed):
+        fill_form_field(page, "update", "code", content, "脚本代码", inject_strategy)
+    if "version" in changed:
+        fill_form_field(page, "update", "changelog", build_changelog(metadata), "更新说明")
+    if "readme" in changed:
+        fill_form_field(page, "update", "additional_info", readme_content, "附加信息")
+
+def watch_signature(script_path: str, readme_path: Optional[str] = None) -> tuple:
+    """被监视文件的(路径, 修改时间, 大小)，文件不存在时对应项为None"""
+    signature = []
+    for path in (script_path, readme_path or find_readme(script_path)):
+        try:
+            signature.append((path, _file_key(path)) if path else None)
+        except OSError:
+            signature.append((path, None))
+    return tuple(signature)
+
+def _watch_pause(page, ms: float) -> None:
+    """等待一段时间；页面打开时用page.wait_for_timeout，期间浏览器事件照常处理"""
+    if page is not None and not page.is_closed():
+        try:
+            page.wait_for_timeout(ms)
+            return
+        except Exception:
+            pass
+    time.sleep(ms / 1000)
+
+def reload_watched_files(script_path: str, readme_path: Optional[str] = None) -> Optional[tuple]:
+    """监视模式下重新读取脚本和README，返回(元数据, 内容, README内容)
+
+    文件只写了一半、暂时无法读取或构建失败时显示原因并返回None，继续等待下一次保存。
+    """
+    try:
+        metadata, content = load_script(script_path)
+    except BuildError as e:
+        print_colored(f"构建失败，等待下一次保存: {e}", Colors.YELLOW)
+        return None
+    except (OSError, UnicodeDecodeError) as e:
+        print_colored(f"读取脚本失败，等待下一次保存: {e}", Colors.YELLOW)
+        return None
+    return metadata, content, extract_readme(readme_path, script_path)
+
+def watch_update(script_id: str, script_path: str, readme_path: Optional[str] = None, chrome_path: Optional[str] = None, skip_login: bool = False, inject_strategy: str = "auto") -> None:
+    """监视模式：保持浏览器和已登录的更新页面，脚本或README保存后只重新填写变化的字段
+    
+    连续保存在WATCH_DEBOUNCE内只触发一次填写。用户在页面中提交表单后记录指纹和上传历史，
+    之后再有改动时重新打开更新页面。按Ctrl+C或关闭浏览器退出。
+    """
+    print_colored(f"准备以监视模式更新脚本 (ID: {script_id})...", Colors.BLUE)
+    
+    metadata, content = extract_metadata(script_path)
+    readme_content = extract_readme(readme_path, script_path)
+    print_script_info(metadata, script_id)
+    
+    chrome_path = resolve_chrome_path(chrome_path)
+    form_url = f"{GREASYFORK_URL}/scripts/{script_id}/versions/new"
+    # 提交成功后跳转到脚本页面，如 /scripts/123-name
+    submitted_pattern = re.compile(rf'/scripts/{re.escape(script_id)}(-[^/]*)?/?$')
+    
+    with sync_playwright() as p:
+        try:
+            browser = launch_browser(p, chrome_path)
+            context = new_browser_context(browser)
+            start_trace(context)
+            page = context.new_page()
+            login_to_greasyfork(page, skip_login=skip_login)
+            
+            page.goto(form_url, wait_until="domcontentloaded")
+            fill_update_form(page, metadata, content, readme_content, inject_strategy)
+            # 当前页面表单中内容的指纹，为None表示没有打开的表单
+            filled = compute_fingerprint(metadata, content, readme_content)
+            signature = watch_signature(script_path, readme_path)
+            
+            print_colored("\n表单已填写完成！保存脚本或README后会自动重新填写（按Ctrl+C退出）", Colors.GREEN)
+            
+            while browser.is_connected():
+                _watch_pause(page, WATCH_POLL_INTERVAL)
+                
+                # 用户已提交表单
+                if filled and not page.is_closed() and submitted_pattern.search(urlsplit(page.url).path):
+                    print_colored(f"检测到表单已提交: 版本 {metadata['version']}", Colors.GREEN)
+                    record_fingerprint(script_id, filled)
+                    update_last_script_id(script_id, script_path)
+                    record_upload_history(script_path, script_id, "更新", metadata['version'], remarks="监视模式")
+                    filled = None
+                
+                current = watch_signature(script_path, readme_path)
+                if current == signature:
+                    continue
+                
+                # 去抖：等到文件不再变化
+                while True:
+                    _watch_pause(page, WATCH_DEBOUNCE)
+                    settled = watch_signature(script_path, readme_path)
+                    if settled == current:
+                        break
+                    current = settled
+                signature = current
+                
+                loaded = reload_watched_files(script_path, readme_path)
+                if loaded is None:
+                    continue
+                metadata, content, readme_content = loaded
+                fingerprint = compute_fingerprint(metadata, content, readme_content)
+                
+                with timing_span("watch_refill", script_id=script_id) as span:
+                    if page.is_closed() or not page.url.startswith(form_url):
+                        # 表单已提交或页面被关闭，重新打开更新页面
+                        if page.is_closed():
+                            page = context.new_page()
+                        print_colored("正在重新打开更新页面...", Colors.BLUE)
+                        page.goto(form_url, wait_until="domcontentloaded")
+                        fill_update_form(page, metadata, content, readme_content, inject_strategy)
+                        span["fields"] = list(FINGERPRINT_FIELDS)
+                    else:
+                        changed = [field for field in FINGERPRINT_FIELDS if (filled or {}).get(field) != fingerprint.get(field)]
+                        span["fields"] = changed
+                        if not changed:
+                            continue
+                        print_colored(f"[{datetime.now().strftime('%H:%M:%S')}] 文件已变化: {', '.join(FINGERPRINT_FIELDS[field] for field in changed)}", Colors.BLUE)
+                        refill_update_form(page, changed, metadata, content, readme_content, inject_strategy)
+                filled = fingerprint
+            
+            print_colored("浏览器已关闭，退出监视模式", Colors.BLUE)
+            
+        except KeyboardInterrupt:
+            print_colored("\n已退出监视模式", Colors.BLUE)
+        except Exception as e:
+            print_colored(f"操作失败: {e}", Colors.RED)
+        finally:
+            if 'context' in locals():
+                report_resource_blocking(context)
+                stop_trace(context, f"watch-{script_id}")
+            if 'browser' in locals() and browser.is_connected():
+                browser.close()
+
+def prepare_batch_jobs(jobs: List[Dict[str, str]], force: bool, report: Callable[[Dict[str, str], str, Any], None]) -> List[tuple]:
+    """读取批量任务的脚本并检查是否需要更新
+    
+    无法读取或构建失败的脚本报告为failed，内容未变化的报告为skipped，都不会中断其余任务。
+    
+    Returns:
+        需要更新的(job, 元数据, 内容, README内容, 指纹)列表
+    """
+    prepared = []
+    checker = RemoteScriptChecker()
+    for job in jobs:
+        try:
+            metadata, content = load_script(job["script_path"])
+        except (OSError, UnicodeDecodeError, BuildError) as e:
+            print_colored(f"读取脚本失败 (ID: {job['script_id']}): {e}", Colors.RED)
+            report(job, "failed", e)
+            continue
+        readme_content = extract_readme(job.get("readme_path"), job["script_path"])
+        print(f"  {Colors.YELLOW}{job['script_id']}{Colors.END} {metadata['name']} ({metadata['version']})")
+        fingerprint = compute_fingerprint(metadata, content, readme_content)
+        if check_script_changed(job["script_id"], fingerprint, force) and check_remote_drift(job["script_id"], metadata, content, readme_content, fingerprint, force, checker):
+            prepared.append((job, metadata, content, readme_content, fingerprint))
+        else:
+            report(job, "skipped", None)
+    checker.save()
+    print("")
+    return prepared
+
+def batch_update(jobs: List[Dict[str, str]], chrome_path: Optional[str] = None, skip_login: bool = False, concurrency: int = DEFAULT_BATCH_CONCURRENCY, force: bool = False, inject_strategy: str = "auto", on_result: Optional[Callable[[Dict[str, str], str, Any], None]] = None) -> List[Dict[str, str]]:
+    """批量更新脚本（一个浏览器、一次登录、每个脚本一个标签页）
+    
+    最多同时有concurrency个标签页在加载页面，加载过程相互重叠；
+    Python端按打开顺序依次填写，全部填写完成后只等待一次确认。
+    
+    Args:
+        jobs: 任务列表，每项包含script_path、script_id，可选readme_path
+        chrome_path: Chrome浏览器可执行文件路径
+        skip_login: 是否跳过登录步骤
+        concurrency: 同时加载的标签页数量上限
+        force: 是否忽略指纹缓存，更新内容未变化的脚本
+        inject_strategy: 代码注入方式（auto/fill/dom/upload）
+        on_result: 每个任务有结果时调用on_result(job, 状态, 错误)，状态为done/skipped/prepared/failed
+                   （prepared表示审核模式下已生成审核包）
+    
+    Returns:
+        表单已成功填写的任务列表
+    """
+    report = on_result or (lambda job, state, error=None: None)
+    concurrency = max(1, concurrency)
+    print_colored(f"准备批量更新 {len(jobs)} 个脚本 (并发标签页: {concurrency})...", Colors.BLUE)
+    
+    # 先读取所有脚本，浏览器启动后只做页面操作
+    pending = deque()
+    fingerprints = {}
+    for job, metadata, content, readme_content, fingerprint in prepare_batch_jobs(jobs, force, report):
+        fingerprints[job["script_id"]] = fingerprint
+        pending.append((job, metadata, content, readme_content))
+    
+    filled = []
+    if not pending:
+        print_colored("没有需要更新的脚本，无需启动浏览器", Colors.GREEN)
+        return filled
+    
+    total = len(pending)
+    chrome_path = resolve_chrome_path(chrome_path)
+    
+    with sync_playwright() as p:
+        try:
+            browser = launch_browser(p, chrome_path)
+            context = new_browser_context(browser)
+            start_trace(context)
+            
+            # 只登录一次，同一上下文中的标签页共享登录状态
+            login_page = context.new_page()
+            login_to_greasyfork(login_page, skip_login=skip_login)
+            login_page.close()
+            
+            in_flight = deque()
+            while pending or in_flight:
+                # 打开新标签页直到达到并发上限，只等待导航开始，页面在后台继续加载
+                while pending and len(in_flight) < concurrency:
+                    job, metadata, content, readme_content = pending.popleft()
+                    page = context.new_page()
+                    try:
+                        page.goto(f"{GREASYFORK_URL}/scripts/{job['script_id']}/versions/new", wait_until="commit")
+                        in_flight.append((page, job, metadata, content, readme_content))
+                    except Exception as e:
+                        print_colored(f"打开更新页面失败 (ID: {job['script_id']}): {e}", Colors.RED)
+                        report(job, "failed", e)
+                        page.close()
+                
+                if not in_flight:
+                    break
+                
+                # 填写最早打开的标签页，其余标签页继续加载
+                page, job, metadata, content, readme_content = in_flight.popleft()
+                print_colored(f"正在填写脚本 {metadata['name']} (ID: {job['script_id']})...", Colors.BLUE)
+                try:
+                    baseline = read_form_values(page, "update") if REVIEW_MODE else None
+                    fill_update_form(page, metadata, content, readme_content, inject_strategy)
+                    filled.append(job)
+                    if REVIEW_MODE:
+                        save_review_bundle(page, "update", job["script_path"], metadata, content, fingerprints[job["script_id"]], script_id=job["script_id"], baseline=baseline)
+                        report(job, "prepared", None)
+                        page.close()
+                except Exception as e:
+                    print_colored(f"填写表单失败 (ID: {job['script_id']}): {e}", Colors.RED)
+                    report(job, "failed", e)
+            
+            if REVIEW_MODE:
+                print_colored(f"\n已生成 {len(filled)}/{total} 个审核包，使用 review list 查看，review approve --all 提交", Colors.GREEN)
+                return filled
+            
+            print_colored(f"\n已填写 {len(filled)}/{total} 个脚本的表单！", Colors.GREEN)
+            print_colored("请逐个检查标签页中的表单内容并点击提交按钮。", Colors.YELLOW)
+            wait_for_confirmation("全部完成后请按Enter键关闭浏览器...")
+            
+            for job in filled:
+                record_fingerprint(job["script_id"], fingerprints[job["script_id"]])
+                report(job, "done", None)
+            
+        except Exception as e:
+            print_colored(f"操作失败: {e}", Colors.RED)
+        finally:
+            if 'context' in locals():
+                report_resource_blocking(context)
+                stop_trace(context, "batch")
+            # 关闭浏览器
+            if 'browser' in locals():
+                browser.close()
+    
+    return filled
+
+def create_new_script(script_path: str, readme_path: Optional[str] = None, script_type: str = "public", chrome_path: Optional[str] = None, skip_login: bool = False, inject_strategy: str = "auto") -> Optional[str]:
+    """创建新脚本（使用本地Chrome）"""
+    print_colored("准备创建新脚本...", Colors.BLUE)
+    
+    with timing_span("create_new_script", script_type=script_type, ok=False) as span:
+        # 读取脚本和检查登录会话在后台线程中进行，与Playwright和浏览器的启动重叠
+        preflight = Preflight(script_path, readme_path)
+        if not skip_login:
+            preflight.start_session_check()
+        
+        # 设置Chrome可执行文件路径
+        chrome_path = resolve_chrome_path(chrome_path)
+        
+        with sync_playwright() as p:
+            try:
+                # 启动Chrome浏览器
+                browser = launch_browser(p, chrome_path)
+                
+                # 创建新的上下文和页面
+                with timing_span("new_context"):
+                    context = new_browser_context(browser)
+                    start_trace(context)
+                    page = context.new_page()
+                
+                # 表单打开前才需要脚本内容
+                with timing_span("read_script"):
+                    metadata, content, readme_content, fingerprint = preflight.script_result()
+                span.update(script_bytes=len(content.encode('utf-8')), readme_bytes=len(readme_content.encode('utf-8')))
+                
+                # 显示脚本信息
+                print_script_info(metadata)
+                
+                # 先登录
+                session_valid = preflight.session_result()
+                preflight.report(span)
+                login_success = login_to_greasyfork(page, skip_login=skip_login, session_valid=session_valid)
+                
+                # 访问新建脚本页面
+                print_colored("正在打开Greasy Fork新建脚本页面...", Colors.BLUE)
+                with timing_span("goto", page="scripts/new"):
+                    page.goto(f"{GREASYFORK_URL}/scripts/new", wait_until="domcontentloaded")
+                
+                with timing_span("fill_form"):
+                    fill_new_form(page, metadata, content, readme_content, script_type, inject_strategy)
+                
+                if REVIEW_MODE:
+                    with timing_span("review_bundle"):
+                        save_review_bundle(page, "create", script_path, metadata, content, fingerprint, values={"script[script_type]": script_type})
+                    span["ok"] = True
+                    return None
+                
+                print_colored("\n表单已填写完成！", Colors.GREEN)
+                print_colored("请手动检查表单内容并点击提交按钮。", Colors.YELLOW)
+                with timing_span("confirm"):
+                    wait_for_confirmation("完成后请按Enter键关闭浏览器...")
+                span["ok"] = True
+                
+            except Exception as e:
+                print_colored(f"操作失败: {e}", Colors.RED)
+                span["error"] = str(e)
+            finally:
+                if 'context' in locals():
+                    report_resource_blocking(context, span)
+                    stop_trace(context, "new-script")
+                # 关闭浏览器
+                if 'browser' in locals():
+                    browser.close()
+
+class FormParser:
+    """解析页面中的表单字段（包括隐藏字段、文本框默认值和选中项）及CSRF令牌
+    
+    html.parser只在HTTP引擎中用到，按需导入，把标签回调交给内部的HTMLParser。
+    """
+    
+    def __init__(self):
+        from html.parser import HTMLParser
+        self._parser = HTMLParser(convert_charrefs=True)
+        self._parser.handle_starttag = self.handle_starttag
+        self._parser.handle_data = self.handle_data
+        self._parser.handle_endtag = self.handle_endtag
+        self.forms: List[Dict[str, Any]] = []
+        self.csrf_token = ""
+        self._form = None
+        self._textarea = None
+        self._select = None
+    
+    def feed(self, data: str) -> None:
+        self._parser.feed(data)
+    
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "meta" and attrs.get("name") == "csrf-token":
+            self.csrf_token = attrs.get("content") or ""
+        elif tag == "form":
+            self._form = {
+                "action": attrs.get("action") or "",
+                "method": (attrs.get("method") or "get").lower(),
+                "id": attrs.get("id") or "",
+                "fields": [],
+            }
+            self.forms.append(self._form)
+        elif self._form is None or not attrs.get("name"):
+            return
+        elif tag == "input":
+            input_type = (attrs.get("type") or "text").lower()
+            # 浏览器不会提交未选中的单选框/复选框、按钮和文件字段
+            if input_type in ("checkbox", "radio") and "checked" not in attrs:
+                return
+            if input_type in ("submit", "button", "image", "reset", "file"):
+                return
+            self._form["fields"].append([attrs["name"], attrs.get("value") or ""])
+        elif tag == "textarea":
+            self._textarea = [attrs["name"], []]
+        elif tag == "select":
+            self._select = {"name": attrs["name"], "value": None, "first": None}
+        elif tag == "option" and self._select is not None:
+            value = attrs.get("value") or ""
+            if self._select["first"] is None:
+                self._select["first"] = value
+            if "selected" in attrs:
+                self._select["value"] = value
+    
+    def handle_data(self, data):
+        if self._textarea is not None:
+            self._textarea[1].append(data)
+    
+    def handle_endtag(self, tag):
+        if tag == "textarea" and self._textarea is not None:
+            value = "".join(self._textarea[1])
+            # 与浏览器一致，忽略<textarea>后紧跟的换行
+            if value.startswith("\n"):
+                value = value[1:]
+            if self._form is not None:
+                self._form["fields"].append([self._textarea[0], value])
+            self._textarea = None
+        elif tag == "select" and self._select is not None:
+            value = self._select["value"] if self._select["value"] is not None else self._select["first"]
+            if self._form is not None and value is not None:
+                self._form["fields"].append([self._select["name"], value])
+            self._select = None
+        elif tag == "form":
+            self._form = None
+
+def find_form(page_html: str, field_name: str) -> Optional[Dict[str, Any]]:
+    """在页面中查找包含指定字段的表单"""
+    parser = FormParser()
+    parser.feed(page_html)
+    for form in parser.forms:
+        if any(name == field_name for name, _ in form["fields"]):
+            return form
+    return None
+
+def set_form_field(form: Dict[str, Any], name: str, value: str) -> None:
+    """设置表单字段的值，字段不存在时追加"""
+    for field in form["fields"]:
+        if field[0] == name:
+            field[1] = value
+            return
+    form["fields"].append([name, value])
+
+class HttpResponse:
+    """HTTP响应"""
+    
+    def __init__(self, status: int, path: str, headers, body: bytes):
+        self.status = status
+        self.path = path
+        self.headers = headers
+        self.body = body
+    
+    @property
+    def location(self) -> str:
+        return self.headers.get("Location", "")
+    
+    @property
+    def is_redirect(self) -> bool:
+        return self.status in (301, 302, 303, 307, 308)
+    
+    @property
+    def text(self) -> str:
+        return self.body.decode('utf-8', errors='replace')
+
+class GreasyForkHttpSession:
+    """不启动浏览器、直接通过HTTP访问Greasy Fork的会话
+    
+    同一站点的长连接放入连接池复用，可以在多个线程中同时使用；Cookie在线程间共享。
+    """
+    
+    def __init__(self, base_url: Optional[str] = None, timeout: float = 30):
+        parts = urlsplit(base_url or GREASYFORK_URL)
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        # 站点路径前缀，如/zh-CN
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.cookies: Dict[str, str] = {}
+        self.request_count = 0
+        self.connection_count = 0
+        self._lock = threading.Lock()
+        self._pool = queue.LifoQueue()
+    
+    def url(self, path: str) -> str:
+        """站点内的相对路径转换为请求路径，如/scripts/new -> /zh-CN/scripts/new"""
+        return self.prefix + path
+    
+    def _new_connection(self):
+        import http.client
+        connection_class = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        with self._lock:
+            self.connection_count += 1
+        return connection_class(self.host, self.port, timeout=self.timeout)
+    
+    def _cookie_header(self) -> str:
+        with self._lock:
+            return "; ".join(f"{name}={value}" for name, value in self.cookies.items())
+    
+    def _store_cookies(self, headers) -> None:
+        from http.cookies import SimpleCookie, CookieError
+        for header in headers.get_all("Set-Cookie") or []:
+            cookie = SimpleCookie()
+            try:
+                cookie.load(header)
+            except CookieError:
+                continue
+            with self._lock:
+                for name, morsel in cookie.items():
+                    if morsel["max-age"] == "0":
+                        self.cookies.pop(name, None)
+                    else:
+                        self.cookies[name] = morsel.value
+    
+    def request(self, method: str, path: str, fields: Optional[List[List[str]]] = None, follow_redirects: bool = True, headers: Optional[Dict[str, str]] = None) -> HttpResponse:
+        """发送请求，fields以表单编码提交，headers为附加的请求头；跟随重定向时POST之后改用GET"""
+        for _ in range(10):
+            response = self._request_once(method, path, fields, headers)
+            if not (follow_redirects and response.is_redirect):
+                return response
+            location = urlsplit(response.location)
+            path = location.path + (f"?{location.query}" if location.query else "")
+            method, fields = "GET", None
+        raise RuntimeError(f"重定向次数过多: {path}")
+    
+    def _request_once(self, method: str, path: str, fields: Optional[List[List[str]]], extra_headers: Optional[Dict[str, str]] = None) -> HttpResponse:
+        import http.client
+        body = urlencode([tuple(field) for field in fields]).encode('utf-8') if fields is not None else None
+        headers = {
+            "Accept": "text/html,application/xhtml+xml",
+            "Accept-Encoding": "gzip",
+            "User-Agent": HTTP_USER_AGENT,
+        }
+        if body is not None:
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        headers.update(extra_headers or {})
+        cookie_header = self._cookie_header()
+        if cookie_header:
+            headers["Cookie"] = cookie_header
+        
+        try:
+            connection, reused = self._pool.get_nowait(), True
+        except queue.Empty:
+            connection, reused = self._new_connection(), False
+        
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+        except (http.client.HTTPException, OSError):
+            connection.close()
+            if not reused:
+                raise
+            # 复用的长连接可能已被服务器关闭，换新连接重试一次
+            connection = self._new_connection()
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+        
+        if response.will_close:
+            connection.close()
+        else:
+            self._pool.put(connection)
+        
+        with self._lock:
+            self.request_count += 1
+        if response.headers.get("Content-Encoding") == "gzip":
+            import gzip
+            data = gzip.decompress(data)
+        self._store_cookies(response.headers)
+        return HttpResponse(response.status, path, response.headers, data)
+    
+    def is_logged_in(self) -> bool:
+        """未登录时新建脚本页面会重定向到登录页"""
+        import http.client
+        if not self.cookies:
+            return False
+        try:
+            return self.request("GET", self.url("/scripts/new"), follow_redirects=False).status == 200
+        except (http.client.HTTPException, OSError):
+            return False
+    
+    def sign_in(self, username: str, password: str) -> bool:
+        """提交登录表单（包含CSRF令牌），登录成功时服务器会重定向离开登录页"""
+        page = self.request("GET", self.url("/users/sign_in"))
+        form = find_form(page.text, "user[email]")
+        if not form:
+            raise RuntimeError("未找到登录表单")
+        
+        set_form_field(form, "user[email]", username)
+        set_form_field(form, "user[password]", password)
+        set_form_field(form, "user[remember_me]", "1")
+        response = self.request("POST", form["action"] or self.url("/users/sign_in"), form["fields"], follow_redirects=False)
+        return response.is_redirect and "/users/sign_in" not in response.location
+    
+    def get_form(self, path: str, field_name: str) -> Dict[str, Any]:
+        """打开页面并返回包含指定字段的表单，登录失效时抛出异常"""
+        response = self.request("GET", path, follow_redirects=False)
+        if response.is_redirect and "/users/sign_in" in response.location:
+            raise RuntimeError("登录会话已失效")
+        if response.status != 200:
+            raise RuntimeError(f"打开页面失败: HTTP {response.status} {path}")
+        
+        form = find_form(response.text, field_name)
+        if not form:
+            raise RuntimeError(f"页面中未找到表单字段 {field_name}: {path}")
+        return form
+    
+    def submit_form(self, form: Dict[str, Any]) -> HttpResponse:
+        """提交表单，不跟随重定向，由调用方判断结果"""
+        return self.request(form["method"].upper(), form["action"], form["fields"], follow_redirects=False)
+    
+    def load_session_cookies(self) -> None:
+        """从登录会话缓存中载入当前站点的Cookie（与浏览器模式共用）"""
+        if not has_saved_session():
+            return
+        try:
+            with open(SESSION_STATE_FILE, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except Exception:
+            return
+        
+        now = datetime.now().timestamp()
+        for cookie in state.get("cookies", []):
+            domain = cookie.get("domain", "").lstrip('.')
+            if (self.host == domain or self.host.endswith("." + domain)) and (cookie.get("expires", -1) == -1 or cookie["expires"] > now):
+                self.cookies[cookie["name"]] = cookie["value"]
+    
+    def save_session_cookies(self) -> None:
+        """把当前站点的Cookie写回登录会话缓存，保留其他站点的Cookie"""
+        state = {"cookies": [], "origins": []}
+        if os.path.exists(SESSION_STATE_FILE):
+            try:
+                with open(SESSION_STATE_FILE, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+            except Exception:
+                pass
+        
+        state["cookies"] = [c for c in state.get("cookies", []) if c.get("domain", "").lstrip('.') != self.host]
+        for name, value in self.cookies.items():
+            state["cookies"].append({
+                "name": name,
+                "value": value,
+                "domain": self.host,
+                "path": "/",
+                "expires": -1,
+                "httpOnly": True,
+                "secure": self.scheme == "https",
+                "sameSite": "Lax",
+            })
+        try:
+            write_json_atomic(SESSION_STATE_FILE, state, mode=0o600)
+        except Exception as e:
+            print_colored(f"保存登录会话失败: {e}", Colors.YELLOW)
+
+def http_login(session: GreasyForkHttpSession, username: Optional[str] = None, password: Optional[str] = None) -> bool:
+    """HTTP引擎登录：优先复用保存的登录会话，失效时提交登录表单"""
+    session.load_session_cookies()
+    if session.is_logged_in():
+        print_colored("已复用保存的登录会话", Colors.GREEN)
+        return True
+    
+    print_colored("正在登录Greasy Fork...", Colors.BLUE)
+    username, password = get_credentials(username, password)
+    if session.sign_in(username, password):
+        print_colored("登录成功！", Colors.GREEN)
+        session.save_session_cookies()
+        return True
+    
+    print_colored("登录失败，请检查用户名和密码", Colors.RED)
+    return False
+
+def http_fill_version(session: GreasyForkHttpSession, script_id: str, metadata: Dict[str, str], content: str, readme_content: str, submit: bool = False) -> bool:
+    """通过HTTP获取新版本表单（含CSRF令牌）并填入内容，submit为True时提交
+    
+    Returns:
+        是否已提交成功；未提交时表单准备完成也返回False
+    """
+    form = session.get_form(session.url(f"/scripts/{script_id}/versions/new"), "script_version[code]")
+    set_form_field(form, "script_version[code]", content)
+    set_form_field(form, "script_version[changelog]", build_changelog(metadata))
+    if readme_content:
+        set_form_field(form, ADDITIONAL_INFO_FIELD, readme_content)
+    
+    summary = f"代码 {len(content.encode('utf-8'))} 字节, 更新说明 \"{build_changelog(metadata)}\""
+    if readme_content:
+        summary += f", 附加信息 {len(readme_content.encode('utf-8'))} 字节"
+    
+    if not submit:
+        print_colored(f"表单已准备完成 (ID: {script_id}): {summary}", Colors.GREEN)
+        print_colored("未提交。确认无误后请加上 --submit 参数重新运行以提交。", Colors.YELLOW)
+        return False
+    
+    POST_RATE_LIMITER.wait()
+    response = session.submit_form(form)
+    if response.is_redirect and "/versions" not in response.location and "/users/sign_in" not in response.location:
+        print_colored(f"已提交新版本 (ID: {script_id}): {summary}", Colors.GREEN)
+        return True
+    
+    print_colored(f"提交失败 (ID: {script_id}): HTTP {response.status}", Colors.RED)
+    return False
+
+def http_update_script(script_id: str, script_path: str, readme_path: Optional[str] = None, submit: bool = False, force: bool = False, username: Optional[str] = None, password: Optional[str] = None) -> bool:
+    """更新现有脚本（不启动浏览器，直接通过HTTP）"""
+    print_colored(f"准备更新脚本 (ID: {script_id})...", Colors.BLUE)
+    
+    metadata, content = extract_metadata(script_path)
+    readme_content = extract_readme(readme_path, script_path)
+    print_script_info(metadata, script_id)
+    
+    fingerprint = compute_fingerprint(metadata, content, readme_content)
+    if not (check_script_changed(script_id, fingerprint, force) and check_remote_drift(script_id, metadata, content, readme_content, fingerprint, force)):
+        return False
+    
+    session = GreasyForkHttpSession()
+    try:
+        if not http_login(session, username, password):
+            return False
+        if http_fill_version(session, script_id, metadata, content, readme_content, submit):
+            record_fingerprint(script_id, fingerprint)
+            return True
+    except Exception as e:
+        print_colored(f"操作失败: {e}", Colors.RED)
+    return False
+
+def http_batch_update(jobs: List[Dict[str, str]], concurrency: int = DEFAULT_BATCH_CONCURRENCY, submit: bool = False, force: bool = False, username: Optional[str] = None, password: Optional[str] = None, on_result: Optional[Callable[[Dict[str, str], str, Any], None]] = None) -> List[Dict[str, str]]:
+    """批量更新脚本（HTTP引擎）：登录一次，多个线程共用连接池并发获取和提交表单
+    
+    on_result的用法与batch_update相同，未指定submit时表单准备完成的状态为prepared。
+    
+    Returns:
+        已成功提交的任务列表（未指定submit时为空）
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    import http.client
+    report = on_result or (lambda job, state, error=None: None)
+    concurrency = max(1, concurrency)
+    print_colored(f"准备批量更新 {len(jobs)} 个脚本 (并发请求: {concurrency})...", Colors.BLUE)
+    
+    prepared = prepare_batch_jobs(jobs, force, report)
+    
+    if not prepared:
+        print_colored("没有需要更新的脚本", Colors.GREEN)
+        return []
+    
+    session = GreasyForkHttpSession()
+    try:
+        logged_in = http_login(session, username, password)
+    except (http.client.HTTPException, OSError) as e:
+        print_colored(f"登录过程出错: {e}", Colors.RED)
+        logged_in = False
+    if not logged_in:
+        for job, *_ in prepared:
+            report(job, "failed", "登录失败")
+        return []
+    
+    def run(item):
+        job, metadata, content, readme_content, fingerprint = item
+        try:
+            if http_fill_version(session, job["script_id"], metadata, content, readme_content, submit):
+                record_fingerprint(job["script_id"], fingerprint)
+                report(job, "done", None)
+                return job
+            if submit:
+                report(job, "failed", "提交失败")
+            else:
+                report(job, "prepared", None)
+        except Exception as e:
+            print_colored(f"操作失败 (ID: {job['script_id']}): {e}", Colors.RED)
+            report(job, "failed", e)
+        return None
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        submitted = [job for job in executor.map(run, prepared) if job]
+    
+    print_colored(f"共 {session.request_count} 个请求，使用 {session.connection_count} 个连接", Colors.BLUE)
+    return submitted
+
+def compare_versions(a: str, b: str) -> int:
+    """比较两个版本号，a较新时返回1，相同返回0，较旧返回-1
+    
+    按点分段比较，每段先比较开头的数字再比较其余部分（如1.10 > 1.9，1.0b < 1.0）。
+    """
+    def parts(version):
+        result = []
+        for part in version.strip().split('.'):
+            match = re.match(r'(\d*)(.*)', part)
+            # 没有后缀的段大于带后缀的段（1.0 > 1.0b）
+            result.append((int(match.group(1) or 0), match.group(2) == "", match.group(2)))
+        return result
+    
+    a_parts, b_parts = parts(a), parts(b)
+    length = max(len(a_parts), len(b_parts))
+    a_parts += [(0, True, "")] * (length - len(a_parts))
+    b_parts += [(0, True, "")] * (length - len(b_parts))
+    return (a_parts > b_parts) - (a_parts < b_parts)
+
+def normalize_published_code(code: str) -> str:
+    """去掉Greasy Fork会替换的@downloadURL/@updateURL行并统一换行符，用于比较代码"""
+    return REMOTE_IGNORED_KEYS_PATTERN.sub("", code.replace("\r\n", "\n"))
+
+class RemoteScriptChecker:
+    """通过HTTP获取已发布脚本的元数据和代码，与本地脚本比较
+    
+    响应按地址缓存ETag和Last-Modified，再次检查时发送条件请求，没有变化时服务器只返回304。
+    缓存中只保存解析结果（版本号、代码哈希），不保存代码本身。可以在多个线程中同时使用。
+    """
+    
+    def __init__(self, base_url: Optional[str] = None):
+        self.base_url = base_url or GREASYFORK_URL
+        self.requests = 0
+        self.not_modified = 0
+        self._sessions: Dict[str, GreasyForkHttpSession] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(REMOTE_CACHE_FILE):
+            try:
+                with open(REMOTE_CACHE_FILE, 'r', encoding='utf-8') as f:
+                    self._cache = json.load(f)
+            except Exception as e:
+                print_colored(f"读取远程检查缓存失败: {e}", Colors.YELLOW)
+    
+    def _session(self, origin: str) -> GreasyForkHttpSession:
+        """每个站点一个会话（代码地址会重定向到update.greasyfork.org）"""
+        with self._lock:
+            if origin not in self._sessions:
+                self._sessions[origin] = GreasyForkHttpSession(origin)
+            return self._sessions[origin]
+    
+    def _get(self, url: str, headers: Dict[str, str]) -> tuple:
+        """GET请求并跟随重定向（包括跨站点），返回(响应, 最终地址)"""
+        current = url
+        for _ in range(10):
+            parts = urlsplit(current)
+            session = self._session(f"{parts.scheme}://{parts.netloc}")
+            path = parts.path + (f"?{parts.query}" if parts.query else "")
+            response = session.request("GET", path, follow_redirects=False, headers=headers)
+            with self._lock:
+                self.requests += 1
+            if not response.is_redirect:
+                break
+            # 重定向地址可能是相对路径，也可能在另一个站点
+            location = urlsplit(response.location)
+            current = f"{location.scheme or parts.scheme}://{location.netloc or parts.netloc}{location.path}" + (f"?{location.query}" if location.query else "")
+        else:
+            raise RuntimeError(f"重定向次数过多: {url}")
+        return response, current
+    
+    def fetch(self, url: str, parse: Callable[[str], Any]) -> Any:
+        """条件请求url，返回parse(响应内容)的结果；没有变化时返回缓存中的结果"""
+        with self._lock:
+            cached = self._cache.get(url)
+        headers = {"Accept": "text/javascript, */*"}
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached and cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+        
+        # 直接请求上次重定向到的地址，省去一次往返；失败时再从原地址开始
+        start = (cached or {}).get("location") or url
+        response, final_url = self._get(start, headers)
+        if response.status not in (200, 304) and start != url:
+            response, final_url = self._get(url, headers)
+        
+        if response.status == 304 and cached:
+            with self._lock:
+                self.not_modified += 1
+            return cached["value"]
+        if response.status != 200:
+            raise RuntimeError(f"HTTP {response.status}")
+        
+        value = parse(response.text)
+        with self._lock:
+            self._cache[url] = {
+                "etag": response.headers.get("ETag", ""),
+                "last_modified": response.headers.get("Last-Modified", ""),
+                "location": final_url,
+                "value": value,
+            }
+            self._dirty = True
+        return value
+    
+    def check(self, script_id: str, metadata: Dict[str, str], content: str) -> Dict[str, Any]:
+        """比较已发布的脚本与本地脚本
+        
+        先获取很小的元数据块：版本号不同时即可得出结论；版本号相同时再获取代码比较哈希。
+        
+        Returns:
+            status为以下之一的字典，remote_version为已发布的版本号：
+            current（已发布的代码与本地相同）、outdated（本地版本较新）、
+            unbumped（版本号相同但代码不同）、regression（本地版本比已发布的旧）、
+            unknown（获取失败，error为原因）
+        """
+        import http.client
+        base = f"{self.base_url}/scripts/{script_id}/code/script"
+        try:
+            remote = self.fetch(base + ".meta.js", lambda text: {
+                key: values[0] for key, values in (parse_header_lines(io.StringIO(text), strict=False) or {}).items()
+                if key in ("name", "version")
+            })
+            result = {"remote_version": remote.get("version", "")}
+            order = compare_versions(metadata["version"], result["remote_version"])
+            if order < 0:
+                return {**result, "status": "regression"}
+            if order > 0:
+                return {**result, "status": "outdated"}
+            
+            remote_hash = self.fetch(base + ".user.js", lambda text: hashlib.sha256(normalize_published_code(text).encode('utf-8')).hexdigest())
+            local_hash = hashlib.sha256(normalize_published_code(content).encode('utf-8')).hexdigest()
+            return {**result, "status": "current" if remote_hash == local_hash else "unbumped"}
+        except (RuntimeError, http.client.HTTPException, OSError) as e:
+            return {"status": "unknown", "remote_version": "", "error": str(e)}
+    
+    def save(self) -> None:
+        """把条件请求缓存写回文件"""
+        with self._lock:
+            if not self._dirty:
+                return
+            write_json_atomic(REMOTE_CACHE_FILE, self._cache)
+            self._dirty = False
+
+def check_remote_drift(script_id: str, metadata: Dict[str, str], content: str, readme_content: str, fingerprint: Dict[str, str], force: bool = False, checker: Optional[RemoteScriptChecker] = None) -> bool:
+    """更新前检查已发布的版本，返回是否需要继续更新
+    
+    已发布的代码与本地相同时跳过（附加信息无法通过代码地址获取，README可能有变化时仍然更新），
+    并记录指纹，之后的本地检查可以直接跳过；本地版本号比已发布的旧时跳过并警告。
+    force为True时只显示检查结果。
+    """
+    if not REMOTE_CHECK:
+        return True
+    
+    own_checker = checker is None
+    checker = checker or RemoteScriptChecker()
+    with timing_span("remote_check", script_id=script_id) as span:
+        result = checker.check(script_id, metadata, content)
+        span.update(status=result["status"], requests=checker.requests, not_modified=checker.not_modified)
+    if own_checker:
+        checker.save()
+    
+    status, remote_version = result["status"], result["remote_version"]
+    if status == "unknown":
+        print_colored(f"无法获取已发布的版本 (ID: {script_id}): {result['error']}，继续更新", Colors.YELLOW)
+        return True
+    if status == "regression":
+        print_colored(f"警告: 本地版本 {metadata['version']} 比已发布的版本 {remote_version} 旧 (ID: {script_id})", Colors.RED)
+        if force:
+            return True
+        print_colored("已跳过更新（确认要发布旧版本请使用--force）", Colors.YELLOW)
+        return False
+    if status == "unbumped":
+        print_colored(f"注意: 已发布的版本也是 {remote_version}，但代码不同，请确认是否需要增加@version (ID: {script_id})", Colors.YELLOW)
+        return True
+    if status == "outdated":
+        print(f"  已发布的版本: {remote_version}")
+        return True
+    
+    # 已发布的代码与本地相同
+    if readme_content and "readme" in get_changed_fields(script_id, fingerprint):
+        print_colored(f"已发布的代码与本地相同 ({remote_version})，附加信息可能有变化，继续更新", Colors.BLUE)
+        return True
+    if force:
+        print_colored(f"已发布的代码与本地相同 ({remote_version})，已指定--force，继续更新", Colors.YELLOW)
+        return True
+    print_colored(f"已发布的版本 {remote_version} 与本地相同 (ID: {script_id})，跳过更新", Colors.GREEN)
+    record_fingerprint(script_id, fingerprint)
+    return False
+
+def read_form_values(page, form_key: str) -> Dict[str, Dict[str, str]]:
+    """读取表单各字段的名称和当前值，返回 字段 -> {"name": 表单字段名, "value": 值}"""
+    values = {}
+    for field in FORM_FIELD_SELECTORS[form_key]:
+        # 等待代码编辑框出现后，其余字段直接查找
+        selector = resolve_field(page, form_key, field, timeout=FIELD_WAIT_TIMEOUT if field == "code" else 0)
+        if selector:
+            values[field] = page.eval_on_selector(selector, READ_FIELD_SCRIPT)
+    return values
+
+def save_review_bundle(page, kind: str, script_path: str, metadata: Dict[str, str], content: str, fingerprint: Dict[str, str], script_id: str = "", baseline: Optional[Dict[str, Dict[str, str]]] = None, values: Optional[Dict[str, str]] = None) -> str:
+    """把已填写的表单保存为审核包，返回审核包目录
+    
+    审核包包括整页截图、填写后的字段值、与已发布内容（更新页面中预先填入的内容）的差异，
+    以及用于之后通过HTTP提交的manifest.json。
+    
+    Args:
+        kind: update或create
+        content: 填入表单的脚本代码，审核包中的code.js以它为准
+        baseline: 填写前页面中各字段的值（read_form_values的返回值）
+        values: 页面中读取不到、提交时需要的其他字段值（如脚本类型）
+    """
+    form_key = "update" if kind == "update" else "new"
+    filled = read_form_values(page, form_key)
+    # upload方式把代码放在文件输入框中，代码编辑框里仍是已发布的代码，不能从页面读取
+    if "code" in filled:
+        filled["code"]["value"] = content
+    
+    name = script_id or os.path.splitext(os.path.basename(script_path))[0]
+    bundle_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{kind}-{name}"
+    path = os.path.join(REVIEW_DIR, bundle_id)
+    suffix = 1
+    while os.path.exists(path):
+        suffix += 1
+        path = os.path.join(REVIEW_DIR, f"{bundle_id}-{suffix}")
+    os.makedirs(path)
+    
+    page.screenshot(path=os.path.join(path, "screenshot.png"), full_page=True)
+    
+    fields = {}
+    for field, item in filled.items():
+        with open(os.path.join(path, REVIEW_FIELD_FILES[field]), 'w', encoding='utf-8') as f:
+            f.write(item["value"])
+        fields[item["name"]] = REVIEW_FIELD_FILES[field]
+    
+    # 与已发布内容的差异（更新说明每次都是新写的，不参与比较）
+    import difflib
+    changes = []
+    diff = []
+    for field in ("code", "additional_info"):
+        old = ((baseline or {}).get(field) or {}).get("value", "")
+        new = (filled.get(field) or {}).get("value", "")
+        if old != new:
+            changes.append(field)
+            diff.extend(difflib.unified_diff(old.splitlines(True), new.splitlines(True), f"已发布/{REVIEW_FIELD_FILES[field]}", f"本次/{REVIEW_FIELD_FILES[field]}"))
+    with open(os.path.join(path, "diff.txt"), 'w', encoding='utf-8') as f:
+        f.writelines(line if line.endswith("\n") else line + "\n" for line in diff)
+    
+    manifest = {
+        "id": os.path.basename(path),
+        "kind": kind,
+        "status": "pending",
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "script_id": script_id,
+        "script_path": os.path.abspath(script_path),
+        "name": metadata["name"],
+        "version": metadata["version"],
+        "fingerprint": fingerprint,
+        "form_path": f"/scripts/{script_id}/versions/new" if kind == "update" else "/scripts/new",
+        "code_field": (filled.get("code") or {}).get("name", ""),
+        "fields": fields,
+        "values": values or {},
+        "changes": changes,
+    }
+    write_json_atomic(os.path.join(path, "manifest.json"), manifest)
+    
+    summary = ", ".join(FINGERPRINT_FIELDS["readme" if field == "additional_info" else field] for field in changes) or "无"
+    print_colored(f"已生成审核包: {path} (与已发布内容相比变化: {summary})", Colors.GREEN)
+    return path
+
+def load_review_bundles(status: Optional[str] = None) -> List[Dict[str, Any]]:
+    """按创建顺序列出审核包，可按状态（pending/approved/rejected）筛选"""
+    bundles = []
+    for manifest_path in sorted(glob.glob(os.path.join(REVIEW_DIR, "*", "manifest.json"))):
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                bundle = json.load(f)
+        except Exception as e:
+            print_colored(f"读取审核包失败: {manifest_path}: {e}", Colors.YELLOW)
+            continue
+        bundle["path"] = os.path.dirname(manifest_path)
+        if status is None or bundle["status"] == status:
+            bundles.append(bundle)
+    return bundles
+
+def update_review_bundle(bundle: Dict[str, Any], **changes) -> None:
+    """修改审核包状态并写回manifest.json"""
+    bundle.update(changes)
+    manifest = {key: value for key, value in bundle.items() if key != "path"}
+    write_json_atomic(os.path.join(bundle["path"], "manifest.json"), manifest)
+
+def http_submit_review_bundle(session: GreasyForkHttpSession, bundle: Dict[str, Any]) -> Optional[str]:
+    """通过HTTP提交审核包中保存的字段值，成功时返回脚本ID"""
+    form = session.get_form(session.url(bundle["form_path"]), bundle["code_field"])
+    for name, filename in bundle["fields"].items():
+        with open(os.path.join(bundle["path"], filename), 'r', encoding='utf-8') as f:
+            set_form_field(form, name, f.read())
+    for name, value in bundle["values"].items():
+        set_form_field(form, name, value)
+    
+    POST_RATE_LIMITER.wait()
+    response = session.submit_form(form)
+    location = urlsplit(response.location).path if response.is_redirect else ""
+    match = re.search(r'/scripts/(\d+)', location)
+    if not match or location.endswith(("/versions", "/scripts/new")) or "/users/sign_in" in location:
+        print_colored(f"提交失败 ({bundle['id']}): HTTP {response.status}", Colors.RED)
+        return None
+    return bundle["script_id"] or match.group(1)
+
+def approve_review_bundles(bundles: List[Dict[str, Any]], username: Optional[str] = None, password: Optional[str] = None) -> int:
+    """批量通过审核包：登录一次，依次通过HTTP提交，返回成功的数量"""
+    session = GreasyForkHttpSession()
+    if not http_login(session, username, password):
+        return 0
+    
+    approved = 0
+    for bundle in bundles:
+        try:
+            script_id = http_submit_review_bundle(session, bundle)
+        except Exception as e:
+            print_colored(f"提交失败 ({bundle['id']}): {e}", Colors.RED)
+            continue
+        if not script_id:
+            continue
+        
+        record_fingerprint(script_id, bundle["fingerprint"])
+        update_last_script_id(script_id, bundle["script_path"])
+        operation = "更新" if bundle["kind"] == "update" else "新建"
+        record_upload_history(bundle["script_path"], script_id, operation, bundle["version"], remarks="审核通过")
+        update_review_bundle(bundle, status="approved", script_id=script_id, approved=datetime.now().isoformat(timespec="seconds"))
+        print_colored(f"已提交 {bundle['name']} {bundle['version']} (ID: {script_id})", Colors.GREEN)
+        approved += 1
+    return approved
+
+class RateLimiter:
+    """全局限速：多个线程共用，保证两次操作之间至少间隔min_interval秒"""
+    
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self.lock = threading.Lock()
+        self.next_time = 0.0
+    
+    def wait(self) -> None:
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.min_interval
+        if delay > 0:
+            time.sleep(delay)
+
+# 表单提交限速（HTTP引擎的--submit）
+POST_RATE_LIMITER = RateLimiter(POST_MIN_INTERVAL)
+
+def is_retryable_error(error: Any) -> bool:
+    """页面加载、登录超时和网络错误可以重试，其余错误（如脚本文件不存在）不重试"""
+    import http.client
+    if isinstance(error, str):
+        return error in ("登录失败", "批量更新中断")
+    if isinstance(error, (FileNotFoundError, PermissionError, UnicodeDecodeError)):
+        return False
+    # Playwright的TimeoutError不是内置TimeoutError的子类，按类名判断
+    return "Timeout" in type(error).__name__ or isinstance(error, (OSError, http.client.HTTPException))
+
+def retry_delay(attempts: int) -> float:
+    """第attempts次失败后的等待时间（指数退避）"""
+    return min(JOB_RETRY_MAX_DELAY, JOB_RETRY_BASE_DELAY * 2 ** (attempts - 1))
+
+class UploadJobQueue:
+    """持久化的批量任务队列
+    
+    每个任务记录脚本路径、ID、操作、状态和尝试次数，状态变化时立即写入JOB_QUEUE_FILE，
+    中途崩溃后可以用 --resume 从未完成的任务继续。
+    状态: pending（等待执行）、running（执行中，崩溃后视为pending）、done、prepared（HTTP引擎未提交）、
+    skipped（内容未变化）、failed（不可重试或超过最多尝试次数）。
+    """
+    
+    FINISHED_STATES = ("done", "prepared", "skipped", "failed")
+    
+    def __init__(self, data: Dict[str, Any], path: Optional[str] = None):
+        self.data = data
+        self.path = path or JOB_QUEUE_FILE
+        self.lock = threading.Lock()
+    
+    @classmethod
+    def create(cls, jobs: List[Dict[str, str]], options: Dict[str, Any], path: Optional[str] = None) -> "UploadJobQueue":
+        data = {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "options": options,
+            "jobs": [
+                {
+                    "script_path": os.path.abspath(job["script_path"]),
+                    "script_id": job["script_id"],
+                    "readme_path": job.get("readme_path") and os.path.abspath(job["readme_path"]),
+                    "operation": "update",
+                    "state": "pending",
+                    "attempts": 0,
+                    "next_attempt": 0,
+                    "error": "",
+                }
+                for job in jobs
+            ],
+        }
+        job_queue = cls(data, path)
+        job_queue.save()
+        return job_queue
+    
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> Optional["UploadJobQueue"]:
+        path = path or JOB_QUEUE_FILE
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            print_colored(f"读取任务队列失败: {e}", Colors.RED)
+            return None
+        # 上次运行中断时正在执行的任务重新执行
+        for job in data["jobs"]:
+            if job["state"] == "running":
+                job["state"] = "pending"
+        return cls(data, path)
+    
+    @property
+    def jobs(self) -> List[Dict[str, Any]]:
+        return self.data["jobs"]
+    
+    @property
+    def options(self) -> Dict[str, Any]:
+        return self.data.get("options", {})
+    
+    def unfinished(self) -> List[Dict[str, Any]]:
+        return [job for job in self.jobs if job["state"] not in self.FINISHED_STATES]
+    
+    def save(self) -> None:
+        with self.lock:
+            write_json_atomic(self.path, self.data)
+    
+    def update(self, job: Dict[str, Any], **changes) -> None:
+        with self.lock:
+            job.update(changes, updated=datetime.now().isoformat(timespec="seconds"))
+            write_json_atomic(self.path, self.data)
+    
+    def counts(self) -> Dict[str, int]:
+        counts = {}
+        for job in self.jobs:
+            counts[job["state"]] = counts.get(job["state"], 0) + 1
+        return counts
+
+def run_job_queue(job_queue: UploadJobQueue, chrome_path: Optional[str] = None, skip_login: bool = False, username: Optional[str] = None, password: Optional[str] = None) -> None:
+    """执行任务队列中所有未完成的任务，可重试的失败按指数退避重新执行"""
+    options = job_queue.options
+    engine = options.get("engine", "browser")
+    
+    def on_result(job, state, error):
+        if state == "failed":
+            message = str(error) if error else "未知错误"
+            if job["attempts"] < JOB_MAX_ATTEMPTS and is_retryable_error(error):
+                delay = retry_delay(job["attempts"])
+                print_colored(f"任务失败 (ID: {job['script_id']}, 第{job['attempts']}次): {message}，{delay:.0f}秒后重试", Colors.YELLOW)
+                job_queue.update(job, state="pending", error=message, next_attempt=time.time() + delay)
+            else:
+                job_queue.update(job, state="failed", error=message)
+            return
+        
+        job_queue.update(job, state=state, error="")
+        if state == "done":
+            # 每完成一个任务就记录，之后崩溃也不会丢失
+            update_config({}, {job["script_path"]: job["script_id"]})
+            version = extract_script_version(job["script_path"])
+            record_upload_history(job["script_path"], job["script_id"], "更新", version, remarks="批量更新")
+    
+    while True:
+        pending = job_queue.unfinished()
+        if not pending:
+            break
+        
+        # 等待最早可以重试的任务
+        wait = min(job.get("next_attempt", 0) for job in pending) - time.time()
+        if wait > 0:
+            print_colored(f"等待 {wait:.0f} 秒后重试...", Colors.BLUE)
+            time.sleep(wait)
+        due = [job for job in pending if job.get("next_attempt", 0) <= time.time()]
+        for job in due:
+            job_queue.update(job, state="running", attempts=job["attempts"] + 1)
+        
+        if engine == "http":
+            http_batch_update(due, options.get("concurrency", DEFAULT_BATCH_CONCURRENCY), options.get("submit", False), options.get("force", False), username, password, on_result=on_result)
+        else:
+            batch_update(due, chrome_path, skip_login, options.get("concurrency", DEFAULT_BATCH_CONCURRENCY), options.get("force", False), options.get("inject", "auto"), on_result=on_result)
+        
+        # 没有结果的任务（如浏览器启动失败或中途出错）按中断处理
+        for job in due:
+            if job["state"] == "running":
+                on_result(job, "failed", "批量更新中断")
+    
+    counts = job_queue.counts()
+    print_colored("任务队列: " + ", ".join(f"{state} {count}" for state, count in counts.items()), Colors.GREEN if not counts.get("failed") else Colors.YELLOW)
+    for job in job_queue.jobs:
+        if job["state"] == "failed":
+            print_colored(f"  失败: {job['script_id']} {os.path.basename(job['script_path'])} ({job['error']})", Colors.RED)
+
+class DaemonOutput(io.TextIOBase):
+    """守护进程的标准输出：执行任务的线程输出的内容同时转发给提交任务的客户端"""
+    
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+    
+    def write(self, text: str) -> int:
+        send = getattr(self.local, "send", None)
+        if send:
+            send({"type": "log", "text": text})
+        self.stream.write(text)
+        return len(text)
+    
+    def flush(self) -> None:
+        self.stream.flush()
+
+def _daemon_open_form(context, url: str):
+    """在守护进程的上下文中打开表单页面，登录会话失效时重新登录"""
+    # 关闭已提交或已离开表单的旧标签页
+    for old_page in context.pages:
+        if not re.search(r'/(versions|scripts)/new$|/versions$', urlsplit(old_page.url).path):
+            old_page.close()
+    
+    page = context.new_page()
+    with timing_span("goto", page=urlsplit(url).path):
+        page.goto(url, wait_until="domcontentloaded")
+    if "/users/sign_in" in page.url:
+        print_colored("登录会话已失效，重新登录...", Colors.YELLOW)
+        login_to_greasyfork(page)
+        page.goto(url, wait_until="domcontentloaded")
+    return page
+
+def _daemon_update(context, request: Dict[str, Any]) -> Dict[str, Any]:
+    script_id = request["script_id"]
+    print_colored(f"准备更新脚本 (ID: {script_id})...", Colors.BLUE)
+    metadata, content = load_script(request["script_path"], request.get("build"))
+    readme_content = extract_readme(request.get("readme_path"), request["script_path"])
+    print_script_info(metadata, script_id)
+    page = _daemon_open_form(context, f"{GREASYFORK_URL}/scripts/{script_id}/versions/new")
+    with timing_span("fill_form"):
+        fill_update_form(page, metadata, content, readme_content, request.get("inject", "auto"))
+    return {"ok": True}
+
+def _daemon_create(context, request: Dict[str, Any]) -> Dict[str, Any]:
+    print_colored("准备创建新脚本...", Colors.BLUE)
+    metadata, content = load_script(request["script_path"], request.get("build"))
+    readme_content = extract_readme(request.get("readme_path"), request["script_path"])
+    print_script_info(metadata)
+    page = _daemon_open_form(context, f"{GREASYFORK_URL}/scripts/new")
+    with timing_span("fill_form"):
+        fill_new_form(page, metadata, content, readme_content, request.get("script_type", "public"), request.get("inject", "auto"))
+    return {"ok": True}
+
+# 守护进程支持的任务
+DAEMON_HANDLERS = {
+    "update": _daemon_update,
+    "create": _daemon_create,
+}
+
+def _daemon_serve_jobs(name: str, context, jobs: queue.Queue, output: DaemonOutput) -> None:
+    """依次处理任务直到收到None；每个任务都会返回结果，单个任务出错不会结束工作线程"""
+    while True:
+        item = jobs.get()
+        if item is None:
+            break
+        request, events = item
+        output.local.send = events.put
+        result = {"ok": False, "error": "任务中断"}
+        try:
+            with timing_span("daemon_job", action=request["action"], worker=name):
+                result = DAEMON_HANDLERS[request["action"]](context, request)
+        except (Exception, SystemExit) as e:
+            # 处理函数中的sys.exit()也只结束这一个任务，不能让工作线程退出
+            error = f"已退出 (状态 {e.code})" if isinstance(e, SystemExit) else str(e)
+            print_colored(f"操作失败: {error}", Colors.RED)
+            result = {"ok": False, "error": error}
+        finally:
+            output.local.send = None
+            events.put({"type": "result", **result})
+
+def _daemon_worker(name: str, jobs: queue.Queue, ready: threading.Event, started: List[str], output: DaemonOutput, chrome_path: Optional[str], cdp_url: Optional[str], skip_login: bool) -> None:
+    """守护进程的工作线程：持有一个已登录的浏览器上下文，依次处理任务
+    
+    Playwright的同步API只能在创建它的线程中使用，因此每个工作线程有自己的Playwright连接；
+    使用CDP时所有上下文都在同一个Chrome中。
+    """
+    with sync_playwright() as p:
+        try:
+            if cdp_url:
+                print_colored(f"[{name}] 正在连接Chrome: {cdp_url}", Colors.BLUE)
+                browser = p.chromium.connect_over_cdp(cdp_url)
+            else:
+                browser = launch_browser(p, chrome_path)
+            context = new_browser_context(browser)
+            page = context.new_page()
+            login_to_greasyfork(page, skip_login=skip_login)
+            page.close()
+        except Exception as e:
+            print_colored(f"[{name}] 启动失败: {e}", Colors.RED)
+            ready.set()
+            return
+        
+        print_colored(f"[{name}] 浏览器上下文已就绪", Colors.GREEN)
+        started.append(name)
+        ready.set()
+        try:
+            _daemon_serve_jobs(name, context, jobs, output)
+        finally:
+            # 通过CDP连接时只断开连接，不会关闭用户的Chrome
+            browser.close()
+
+def daemon_request_handler():
+    """返回守护进程的请求处理类（socketserver按需导入）"""
+    import socketserver
     
-    print_colored("正在登录Greasy Fork...", Colors.BLUE)
+    class DaemonRequestHandler(socketserver.StreamRequestHandler):
+        """处理客户端请求：每个连接一行JSON请求，进度和结果以JSON行返回"""
+        
+        def send(self, message: Dict[str, Any]) -> None:
+            self.wfile.write(json.dumps(message, ensure_ascii=False).encode('utf-8') + b"\n")
+            self.wfile.flush()
+        
+        def handle(self) -> None:
+            try:
+                request = json.loads(self.rfile.readline() or b"{}")
+            except ValueError:
+                self.send({"type": "result", "ok": False, "error": "无效的请求"})
+                return
+            
+            action = request.get("action")
+            if action == "ping":
+                self.send({
+                    "type": "result",
+                    "ok": True,
+                    "pid": os.getpid(),
+                    "workers": self.server.workers,
+                    "queued": self.server.jobs.qsize(),
+                    "base_url": GREASYFORK_URL,
+                })
+            elif action == "shutdown":
+                self.send({"type": "result", "ok": True})
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+            elif action in DAEMON_HANDLERS:
+                events = queue.Queue()
+                self.server.jobs.put((request, events))
+                while True:
+                    event = events.get()
+                    try:
+                        self.send(event)
+                    except OSError:
+                        # 客户端已断开，任务照常完成
+                        return
+                    if event["type"] == "result":
+                        return
+            else:
+                self.send({"type": "result", "ok": False, "error": f"未知操作: {action}"})
     
-    # 获取登录凭据
-    username, password = get_credentials(username, password)
+    return DaemonRequestHandler
+
+def serve_daemon(workers: int = DEFAULT_DAEMON_WORKERS, chrome_path: Optional[str] = None, cdp_url: Optional[str] = None, skip_login: bool = False, socket_path: str = DAEMON_SOCKET) -> None:
+    """运行上传守护进程
     
-    # 访问登录页面
-    page.goto("https://greasyfork.org/zh-CN/users/sign_in")
+    启动时准备workers个已登录的浏览器上下文（或通过cdp_url连接已运行的Chrome），
+    然后在Unix套接字上接收上传任务。之后每次上传只需要一次本地IPC和页面操作，
+    不再有Python、Playwright和浏览器的启动以及登录开销。
+    """
+    # socketserver只有守护进程用到，按需导入以免拖慢其他命令的启动
+    import socketserver
+    if not hasattr(socketserver, "ThreadingUnixStreamServer"):
+        print_colored("错误: 当前系统不支持Unix套接字，无法启动守护进程", Colors.RED)
+        sys.exit(1)
+    if daemon_request({"action": "ping"}, socket_path):
+        print_colored(f"守护进程已在运行: {socket_path}", Colors.YELLOW)
+        sys.exit(1)
+    if os.path.exists(socket_path):
+        # 上次异常退出留下的套接字文件
+        os.remove(socket_path)
     
-    # 等待页面加载
-    try:
-        page.wait_for_selector("#user_email", state="visible", timeout=10000)
-    except:
-        print_colored("警告: 页面加载超时，尝试继续操作...", Colors.YELLOW)
+    output = DaemonOutput(sys.stdout)
+    sys.stdout = output
+    chrome_path = None if cdp_url else resolve_chrome_path(chrome_path)
+    jobs = queue.Queue()
+    threads = []
+    started = []
+    for index in range(max(1, workers)):
+        ready = threading.Event()
+        thread = threading.Thread(
+            target=_daemon_worker,
+            args=(f"上下文{index + 1}", jobs, ready, started, output, chrome_path, cdp_url, skip_login),
+            daemon=True,
+        )
+        thread.start()
+        threads.append(thread)
+        # 逐个启动：第一个上下文登录后保存会话，其余上下文直接复用
+        ready.wait()
     
-    # 填写登录表单
     try:
-        # 使用安全获取的凭据
-        page.fill("#user_email", username)
-        page.fill("#user_password", password)
-        
-        # 点击登录按钮
-        page.click('input[name="commit"]')
+        if not started:
+            print_colored("错误: 没有可用的浏览器上下文，守护进程退出", Colors.RED)
+            return
         
-        # 等待登录完成
+        server = socketserver.ThreadingUnixStreamServer(socket_path, daemon_request_handler())
+        server.daemon_threads = True
+        server.jobs = jobs
+        server.workers = len(started)
+        os.chmod(socket_path, 0o600)
+        print_colored(f"守护进程已启动: {socket_path} ({len(started)}个浏览器上下文，按Ctrl+C退出)", Colors.GREEN)
         try:
-            page.wait_for_selector(".user-profile-link", timeout=10000)
-            print_colored("登录成功！", Colors.GREEN)
-            return True
-        except:
-            print_colored("警告: 登录可能失败，尝试继续操作...", Colors.YELLOW)
-            return False
-    except Exception as e:
-        print_colored(f"登录过程出错: {e}", Colors.RED)
-        return False
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+    finally:
+        for _ in threads:
+            jobs.put(None)
+        for thread in threads:
+            thread.join(timeout=10)
+        sys.stdout = output.stream
+        print_colored("守护进程已退出", Colors.BLUE)
 
-def update_script(script_id: str, script_path: str, readme_path: Optional[str] = None, chrome_path: Optional[str] = None, skip_login: bool = False) -> bool:
-    """更新现有脚本（使用本地Chrome）"""
-    print_colored(f"准备更新脚本 (ID: {script_id})...", Colors.BLUE)
+def daemon_request(request: Dict[str, Any], socket_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """向守护进程发送请求，把进度输出转发到本地终端，返回最终结果；守护进程未运行时返回None"""
+    import socket
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path or DAEMON_SOCKET)
+    except OSError:
+        sock.close()
+        return None
     
-    # 提取脚本元数据
+    with sock, sock.makefile("rwb") as stream:
+        stream.write(json.dumps(request, ensure_ascii=False).encode('utf-8') + b"\n")
+        stream.flush()
+        for line in stream:
+            message = json.loads(line)
+            if message.get("type") == "log":
+                sys.stdout.write(message["text"])
+                sys.stdout.flush()
+            elif message.get("type") == "result":
+                return message
+    return {"type": "result", "ok": False, "error": "与守护进程的连接中断"}
+
+def find_daemon() -> Optional[Dict[str, Any]]:
+    """返回正在运行且使用同一站点地址的守护进程状态，没有时返回None"""
+    status = daemon_request({"action": "ping"})
+    if status and status.get("ok") and status.get("base_url") == GREASYFORK_URL:
+        return status
+    return None
+
+def daemon_update_script(script_id: str, script_path: str, readme_path: Optional[str] = None, force: bool = False, inject_strategy: str = "auto") -> bool:
+    """通过守护进程更新脚本，指纹检查和提交确认在本地完成"""
     metadata, content = extract_metadata(script_path)
+    readme_path = readme_path or find_readme(script_path)
     readme_content = extract_readme(readme_path, script_path)
+    fingerprint = compute_fingerprint(metadata, content, readme_content)
+    if not (check_script_changed(script_id, fingerprint, force) and check_remote_drift(script_id, metadata, content, readme_content, fingerprint, force)):
+        return False
     
-    # 显示脚本信息
-    print_colored("脚本信息:", Colors.BLUE)
-    print(f"  名称: {Colors.YELLOW}{metadata['name']}{Colors.END}")
-    print(f"  描述: {metadata['description']}")
-    print(f"  版本: {Colors.YELLOW}{metadata['version']}{Colors.END}")
-    print(f"  脚本ID: {Colors.YELLOW}{script_id}{Colors.END}")
-    print("")
+    result = daemon_request({
+        "action": "update",
+        "script_id": script_id,
+        "script_path": os.path.abspath(script_path),
+        "readme_path": readme_path and os.path.abspath(readme_path),
+        "inject": inject_strategy,
+        "build": BUILD_OPTIONS,
+    })
+    if not result or not result.get("ok"):
+        print_colored(f"守护进程处理失败: {(result or {}).get('error', '守护进程未响应')}", Colors.RED)
+        return False
     
-    # 设置Chrome可执行文件路径
-    if not chrome_path:
-        # macOS上Chrome的默认路径
-        chrome_path = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
-        if not os.path.exists(chrome_path):
-            print_colored(f"警告: 未找到Chrome浏览器，将使用Playwright默认浏览器", Colors.YELLOW)
-            chrome_path = None
+    print_colored("\n表单已在守护进程的浏览器中填写完成！", Colors.GREEN)
+    print_colored("请在浏览器中检查表单内容并点击提交按钮。", Colors.YELLOW)
+    wait_for_confirmation("完成后请按Enter键继续...")
+    record_fingerprint(script_id, fingerprint)
+    return True
+
+def daemon_create_new_script(script_path: str, readme_path: Optional[str] = None, script_type: str = "public", inject_strategy: str = "auto") -> Optional[str]:
+    """通过守护进程创建新脚本"""
+    result = daemon_request({
+        "action": "create",
+        "script_path": os.path.abspath(script_path),
+        "readme_path": readme_path and os.path.abspath(readme_path),
+        "script_type": script_type,
+        "inject": inject_strategy,
+        "build": BUILD_OPTIONS,
+    })
+    if not result or not result.get("ok"):
+        print_colored(f"守护进程处理失败: {(result or {}).get('error', '守护进程未响应')}", Colors.RED)
+        return None
     
-    with sync_playwright() as p:
-        # 启动Chrome浏览器
-        print_colored("正在启动Chrome浏览器...", Colors.BLUE)
-        
-        try:
-            if chrome_path:
-                browser = p.chromium.launch(
-                    executable_path=chrome_path,
-                    headless=False,
-                    channel="chrome"
-                )
-            else:
-                browser = p.chromium.launch(headless=False)
-            
-            # 创建新的上下文和页面
-            context = browser.new_context()
-            page = context.new_page()
-            
-            # 先登录
-            login_success = login_to_greasyfork(page, skip_login=skip_login)
-            
-            # 访问更新页面
-            print_colored(f"正在打开Greasy Fork更新脚本页面 (ID: {script_id})...", Colors.BLUE)
-            page.goto(f"https://greasyfork.org/zh-CN/scripts/{script_id}/versions/new")
-            
-            # 等待页面加载完成
-            try:
-                page.wait_for_selector("#script_version_code", state="visible", timeout=10000)
-            except:
-                print_colored("警告: 页面加载超时，尝试继续操作...", Colors.YELLOW)
-            
-            # 填写表单
-            print_colored("正在填写表单...", Colors.BLUE)
-            
-            # 填写脚本代码
-            try:
-                code_editor = page.query_selector("#script_version_code")
-                if code_editor:
-                    page.fill("#script_version_code", content)
-                    print_colored("已填写脚本代码", Colors.GREEN)
-                else:
-                    print_colored("警告: 未找到代码编辑框", Colors.YELLOW)
-            except Exception as e:
-                print_colored(f"填写脚本代码失败: {e}", Colors.RED)
-            
-            # 填写更新说明
-            try:
-                changelog = f"更新到版本 {metadata['version']}" if metadata['version'] else "更新脚本"
-                changelog_editor = page.query_selector("#script_version_changelog")
-                if changelog_editor:
-                    page.fill("#script_version_changelog", changelog)
-                    print_colored("已填写更新说明", Colors.GREEN)
-                else:
-                    print_colored("警告: 未找到更新说明编辑框", Colors.YELLOW)
-            except Exception as e:
-                print_colored(f"填写更新说明失败: {e}", Colors.RED)
-            
-            # 更新附加信息（如果有README且有附加信息编辑框）
-            if readme_content:
-                try:
-                    # 尝试找到正确的附加信息编辑框
-                    additional_info_selector = page.query_selector("#script-version-additional-info-0")
-                    if additional_info_selector:
-                        page.fill("#script-version-additional-info-0", readme_content)
-                        print_colored("已填写附加信息", Colors.GREEN)
-                    else:
-                        # 尝试使用更精确的选择器
-                        additional_info_selector = page.query_selector('textarea[name="script_version[additional_info][0][attribute_value]"]')
-                        if additional_info_selector:
-                            page.fill('textarea[name="script_version[additional_info][0][attribute_value]"]', readme_content)
-                            print_colored("已填写附加信息", Colors.GREEN)
-                        else:
-                            print_colored("警告: 未找到附加信息编辑框，尝试使用旧选择器", Colors.YELLOW)
-                            # 尝试旧的选择器作为后备
-                            additional_info_selector = page.query_selector("#script_additional_info")
-                            if additional_info_selector:
-                                page.fill("#script_additional_info", readme_content)
-                                print_colored("已使用旧选择器填写附加信息", Colors.GREEN)
-                            else:
-                                print_colored("警告: 所有尝试都未找到附加信息编辑框", Colors.YELLOW)
-                except Exception as e:
-                    print_colored(f"填写附加信息失败: {e}", Colors.RED)
-            
-            print_colored("\n表单已填写完成！", Colors.GREEN)
-            print_colored("请手动检查表单内容并点击提交按钮。", Colors.YELLOW)
-            print_colored("完成后请按Enter键关闭浏览器...", Colors.YELLOW)
-            input()
-            
-        except Exception as e:
-            print_colored(f"操作失败: {e}", Colors.RED)
-        finally:
-            # 关闭浏览器
-            if 'browser' in locals():
-                browser.close()
+    print_colored("\n表单已在守护进程的浏览器中填写完成！", Colors.GREEN)
+    print_colored("请在浏览器中检查表单内容并点击提交按钮。", Colors.YELLOW)
+    wait_for_confirmation("完成后请按Enter键继续...")
+    return None
 
-def create_new_script(script_path: str, readme_path: Optional[str] = None, script_type: str = "public", chrome_path: Optional[str] = None) -> Optional[str]:
-    """创建新脚本（使用本地Chrome）"""
-    print_colored("准备创建新脚本...", Colors.BLUE)
+def update_last_script_id(script_id: str, script_path: Optional[str] = None) -> None:
+    """更新最后使用的脚本ID，提供脚本路径时同时记录路径与ID的对应关系"""
+    if not script_id:
+        return
     
-    # 提取脚本元数据
-    metadata, content = extract_metadata(script_path)
-    readme_content = extract_readme(readme_path, script_path)
+    script_ids = {os.path.abspath(script_path): script_id} if script_path else None
+    update_config({"last_script_id": script_id}, script_ids)
+    print_colored(f"已更新最后使用的脚本ID: {script_id}", Colors.GREEN)
     
-    # 显示脚本信息
-    print_colored("脚本信息:", Colors.BLUE)
-    print(f"  名称: {Colors.YELLOW}{metadata['name']}{Colors.END}")
-    print(f"  描述: {metadata['description']}")
-    print(f"  版本: {Colors.YELLOW}{metadata['version']}{Colors.END}")
-    print("")
+# 已加载的历史记录索引: ((修改时间, 大小), 索引)
+_HISTORY_INDEX: Optional[tuple] = None
+
+def _parse_history_markdown(path: str) -> List[Dict[str, str]]:
+    """解析旧版Markdown历史表格（返回最早的记录在前）"""
+    records = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            cells = [cell.strip() for cell in line.strip().strip('|').split('|')]
+            # 只保留数据行，跳过表头和分隔行
+            if len(cells) == len(HISTORY_FIELDS) and re.match(r'\d{4}-\d{2}-\d{2}$', cells[0]):
+                records.append(dict(zip(HISTORY_FIELDS, cells)))
+    # Markdown中新记录插在表头之后
+    records.reverse()
+    return records
+
+def ensure_history_store() -> None:
+    """首次写入时把旧版Markdown历史表格导入JSONL记录（只在写入路径调用）"""
+    if os.path.exists(UPLOAD_HISTORY_STORE) or not os.path.exists(UPLOAD_HISTORY_FILE):
+        return
     
-    # 设置Chrome可执行文件路径
-    if not chrome_path:
-        # macOS上Chrome的默认路径
-        chrome_path = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
-        if not os.path.exists(chrome_path):
-            print_colored(f"警告: 未找到Chrome浏览器，将使用Playwright默认浏览器", Colors.YELLOW)
-            chrome_path = None
+    try:
+        records = _parse_history_markdown(UPLOAD_HISTORY_FILE)
+        with open(UPLOAD_HISTORY_STORE, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        print_colored(f"已将 {len(records)} 条上传历史导入 {os.path.basename(UPLOAD_HISTORY_STORE)}", Colors.GREEN)
+    except Exception as e:
+        print_colored(f"导入上传历史失败: {e}", Colors.YELLOW)
+
+def append_history_record(record: Dict[str, str]) -> None:
+    """追加一条历史记录（只写入一行，不重写已有记录）"""
+    ensure_history_store()
+    with open(UPLOAD_HISTORY_STORE, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+def load_history_index() -> Dict[str, Any]:
+    """加载历史记录并按脚本ID、脚本名称和日期建立索引（文件未变化时复用）
     
-    with sync_playwright() as p:
-        # 启动Chrome浏览器
-        print_colored("正在启动Chrome浏览器...", Colors.BLUE)
-        
-        try:
-            if chrome_path:
-                browser = p.chromium.launch(
-                    executable_path=chrome_path,
-                    headless=False,
-                    channel="chrome"
-                )
-            else:
-                browser = p.chromium.launch(headless=False)
-            
-            # 创建新的上下文和页面
-            context = browser.new_context()
-            page = context.new_page()
-            
-            # 先登录
-            login_success = login_to_greasyfork(page, skip_login=skip_login)
-            
-            # 访问新建脚本页面
-            print_colored("正在打开Greasy Fork新建脚本页面...", Colors.BLUE)
-            page.goto("https://greasyfork.org/zh-CN/scripts/new")
-            
-            # 等待页面加载完成
-            try:
-                page.wait_for_selector("#script_name", state="visible", timeout=10000)
-            except:
-                print_colored("警告: 页面加载超时，尝试继续操作...", Colors.YELLOW)
-            
-            # 填写表单
-            print_colored("正在填写表单...", Colors.BLUE)
-            
-            # 填写脚本名称和描述
-            try:
-                page.fill("#script_name", metadata["name"])
-                page.fill("#script_description", metadata["description"])
-                print_colored("已填写脚本名称和描述", Colors.GREEN)
-            except Exception as e:
-                print_colored(f"填写脚本名称和描述失败: {e}", Colors.RED)
-            
-            # 设置脚本类型
-            try:
-                page.check(f'input[name="script[script_type]"][value="{script_type}"]')
-                print_colored(f"已设置脚本类型为: {script_type}", Colors.GREEN)
-            except Exception as e:
-                print_colored(f"设置脚本类型失败: {e}", Colors.RED)
-            
-            # 填写脚本代码
+    只读取记录文件，不做导入等写操作：status、history等只读命令不会修改文件，
+    记录文件不存在时视为没有历史。
+    """
+    global _HISTORY_INDEX
+    index = {"records": [], "by_id": {}, "by_name": {}, "by_date": {}}
+    if not os.path.exists(UPLOAD_HISTORY_STORE):
+        return index
+    
+    key = _file_key(UPLOAD_HISTORY_STORE)
+    if _HISTORY_INDEX and _HISTORY_INDEX[0] == key:
+        return _HISTORY_INDEX[1]
+    
+    with open(UPLOAD_HISTORY_STORE, 'r', encoding='utf-8') as f:
+        for line in f:
             try:
-                page.fill("#script_code", content)
-                print_colored("已填写脚本代码", Colors.GREEN)
-            except Exception as e:
-                print_colored(f"填写脚本代码失败: {e}", Colors.RED)
-            
-            # 填写附加信息（如果有README）
-            if readme_content:
-                try:
-                    # 尝试找到正确的附加信息编辑框
-                    additional_info_selector = page.query_selector("#script-version-additional-info-0")
-                    if additional_info_selector:
-                        page.fill("#script-version-additional-info-0", readme_content)
-                        print_colored("已填写附加信息", Colors.GREEN)
-                    else:
-                        # 尝试使用更精确的选择器
-                        additional_info_selector = page.query_selector('textarea[name="script_version[additional_info][0][attribute_value]"]')
-                        if additional_info_selector:
-                            page.fill('textarea[name="script_version[additional_info][0][attribute_value]"]', readme_content)
-                            print_colored("已填写附加信息", Colors.GREEN)
-                        else:
-                            # 尝试旧的选择器作为后备
-                            additional_info_selector = page.query_selector("#script_additional_info")
-                            if additional_info_selector:
-                                page.fill("#script_additional_info", readme_content)
-                                print_colored("已使用旧选择器填写附加信息", Colors.GREEN)
-                            else:
-                                print_colored("警告: 所有尝试都未找到附加信息编辑框", Colors.YELLOW)
-                except Exception as e:
-                    print_colored(f"填写附加信息失败: {e}", Colors.RED)
-            
-            print_colored("\n表单已填写完成！", Colors.GREEN)
-            print_colored("请手动检查表单内容并点击提交按钮。", Colors.YELLOW)
-            print_colored("完成后请按Enter键关闭浏览器...", Colors.YELLOW)
-            input()
-            
-        except Exception as e:
-            print_colored(f"操作失败: {e}", Colors.RED)
-        finally:
-            # 关闭浏览器
-            if 'browser' in locals():
-                browser.close()
+                record = json.loads(line)
+            except ValueError:
+                # 跳过写入中断留下的不完整行
+                continue
+            position = len(index["records"])
+            index["records"].append(record)
+            index["by_id"].setdefault(record.get("script_id", ""), []).append(position)
+            index["by_name"].setdefault(record.get("script_name", ""), []).append(position)
+            index["by_date"].setdefault(record.get("date", ""), []).append(position)
+    
+    _HISTORY_INDEX = (key, index)
+    return index
 
-def update_last_script_id(script_id: str) -> None:
-    """更新最后使用的脚本ID"""
-    if not script_id:
-        return
-        
-    config = load_config()
-    config["last_script_id"] = script_id
-    save_config(config)
-    print_colored(f"已更新最后使用的脚本ID: {script_id}", Colors.GREEN)
+def query_upload_history(script: Optional[str] = None, date: Optional[str] = None) -> List[Dict[str, str]]:
+    """按脚本ID或名称、日期查询上传历史（最新的记录在前）"""
+    index = load_history_index()
+    positions = None
+    if script:
+        positions = set(index["by_id"].get(script, [])) | set(index["by_name"].get(script, []))
+    if date:
+        date_positions = set(index["by_date"].get(date, []))
+        positions = date_positions if positions is None else positions & date_positions
+    
+    if positions is None:
+        return list(reversed(index["records"]))
+    return [index["records"][i] for i in sorted(positions, reverse=True)]
+
+def read_upload_history() -> List[Dict[str, str]]:
+    """读取全部上传历史记录（最新的记录在前）"""
+    return query_upload_history()
+
+def get_last_upload(script: str) -> Optional[Dict[str, str]]:
+    """获取某个脚本（ID或名称）最近一次上传的记录"""
+    records = query_upload_history(script)
+    return records[0] if records else None
+
+def export_history_markdown(path: Optional[str] = None) -> int:
+    """由JSONL历史记录重新生成Markdown表格（默认为UPLOAD_HISTORY_FILE），返回记录数"""
+    path = path or UPLOAD_HISTORY_FILE
+    # 先导入旧版表格，以免用空的记录覆盖还没有导入的历史
+    ensure_history_store()
+    records = read_upload_history()
+    lines = [
+        "# 脚本上传历史记录\n\n",
+        "此文件记录所有油猴脚本的上传历史，包括上传时间、脚本名称、版本号等信息。\n\n",
+        "## 上传记录\n\n",
+        "| " + " | ".join(HISTORY_HEADERS) + " |\n",
+        "|------|------|---------|-------|------|---------|------|\n",
+    ]
+    for record in records:
+        lines.append("| " + " | ".join(str(record.get(field, "")) for field in HISTORY_FIELDS) + " |\n")
     
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.writelines(lines)
+    os.replace(temp_path, path)
+    return len(records)
+
 def record_upload_history(script_path: str, script_id: str, operation_type: str, version: str = "", remarks: str = "") -> None:
     """记录上传历史
     
@@ -469,53 +3318,25 @@ def record_upload_history(script_path: str, script_id: str, operation_type: str,
     
     # 获取当前时间
     now = datetime.now()
-    date_str = now.strftime("%Y-%m-%d")
-    time_str = now.strftime("%H:%M")
-    
-    # 准备新记录
-    new_record = f"| {date_str} | {time_str} | {script_name} | {script_id} | {version} | {operation_type} | {remarks} |"
-    
-    # 检查历史记录文件是否存在
-    if not os.path.exists(UPLOAD_HISTORY_FILE):
-        # 创建新的历史记录文件
-        with open(UPLOAD_HISTORY_FILE, 'w', encoding='utf-8') as f:
-            f.write("# 脚本上传历史记录\n\n")
-            f.write("此文件记录所有油猴脚本的上传历史，包括上传时间、脚本名称、版本号等信息。\n\n")
-            f.write("## 上传记录\n\n")
-            f.write("| 日期 | 时间 | 脚本名称 | 脚本ID | 版本 | 操作类型 | 备注 |\n")
-            f.write("|------|------|---------|-------|------|---------|------|")  # 表头分隔行
-    
-    # 添加新记录
-    with open(UPLOAD_HISTORY_FILE, 'r', encoding='utf-8') as f:
-        content = f.readlines()
-    
-    # 找到表头分隔行的位置
-    header_separator_index = -1
-    for i, line in enumerate(content):
-        if "|------" in line:
-            header_separator_index = i
-            break
     
-    if header_separator_index >= 0:
-        # 在表头分隔行后插入新记录
-        content.insert(header_separator_index + 1, new_record + "\n")
-        
-        # 写回文件
-        with open(UPLOAD_HISTORY_FILE, 'w', encoding='utf-8') as f:
-            f.writelines(content)
-            
+    try:
+        append_history_record({
+            "date": now.strftime("%Y-%m-%d"),
+            "time": now.strftime("%H:%M"),
+            "script_name": script_name,
+            "script_id": script_id,
+            "version": version,
+            "operation_type": operation_type,
+            "remarks": remarks,
+        })
         print_colored(f"已记录上传历史: {script_name} ({operation_type})", Colors.GREEN)
+    except Exception as e:
+        print_colored(f"记录上传历史失败: {e}", Colors.RED)
 
 def extract_script_version(script_path: str) -> str:
     """从脚本文件中提取版本号"""
     try:
-        with open(script_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            
-            # 尝试匹配 @version 标签
-            version_match = re.search(r'@version\s+([\d\.]+)', content)
-            if version_match:
-                return version_match.group(1)
+        return load_script_artifact(script_path).metadata["version"]
     except Exception as e:
         print_colored(f"提取版本号时出错: {e}", Colors.YELLOW)
     
@@ -541,38 +3362,212 @@ def find_readme(script_path):
     
     return None
 
-def quick_update(script_path=None, skip_login=False):
+def parse_userscript_header(script_path: str) -> Optional[Dict[str, List[str]]]:
+    """流式读取脚本文件的元数据块，不是油猴脚本时返回None（不读取整个文件）"""
+    try:
+        with open(script_path, 'r', encoding='utf-8', errors='replace') as f:
+            return parse_header_lines(f, strict=True)
+    except OSError:
+        return None
+
+def load_script_index() -> Dict[str, Any]:
+    """加载油猴脚本索引"""
+    if os.path.exists(SCRIPT_INDEX_FILE):
+        try:
+            with open(SCRIPT_INDEX_FILE, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if index.get("version") == SCRIPT_INDEX_VERSION:
+                return index
+        except Exception as e:
+            print_colored(f"读取脚本索引失败，将重新建立: {e}", Colors.YELLOW)
+    return {"version": SCRIPT_INDEX_VERSION, "dirs": {}, "scripts": {}, "latest": None}
+
+def save_script_index(index: Dict[str, Any]) -> None:
+    """保存油猴脚本索引"""
+    try:
+        write_json_atomic(SCRIPT_INDEX_FILE, index)
+    except Exception as e:
+        print_colored(f"保存脚本索引失败: {e}", Colors.YELLOW)
+
+def refresh_script_index(rebuild: bool = False, quick: bool = False) -> Dict[str, Any]:
+    """增量更新油猴脚本索引
+
+    目录的修改时间没有变化时直接沿用索引中记录的子目录和脚本列表，不再列出目录内容；
+    只有已知的油猴脚本会被stat，修改时间或大小变化时才重新解析元数据块，
+    元数据块被删除的文件会从索引中移除。node_modules等依赖目录和隐藏目录不会被扫描。
+
+    quick为True时只stat索引中记录的目录：修改时间变化（有文件新增、删除或改名）的目录
+    重新列出并stat其中的脚本，其余目录中的脚本直接沿用索引记录，不再stat。
+    就地修改、没有改变目录修改时间的脚本要到下一次完整刷新（which、status、audit
+    或--rescan）时才会更新。
+    """
+    old_index = {"dirs": {}, "scripts": {}} if rebuild else load_script_index()
+    index = {"version": SCRIPT_INDEX_VERSION, "dirs": {}, "scripts": {}, "latest": None}
+    history_ids = None
+    changed = rebuild
+    
+    def index_script(script_path: str, check: bool = True) -> bool:
+        """把一个脚本加入新索引，文件不存在或不是油猴脚本时返回False；check为False时直接沿用索引记录"""
+        nonlocal changed, history_ids
+        cached = old_index["scripts"].get(script_path)
+        if cached and not check:
+            record = cached
+        else:
+            try:
+                st = os.stat(script_path)
+            except OSError:
+                changed = True
+                return False
+            
+            if cached and cached["mtime"] == st.st_mtime and cached["size"] == st.st_size:
+                record = cached
+            else:
+                changed = True
+                header = parse_userscript_header(script_path)
+                if header is None:
+                    return False
+                record = {
+                    "mtime": st.st_mtime,
+                    "size": st.st_size,
+                    "name": (header.get("name") or [""])[0],
+                    "version": (header.get("version") or [""])[0],
+                    "script_id": "",
+                }
+        
+        if not record["script_id"]:
+            record["script_id"] = get_script_id_for_path(script_path)
+        if not record["script_id"]:
+            if history_ids is None:
+                history_ids = {}
+                history_index = load_history_index()
+                for script_name, positions in history_index["by_name"].items():
+                    history_ids[script_name] = history_index["records"][positions[-1]].get("script_id", "")
+            record["script_id"] = history_ids.get(os.path.splitext(os.path.basename(script_path))[0], "")
+        
+        index["scripts"][script_path] = record
+        if not index["latest"] or record["mtime"] > index["scripts"][index["latest"]]["mtime"]:
+            index["latest"] = script_path
+        return True
+    
+    def scan_dir(dir_path: str, collect_scripts: bool) -> None:
+        nonlocal changed
+        try:
+            dir_mtime = os.stat(dir_path).st_mtime
+        except OSError:
+            return
+        
+        entry = old_index["dirs"].get(dir_path)
+        # 快速查找时修改时间未变的目录中的脚本不再stat
+        check = not quick
+        if not entry or entry["mtime"] != dir_mtime:
+            # 目录内容有增删，重新列出
+            changed = True
+            entry = {"mtime": dir_mtime, "subdirs": [], "files": []}
+            with os.scandir(dir_path) as it:
+                for item in it:
+                    if item.name.startswith('.'):
+                        continue
+                    if item.is_dir() and item.name not in INDEX_IGNORED_DIRS:
+                        entry["subdirs"].append(item.name)
+                    elif collect_scripts and item.is_file() and item.name.endswith('.js'):
+                        entry["files"].append(item.name)
+            check = True
+        
+        # files先记录所有.js文件（或上次的油猴脚本），这里只保留仍是油猴脚本的文件
+        files = [name for name in entry["files"] if index_script(os.path.join(dir_path, name), check)]
+        index["dirs"][dir_path] = {"mtime": entry["mtime"], "subdirs": entry["subdirs"], "files": files}
+        
+        for subdir in entry["subdirs"]:
+            scan_dir(os.path.join(dir_path, subdir), True)
+    
+    # 与原来的行为一致，只查找项目目录下子目录中的脚本
+    scan_dir(PROJECT_DIR, False)
+    
+    if changed or index["latest"] != old_index.get("latest") or len(index["dirs"]) != len(old_index["dirs"]):
+        save_script_index(index)
+    return index
+
+def find_latest_script() -> Optional[str]:
+    """查找项目目录下最近修改的油猴脚本（只重新列出修改时间变化的目录）"""
+    return refresh_script_index(quick=True)["latest"]
+
+def find_script_id_in_history(script_path: str) -> str:
+    """查找脚本对应的ID：优先使用配置中的路径映射，其次按脚本名称查找上传历史"""
+    script_id = get_script_id_for_path(script_path)
+    if script_id:
+        return script_id
+    
+    script_name = os.path.splitext(os.path.basename(script_path))[0]
+    try:
+        for record in query_upload_history(script_name):
+            if record["script_name"] == script_name and record["script_id"].isdigit():
+                return record["script_id"]
+    except Exception as e:
+        print_colored(f"读取上传历史失败: {e}", Colors.YELLOW)
+    
+    return ""
+
+def load_batch_manifest(spec: str) -> List[Dict[str, str]]:
+    """加载批量更新任务
+    
+    spec可以是JSON清单文件，格式为
+    [{"script_path": "...", "script_id": "...", "readme_path": "..."}]
+    或 {"脚本路径": "脚本ID"}，相对路径以清单所在目录为基准；
+    也可以是脚本路径的glob模式，此时脚本ID从上传历史中按脚本名称查找。
+    """
+    jobs = []
+    
+    if spec.endswith('.json') and os.path.isfile(spec):
+        try:
+            with open(spec, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except Exception as e:
+            print_colored(f"读取批量清单失败: {e}", Colors.RED)
+            sys.exit(1)
+        
+        if isinstance(manifest, dict):
+            manifest = [{"script_path": path, "script_id": str(script_id)} for path, script_id in manifest.items()]
+        
+        base_dir = os.path.dirname(os.path.abspath(spec))
+        for entry in manifest:
+            job = {
+                "script_path": os.path.join(base_dir, entry["script_path"]),
+                "script_id": str(entry.get("script_id", "")),
+            }
+            if entry.get("readme_path"):
+                job["readme_path"] = os.path.join(base_dir, entry["readme_path"])
+            jobs.append(job)
+    else:
+        for script_path in sorted(glob.glob(spec, recursive=True)):
+            jobs.append({
+                "script_path": script_path,
+                "script_id": find_script_id_in_history(script_path),
+            })
+    
+    valid_jobs = []
+    for job in jobs:
+        if not os.path.exists(job["script_path"]):
+            print_colored(f"警告: 脚本文件 '{job['script_path']}' 不存在，已跳过", Colors.YELLOW)
+        elif not job["script_id"]:
+            print_colored(f"警告: 未找到脚本 '{job['script_path']}' 的脚本ID，已跳过", Colors.YELLOW)
+        else:
+            valid_jobs.append(job)
+    
+    return valid_jobs
+
+def quick_update(script_path=None, skip_login=False, force=False, engine="browser", submit=False, inject_strategy="auto", use_daemon=True):
     """快速更新模式，使用最后一次的脚本ID和默认设置"""
     if not script_path:
         # 如果没有提供脚本路径，尝试查找最近修改的油猴脚本
         print_colored("未提供脚本路径，尝试查找最近修改的油猴脚本...", Colors.BLUE)
-        script_dirs = []
-        
-        # 查找油猴目录下的所有子目录
-        for item in os.listdir(PROJECT_DIR):
-            item_path = os.path.join(PROJECT_DIR, item)
-            if os.path.isdir(item_path) and not item.startswith('.'):
-                script_dirs.append(item_path)
-        
-        # 查找所有.js文件
-        js_files = []
-        for script_dir in script_dirs:
-            for root, _, files in os.walk(script_dir):
-                for file in files:
-                    if file.endswith('.js'):
-                        js_files.append(os.path.join(root, file))
-        
-        if not js_files:
+        script_path = find_latest_script()
+        if not script_path:
             print_colored("错误: 未找到任何油猴脚本", Colors.RED)
             sys.exit(1)
-        
-        # 按修改时间排序
-        js_files.sort(key=lambda x: os.path.getmtime(x), reverse=True)
-        script_path = js_files[0]
         print_colored(f"找到最近修改的脚本: {script_path}", Colors.GREEN)
     
-    # 获取脚本ID
-    last_id = get_last_script_id()
+    # 获取脚本ID：优先使用该脚本路径记录的ID
+    last_id = get_script_id_for_path(script_path) or get_last_script_id()
     if not last_id:
         print_colored("错误: 未找到上次使用的脚本ID", Colors.RED)
         print("请使用完整命令指定脚本ID: --update --id <ID>")
@@ -586,16 +3581,329 @@ def quick_update(script_path=None, skip_login=False):
         print_colored("警告: 未找到README文件", Colors.YELLOW)
     
     # 执行更新
-    success = update_script(last_id, script_path, readme_path, skip_login=skip_login)
+    if engine == "http":
+        success = http_update_script(last_id, script_path, readme_path, submit=submit, force=force)
+    elif use_daemon and find_daemon():
+        success = daemon_update_script(last_id, script_path, readme_path, force=force, inject_strategy=inject_strategy)
+    else:
+        success = update_script(last_id, script_path, readme_path, skip_login=skip_login, force=force, inject_strategy=inject_strategy)
     if success:
         # 记录上传历史
+        update_last_script_id(last_id, script_path)
         version = extract_script_version(script_path)
         record_upload_history(script_path, last_id, "更新", version)
     
     return success
 
+def audit_script(script_path: str) -> Dict[str, Any]:
+    """检查单个油猴脚本（在进程池中运行）：解析元数据，计算大小和哈希，返回记录和问题列表"""
+    record = {"path": script_path, "name": "", "version": "", "namespace": "", "size": 0, "lines": 0, "sha256": "",
+              "matches": 0, "requires": [], "readme": None, "issues": []}
+    
+    def issue(level, message):
+        record["issues"].append({"level": level, "message": message})
+    
+    try:
+        with open(script_path, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        issue("error", f"无法读取: {e}")
+        return record
+    record.update(size=len(data), lines=data.count(b"\n") + 1, sha256=hashlib.sha256(data).hexdigest())
+    try:
+        content = data.decode('utf-8')
+    except UnicodeDecodeError:
+        issue("error", "不是UTF-8编码")
+        content = data.decode('utf-8', errors='replace')
+    
+    record["readme"] = find_readme(script_path)
+    header = parse_header_lines(io.StringIO(content), strict=False)
+    if header is None:
+        issue("error", "没有完整的元数据块")
+        return record
+    
+    def first(key):
+        return (header.get(key) or [""])[0]
+    record.update(name=first("name"), version=first("version"), namespace=first("namespace"))
+    
+    for key in AUDIT_REQUIRED_KEYS:
+        if not first(key):
+            issue("error", f"缺少@{key}")
+        elif len(header[key]) > 1:
+            issue("warning", f"@{key}出现了{len(header[key])}次")
+    if record["version"] and not AUDIT_VERSION_PATTERN.match(record["version"]):
+        issue("error", f"版本号格式不规范: {record['version']}")
+    if not record["namespace"]:
+        issue("warning", "缺少@namespace")
+    if not record["readme"]:
+        issue("warning", "没有README")
+    if record["size"] > AUDIT_MAX_SIZE:
+        issue("warning", f"脚本较大: {record['size'] // 1024} KB")
+    
+    matches = header.get("match", [])
+    includes = header.get("include", [])
+    record["matches"] = len(matches) + len(includes)
+    if not record["matches"]:
+        issue("warning", "没有@match或@include，脚本不会在任何页面运行")
+    elif record["matches"] > AUDIT_MAX_MATCHES:
+        issue("warning", f"@match/@include共{record['matches']}条，建议合并")
+    for pattern in matches:
+        if pattern != "<all_urls>" and not AUDIT_MATCH_PATTERN.match(pattern):
+            issue("error", f"无效的@match: {pattern}")
+    for pattern in matches + includes:
+        if pattern in ("*", "<all_urls>", "*://*/*", "http*://*/*"):
+            issue("warning", f"匹配所有页面: {pattern}")
+    
+    record["requires"] = header.get("require", [])
+    base_dir = os.path.dirname(script_path)
+    for url in record["requires"]:
+        if url.startswith("http://"):
+            issue("warning", f"@require使用HTTP: {url}")
+        elif is_local_require(url):
+            path = os.path.join(base_dir, url[len("file://"):] if url.startswith("file://") else url)
+            if not os.path.exists(path):
+                issue("error", f"@require文件不存在: {url}")
+    return record
+
+def audit_scripts(script_paths: List[str], workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """并行检查所有脚本，再做跨脚本的检查（重名、内容完全相同），按路径顺序返回记录"""
+    from concurrent.futures import ProcessPoolExecutor
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(script_paths) >= AUDIT_PARALLEL_THRESHOLD:
+        # 每个进程一次处理一批脚本，减少进程间通信
+        chunksize = max(1, len(script_paths) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            records = list(executor.map(audit_script, script_paths, chunksize=chunksize))
+    else:
+        records = [audit_script(path) for path in script_paths]
+    
+    by_name: Dict[str, List[Dict[str, Any]]] = {}
+    by_hash: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records:
+        if record["name"]:
+            by_name.setdefault(record["name"], []).append(record)
+        if record["sha256"]:
+            by_hash.setdefault(record["sha256"], []).append(record)
+    for name, group in by_name.items():
+        if len(group) > 1:
+            for record in group:
+                others = ", ".join(os.path.relpath(other["path"], PROJECT_DIR) for other in group if other is not record)
+                record["issues"].append({"level": "error", "message": f"@name与其他脚本重复: {others}"})
+    for group in by_hash.values():
+        if len(group) > 1:
+            for record in group:
+                others = ", ".join(os.path.relpath(other["path"], PROJECT_DIR) for other in group if other is not record)
+                record["issues"].append({"level": "warning", "message": f"内容与其他脚本完全相同: {others}"})
+    return records
+
+def command_status(argv: List[str]) -> None:
+    """status命令：显示配置、会话和缓存状态（不需要Playwright）"""
+    parser = argparse.ArgumentParser(prog="status", description="显示上传工具的当前状态")
+    parser.parse_args(argv)
+    
+    config = load_config()
+    fingerprints = load_fingerprints()
+    
+    print_colored("上传工具状态:", Colors.BLUE)
+    print(f"  配置文件: {CONFIG_FILE if os.path.exists(CONFIG_FILE) else '未创建'}")
+    print(f"  用户名: {config.get('username') or '未设置'}")
+    print(f"  最后使用的脚本ID: {Colors.YELLOW}{config.get('last_script_id') or '无'}{Colors.END}")
+    print(f"  登录会话缓存: {'有效' if has_saved_session() else '无或已过期'}")
+    print(f"  已记录指纹的脚本: {len(fingerprints)}")
+    print(f"  上传历史记录: {len(read_upload_history())} 条")
+    # 只检查是否已安装，不实际导入
+    print(f"  Playwright: {'已安装' if importlib.util.find_spec('playwright') else '未安装'}")
+
+def command_history(argv: List[str]) -> None:
+    """history命令：查询上传历史（不需要Playwright）"""
+    parser = argparse.ArgumentParser(prog="history", description="查询脚本上传历史")
+    parser.add_argument("script", nargs='?', help="按脚本名称或脚本ID筛选")
+    parser.add_argument("--date", help="按日期筛选（YYYY-MM-DD）")
+    parser.add_argument("--limit", type=int, default=10, help="最多显示的记录数（默认10）")
+    parser.add_argument("--last-version", action="store_true", help="只输出该脚本最近一次上传的版本号")
+    parser.add_argument("--markdown", action="store_true", help=f"重新生成 {os.path.basename(UPLOAD_HISTORY_FILE)}")
+    args = parser.parse_args(argv)
+    
+    if args.markdown:
+        count = export_history_markdown()
+        print_colored(f"已生成 {UPLOAD_HISTORY_FILE}（{count} 条记录）", Colors.GREEN)
+        return
+    
+    if args.last_version:
+        if not args.script:
+            parser.error("--last-version 需要指定脚本名称或脚本ID")
+        record = get_last_upload(args.script)
+        if not record:
+            print_colored(f"没有找到脚本 {args.script} 的上传记录", Colors.YELLOW)
+            sys.exit(1)
+        print(record["version"])
+        return
+    
+    records = query_upload_history(args.script, args.date)
+    if not records:
+        print_colored("没有找到上传记录", Colors.YELLOW)
+        return
+    
+    for record in records[:args.limit]:
+        print(f"{record['date']} {record['time']}  {Colors.YELLOW}{record['script_id']:>8}{Colors.END}  "
+              f"{record['script_name']}  {record['version']}  {record['operation_type']}  {record['remarks']}")
+
+def command_which(argv: List[str]) -> None:
+    """which命令：显示快速更新模式将使用的脚本、ID和README（不需要Playwright）"""
+    parser = argparse.ArgumentParser(prog="which", description="显示快速更新模式将会上传的内容")
+    parser.add_argument("script_path", nargs='?', help="油猴脚本文件路径（默认使用最近修改的脚本）")
+    parser.add_argument("--rescan", action="store_true", help="忽略已有索引，重新扫描所有目录")
+    args = parser.parse_args(argv)
+    
+    index = refresh_script_index(rebuild=args.rescan)
+    script_path = args.script_path or index["latest"]
+    if not script_path:
+        print_colored("错误: 未找到任何油猴脚本", Colors.RED)
+        sys.exit(1)
+    
+    record = index["scripts"].get(os.path.abspath(script_path), {})
+    print(f"  脚本: {script_path}")
+    if record:
+        print(f"  名称: {record['name']}  版本: {record['version']}")
+    print(f"  脚本ID: {Colors.YELLOW}{get_last_script_id() or '无'}{Colors.END}")
+    if record.get("script_id"):
+        print(f"  历史记录中的脚本ID: {record['script_id']}")
+    print(f"  README: {find_readme(script_path) or '未找到'}")
+
+def command_audit(argv: List[str]) -> None:
+    """audit命令：检查项目中所有油猴脚本的元数据和常见问题（不需要Playwright）"""
+    parser = argparse.ArgumentParser(prog="audit", description="检查项目中所有油猴脚本，输出表格和JSON报告")
+    parser.add_argument("paths", nargs="*", help="要检查的脚本（默认为脚本索引中的所有油猴脚本）")
+    parser.add_argument("--rescan", action="store_true", help="忽略已有索引，重新扫描所有目录")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="进程数（默认为CPU核心数）")
+    parser.add_argument("--output", default=AUDIT_REPORT_FILE, help=f"JSON报告文件（默认{os.path.basename(AUDIT_REPORT_FILE)}）")
+    parser.add_argument("--json", action="store_true", help="把JSON报告输出到标准输出，不显示表格")
+    parser.add_argument("--strict", action="store_true", help="有警告时也以非零状态退出")
+    args = parser.parse_args(argv)
+    
+    start = time.perf_counter()
+    script_paths = [os.path.abspath(path) for path in args.paths] or sorted(refresh_script_index(rebuild=args.rescan)["scripts"])
+    records = audit_scripts(script_paths, args.workers)
+    errors = sum(1 for record in records for item in record["issues"] if item["level"] == "error")
+    warnings = sum(1 for record in records for item in record["issues"] if item["level"] == "warning")
+    
+    for record in records:
+        record["path"] = os.path.relpath(record["path"], PROJECT_DIR)
+        if record["readme"]:
+            record["readme"] = os.path.relpath(record["readme"], PROJECT_DIR)
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "root": PROJECT_DIR,
+        "summary": {
+            "scripts": len(records),
+            "errors": errors,
+            "warnings": warnings,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+        },
+        "scripts": records,
+    }
+    
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        write_json_atomic(args.output, report)
+        print(f"{'状态':<4} {'版本':<10} {'大小':>8}  {'名称':<30} 路径")
+        for record in records:
+            levels = {item["level"] for item in record["issues"]}
+            mark = f"{Colors.RED}错误{Colors.END}" if "error" in levels else f"{Colors.YELLOW}警告{Colors.END}" if levels else f"{Colors.GREEN}正常{Colors.END}"
+            print(f"{mark} {record['version']:<10} {record['size'] / 1024:>6.1f}KB  {record['name']:<30} {record['path']}")
+            for item in record["issues"]:
+                color = Colors.RED if item["level"] == "error" else Colors.YELLOW
+                print(f"       {color}- {item['message']}{Colors.END}")
+        summary = report["summary"]
+        print_colored(f"\n共 {summary['scripts']} 个脚本，{summary['errors']} 个错误，{summary['warnings']} 个警告，"
+                      f"耗时 {summary['duration_ms']:.0f} ms；报告已写入 {args.output}", Colors.RED if errors else Colors.YELLOW if warnings else Colors.GREEN)
+    
+    if errors or (args.strict and warnings):
+        sys.exit(1)
+
+def find_review_bundles(ids: List[str]) -> List[Dict[str, Any]]:
+    """按ID（或唯一的ID前缀）查找审核包"""
+    bundles = load_review_bundles()
+    found = []
+    for bundle_id in ids:
+        matches = [bundle for bundle in bundles if bundle["id"] == bundle_id] or [bundle for bundle in bundles if bundle["id"].startswith(bundle_id)]
+        if len(matches) != 1:
+            print_colored(f"错误: {'没有找到' if not matches else '有多个匹配的'}审核包: {bundle_id}", Colors.RED)
+            sys.exit(1)
+        found.append(matches[0])
+    return found
+
+def command_review(argv: List[str]) -> None:
+    """review命令：查看、通过或拒绝--headless生成的审核包（不需要Playwright）"""
+    parser = argparse.ArgumentParser(prog="review", description="查看和提交 --headless 生成的审核包")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+    list_parser = subparsers.add_parser("list", help="列出审核包（默认只列出待审核的）")
+    list_parser.add_argument("--all", action="store_true", help="同时列出已通过和已拒绝的审核包")
+    show_parser = subparsers.add_parser("show", help="显示审核包的内容和与已发布版本的差异")
+    show_parser.add_argument("id", help="审核包ID或唯一的ID前缀")
+    approve_parser = subparsers.add_parser("approve", help="通过HTTP提交审核包（一次登录）")
+    approve_parser.add_argument("ids", nargs="*", help="审核包ID或唯一的ID前缀")
+    approve_parser.add_argument("--all", action="store_true", help="提交所有待审核的审核包")
+    approve_parser.add_argument("--username", help="Greasy Fork 用户名或邮箱")
+    approve_parser.add_argument("--password", help="Greasy Fork 密码")
+    reject_parser = subparsers.add_parser("reject", help="拒绝审核包（不提交）")
+    reject_parser.add_argument("ids", nargs="+", help="审核包ID或唯一的ID前缀")
+    args = parser.parse_args(argv)
+    
+    if args.action == "list":
+        bundles = load_review_bundles(None if args.all else "pending")
+        if not bundles:
+            print_colored("没有待审核的审核包", Colors.GREEN)
+            return
+        for bundle in bundles:
+            changes = ", ".join(bundle["changes"]) or "无变化"
+            print(f"{bundle['id']}  {Colors.YELLOW}{bundle['script_id'] or '新建':>8}{Colors.END}  "
+                  f"{bundle['name']}  {bundle['version']}  {bundle['status']}  ({changes})")
+        return
+    
+    if args.action == "show":
+        bundle = find_review_bundles([args.id])[0]
+        print_colored(f"{bundle['name']} {bundle['version']} ({bundle['kind']}, {bundle['status']})", Colors.BLUE)
+        print(f"  脚本: {bundle['script_path']}")
+        print(f"  脚本ID: {bundle['script_id'] or '新建'}")
+        print(f"  截图: {os.path.join(bundle['path'], 'screenshot.png')}")
+        for name, filename in bundle["fields"].items():
+            print(f"  {name}: {os.path.join(bundle['path'], filename)}")
+        print(read_text_file(os.path.join(bundle["path"], "diff.txt")) or "与已发布内容相同")
+        return
+    
+    if args.action == "reject":
+        for bundle in find_review_bundles(args.ids):
+            update_review_bundle(bundle, status="rejected")
+            print_colored(f"已拒绝: {bundle['id']}", Colors.YELLOW)
+        return
+    
+    if args.all == bool(args.ids):
+        approve_parser.error("请指定审核包ID或使用 --all（二者只能选一）")
+    bundles = load_review_bundles("pending") if args.all else find_review_bundles(args.ids)
+    bundles = [bundle for bundle in bundles if bundle["status"] == "pending"]
+    if not bundles:
+        print_colored("没有待审核的审核包", Colors.GREEN)
+        return
+    approved = approve_review_bundles(bundles, args.username, args.password)
+    print_colored(f"已提交 {approved}/{len(bundles)} 个审核包", Colors.GREEN if approved == len(bundles) else Colors.YELLOW)
+    if approved < len(bundles):
+        sys.exit(1)
+
+# 不需要启动浏览器的子命令
+SUBCOMMANDS = {
+    "status": command_status,
+    "history": command_history,
+    "which": command_which,
+    "audit": command_audit,
+    "review": command_review,
+}
+
 def main():
     """主函数"""
+    global GREASYFORK_URL
+    
     # 检查是否有命令行参数
     if len(sys.argv) == 1:
         # 如果没有参数，进入快速更新模式
@@ -604,8 +3912,16 @@ def main():
         print_colored("操作完成！", Colors.GREEN)
         return
     
+    # 子命令，不需要浏览器
+    if sys.argv[1] in SUBCOMMANDS:
+        SUBCOMMANDS[sys.argv[1]](sys.argv[2:])
+        return
+    
     # 解析命令行参数
-    parser = argparse.ArgumentParser(description="Greasy Fork Chrome上传工具")
+    parser = argparse.ArgumentParser(
+        description="Greasy Fork Chrome上传工具",
+        epilog="子命令（无需Playwright）: " + ", ".join(SUBCOMMANDS),
+    )
     parser.add_argument("script_path", nargs='?', help="油猴脚本文件路径")
     parser.add_argument("--new", action="store_true", help="创建新脚本（默认）")
     parser.add_argument("--update", action="store_true", help="更新现有脚本")
@@ -618,13 +3934,102 @@ def main():
     parser.add_argument("--skip-login", action="store_true", help="跳过登录步骤，使用现有浏览器会话")
     parser.add_argument("--save-config", action="store_true", help="安全保存凭据到配置文件")
     parser.add_argument("--quick", action="store_true", help="快速更新模式，使用最后一次的脚本ID和默认设置")
+    parser.add_argument("--batch", metavar="MANIFEST", help="批量更新模式，参数为JSON清单文件或脚本路径的glob模式")
+    parser.add_argument("--force", action="store_true", help="即使脚本内容与上次上传相同也打开浏览器更新")
+    parser.add_argument("--resume", action="store_true", help="继续上次中断或失败的批量任务（使用当时的设置）")
+    parser.add_argument("--rate-limit", type=float, default=POST_MIN_INTERVAL, metavar="SECONDS", help=f"两次提交之间的最短间隔秒数，并发时全局生效（默认{POST_MIN_INTERVAL:g}）")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_BATCH_CONCURRENCY, help=f"批量更新时同时加载的标签页数量（默认{DEFAULT_BATCH_CONCURRENCY}）")
+    parser.add_argument("--engine", choices=["browser", "http"], default="browser", help="browser: 启动Chrome填写表单（默认）；http: 不启动浏览器，直接通过HTTP准备表单（仅支持更新）")
+    parser.add_argument("--submit", action="store_true", help="HTTP引擎准备好表单后直接提交（默认不提交）")
+    parser.add_argument("--inject", choices=INJECT_STRATEGIES, default="auto", help="浏览器模式下脚本代码的注入方式（默认auto: 按大小自动选择fill、dom或upload）")
+    parser.add_argument("--base-url", help=f"Greasy Fork站点地址（默认{GREASYFORK_URL}），可指向本地模拟服务器")
+    parser.add_argument("--watch", action="store_true", help="更新时保持浏览器打开，监视脚本和README文件，保存后只重新填写变化的字段")
+    parser.add_argument("--build", action="store_true", help="上传前构建：校验元数据，压缩脚本主体（保留元数据块），结果按内容哈希缓存")
+    parser.add_argument("--inline-requires", action="store_true", help="构建时把本地@require文件内联到脚本中（隐含--build）")
+    parser.add_argument("--no-remote-check", action="store_true", help="更新前不检查Greasy Fork上已发布的版本和代码")
+    parser.add_argument("--headless", action="store_true", help=f"无头模式：填写表单后保存截图、字段值和差异到{os.path.basename(REVIEW_DIR)}/目录，不等待确认，之后用 review approve 批量提交")
+    parser.add_argument("--no-block", action="store_true", help="不拦截图片、字体、媒体和统计广告等与填写表单无关的请求")
+    parser.add_argument("--daemon", action="store_true", help=f"以守护进程方式运行，保持已登录的浏览器上下文，通过Unix套接字接收上传任务（{DAEMON_SOCKET}）")
+    parser.add_argument("--daemon-workers", type=int, default=DEFAULT_DAEMON_WORKERS, help=f"守护进程保持的浏览器上下文数量（默认{DEFAULT_DAEMON_WORKERS}）")
+    parser.add_argument("--cdp", metavar="URL", help="守护进程通过CDP连接已运行的Chrome（如 http://127.0.0.1:9222），而不是启动新浏览器")
+    parser.add_argument("--daemon-stop", action="store_true", help="停止正在运行的守护进程")
+    parser.add_argument("--no-daemon", action="store_true", help="即使守护进程正在运行，也在本进程中启动浏览器")
+    parser.add_argument("--timings", nargs="?", const=TIMINGS_FILE, metavar="FILE", help=f"把启动浏览器、登录、页面加载、等待选择器、填写字段等各阶段的耗时以JSON行写入文件（默认{os.path.basename(TIMINGS_FILE)}）")
+    parser.add_argument("--trace", action="store_true", help=f"浏览器模式下保存Playwright追踪文件到{os.path.basename(TRACE_DIR)}/目录，可用 playwright show-trace 查看")
     
-    global args
+    global args, TRACE_ENABLED, BLOCK_RESOURCES, BUILD_OPTIONS, HEADLESS, REVIEW_MODE, REMOTE_CHECK
     args = parser.parse_args()
     
+    if args.submit and args.engine != "http":
+        parser.error("--submit 只能与 --engine http 一起使用，浏览器模式下请手动点击提交按钮")
+    if args.engine == "http" and not (args.update or args.quick or args.batch or args.resume):
+        parser.error("HTTP引擎目前只支持更新脚本（--update、--quick或--batch）")
+    if args.watch and (args.engine != "browser" or not args.update or args.batch or not args.script_path):
+        parser.error("--watch 只能在浏览器模式下与 --update 和脚本路径一起使用")
+    if args.headless and (args.engine != "browser" or args.watch or args.daemon):
+        parser.error("--headless 只能在浏览器模式下使用，不支持 --watch 和 --daemon")
+    if args.base_url:
+        GREASYFORK_URL = args.base_url.rstrip('/')
+    if args.timings:
+        print_colored(f"阶段耗时将写入: {enable_timings(args.timings)}", Colors.BLUE)
+    TRACE_ENABLED = args.trace
+    BLOCK_RESOURCES = not args.no_block
+    POST_RATE_LIMITER.min_interval = max(0.0, args.rate_limit)
+    HEADLESS = REVIEW_MODE = args.headless
+    REMOTE_CHECK = not args.no_remote_check
+    if args.build or args.inline_requires:
+        BUILD_OPTIONS = {"inline": args.inline_requires}
+    
+    # 守护进程
+    if args.daemon_stop:
+        if daemon_request({"action": "shutdown"}):
+            print_colored("已通知守护进程退出", Colors.GREEN)
+        else:
+            print_colored("守护进程未运行", Colors.YELLOW)
+        return
+    if args.daemon:
+        serve_daemon(args.daemon_workers, args.chrome, args.cdp, args.skip_login)
+        return
+    
     # 快速更新模式
     if args.quick:
-        quick_update(args.script_path)
+        quick_update(args.script_path, force=args.force, engine=args.engine, submit=args.submit, inject_strategy=args.inject, use_daemon=not (args.no_daemon or REVIEW_MODE))
+        print_colored("操作完成！", Colors.GREEN)
+        return
+    
+    # 继续上次未完成的批量任务
+    if args.resume:
+        job_queue = UploadJobQueue.load()
+        if not job_queue or not job_queue.unfinished():
+            print_colored("没有未完成的批量任务", Colors.GREEN)
+            return
+        print_colored(f"继续 {job_queue.data['created']} 创建的批量任务，剩余 {len(job_queue.unfinished())} 个", Colors.BLUE)
+        HEADLESS = REVIEW_MODE = job_queue.options.get("headless", False)
+        run_job_queue(job_queue, args.chrome, args.skip_login, args.username, args.password)
+        print_colored("操作完成！", Colors.GREEN)
+        return
+    
+    # 批量更新模式
+    if args.batch:
+        jobs = load_batch_manifest(args.batch)
+        if not jobs:
+            print_colored("错误: 批量清单中没有可更新的脚本", Colors.RED)
+            sys.exit(1)
+        
+        previous = UploadJobQueue.load()
+        if previous and previous.unfinished():
+            print_colored(f"上次的批量任务还有 {len(previous.unfinished())} 个未完成，已被新的任务替换（如需继续请使用 --resume）", Colors.YELLOW)
+        
+        # 批量更新只记录路径与ID的对应关系，不改动last_script_id
+        job_queue = UploadJobQueue.create(jobs, {
+            "engine": args.engine,
+            "concurrency": args.concurrency,
+            "submit": args.submit,
+            "force": args.force,
+            "inject": args.inject,
+            "headless": args.headless,
+        })
+        run_job_queue(job_queue, args.chrome, args.skip_login, args.username, args.password)
         print_colored("操作完成！", Colors.GREEN)
         return
     
@@ -639,7 +4044,7 @@ def main():
     
     # 如果没有提供脚本ID，但需要更新脚本，尝试使用上次的ID
     if is_update and not script_id:
-        last_id = get_last_script_id()
+        last_id = (args.script_path and get_script_id_for_path(args.script_path)) or get_last_script_id()
         if last_id:
             script_id = last_id
             print_colored(f"使用上次的脚本ID: {script_id}", Colors.BLUE)
@@ -659,28 +4064,38 @@ def main():
     update_notes = ""
     if args.readme:
         try:
-            with open(args.readme, 'r', encoding='utf-8') as f:
-                readme_content = f.read()
-                # 尝试提取第一行作为更新说明
-                first_line = readme_content.strip().split('\n')[0]
-                update_notes = first_line.lstrip('#').strip()
+            readme_content = read_text_file(args.readme)
+            # 尝试提取第一行作为更新说明
+            first_line = readme_content.strip().split('\n')[0]
+            update_notes = first_line.lstrip('#').strip()
         except Exception:
             pass
     
     # 执行操作
-    if is_update:
-        success = update_script(script_id, args.script_path, args.readme, args.chrome)
+    if is_update and args.watch:
+        # 监视模式在用户提交表单时自行记录上传历史
+        watch_update(script_id, args.script_path, args.readme, args.chrome, args.skip_login, args.inject)
+    elif is_update:
+        if args.engine == "http":
+            success = http_update_script(script_id, args.script_path, args.readme, args.submit, args.force, args.username, args.password)
+        elif not (args.no_daemon or REVIEW_MODE) and find_daemon():
+            success = daemon_update_script(script_id, args.script_path, args.readme, args.force, args.inject)
+        else:
+            success = update_script(script_id, args.script_path, args.readme, args.chrome, force=args.force, inject_strategy=args.inject)
         if success:
             # 更新最后使用的脚本ID
-            update_last_script_id(script_id)
+            update_last_script_id(script_id, args.script_path)
             # 记录上传历史
             version = extract_script_version(args.script_path)
             record_upload_history(args.script_path, script_id, "更新", version, remarks=update_notes)
     else:
-        new_script_id = create_new_script(args.script_path, args.readme, args.type, args.chrome)
+        if not (args.no_daemon or REVIEW_MODE) and find_daemon():
+            new_script_id = daemon_create_new_script(args.script_path, args.readme, args.type, args.inject)
+        else:
+            new_script_id = create_new_script(args.script_path, args.readme, args.type, args.chrome, inject_strategy=args.inject)
         if new_script_id:
             # 更新最后使用的脚本ID
-            update_last_script_id(new_script_id)
+            update_last_script_id(new_script_id, args.script_path)
             # 记录上传历史
             version = extract_script_version(args.script_path)
             record_upload_history(args.script_path, new_script_id, "新建", version, remarks=update_notes)
@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Greasy Fork本地模拟服务器
+------------------------
+模拟Greasy Fork的登录、新建脚本和发布新版本页面（包括CSRF令牌和登录会话），
+以及已发布脚本代码的下载（支持ETag/Last-Modified条件请求），
+用于在离线环境下测试和基准测试上传工具的浏览器流程、HTTP提交引擎和远程版本检查。
+
+用法:
+    python greasyfork_mock_server.py [--port 8765] [--user test@example.com] [--password secret]
+
+然后在上传工具中使用 --base-url http://127.0.0.1:8765/zh-CN 指向本服务器。
+"""
+
+import re
+import html
+import time
+import hashlib
+import secrets
+import argparse
+import threading
+import email.parser
+import email.policy
+import email.utils
+from typing import Optional, Dict, Any, List, Tuple
+from urllib.parse import urlsplit, parse_qsl
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# 会话Cookie名称（与Greasy Fork一致）
+SESSION_COOKIE = "_greasyfork_session"
+
+# 路径格式: /{语言}/...
+ROUTE_PATTERN = re.compile(r'^/(?P<locale>[a-zA-Z]{2}(?:-[a-zA-Z]{2,4})?)(?P<rest>/.*)?$')
+
+# 代码下载地址（与update.greasyfork.org一致）: /scripts/{ID}/{文件名}.user.js 或 .meta.js
+CODE_PATTERN = re.compile(r'^/scripts/(?P<script_id>\d+)/(?P<filename>[^/]+)\.(?P<kind>user|meta)\.js$')
+
+# 元数据块
+METADATA_BLOCK_PATTERN = re.compile(r'//\s*==UserScript==.*?//\s*==/UserScript==', re.DOTALL)
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title} - Greasy Fork</title>
+<meta name="csrf-param" content="authenticity_token">
+<meta name="csrf-token" content="{csrf_token}">
+</head>
+<body>
+<header>{nav}</header>
+<main>
+{body}
+</main>
+</body>
+</html>
+"""
+
+SIGN_IN_FORM = """<h2>登录</h2>
+{error}
+<form class="new_user" id="new_user" action="/{locale}/users/sign_in" accept-charset="UTF-8" method="post">
+<input type="hidden" name="authenticity_token" value="{csrf_token}" autocomplete="off">
+<input autofocus="autofocus" autocomplete="email" type="email" value="" name="user[email]" id="user_email">
+<input autocomplete="current-password" type="password" name="user[password]" id="user_password">
+<input name="user[remember_me]" type="hidden" value="0" autocomplete="off"><input type="checkbox" value="1" name="user[remember_me]" id="user_remember_me">
+<input type="submit" name="commit" value="登录" data-disable-with="登录">
+</form>
+"""
+
+NEW_VERSION_FORM = """<h2>发布新版本: {name}</h2>
+<form class="new_script_version" id="new_script_version" enctype="multipart/form-data" action="/{locale}/scripts/{script_id}/versions" accept-charset="UTF-8" method="post">
+<input type="hidden" name="authenticity_token" value="{csrf_token}" autocomplete="off">
+<textarea class="code-textarea" name="script_version[code]" id="script_version_code">{code}</textarea>
+<input type="file" name="code_upload" id="script_version_code_upload" accept=".js,.css">
+<input type="hidden" name="script_version[additional_info][0][attribute_default]" value="true" autocomplete="off">
+<textarea class="previewable" name="script_version[additional_info][0][attribute_value]" id="script-version-additional-info-0">{additional_info}</textarea>
+<select name="script_version[additional_info][0][value_markup]" id="script_version_additional_info_0_value_markup">
+<option value="html">HTML</option>
+<option selected="selected" value="markdown">Markdown</option>
+</select>
+<textarea name="script_version[changelog]" id="script_version_changelog"></textarea>
+<input type="radio" value="markdown" checked="checked" name="script_version[changelog_markup]" id="script_version_changelog_markup_markdown">
+<input type="radio" value="html" name="script_version[changelog_markup]" id="script_version_changelog_markup_html">
+<input type="submit" name="commit" value="发布新版本" data-disable-with="发布新版本">
+</form>
+"""
+
+NEW_SCRIPT_FORM = """<h2>发布新脚本</h2>
+<form class="new_script" id="new_script" enctype="multipart/form-data" action="/{locale}/scripts" accept-charset="UTF-8" method="post">
+<input type="hidden" name="authenticity_token" value="{csrf_token}" autocomplete="off">
+<input type="text" name="script[name]" id="script_name">
+<input type="text" name="script[description]" id="script_description">
+<input type="radio" value="public" checked="checked" name="script[script_type]" id="script_script_type_public">
+<input type="radio" value="unlisted" name="script[script_type]" id="script_script_type_unlisted">
+<input type="radio" value="library" name="script[script_type]" id="script_script_type_library">
+<textarea class="code-textarea" name="script[code]" id="script_code"></textarea>
+<textarea class="previewable" name="script_version[additional_info][0][attribute_value]" id="script-version-additional-info-0"></textarea>
+<input type="submit" name="commit" value="发布脚本" data-disable-with="发布脚本">
+</form>
+"""
+
+def _extract_version(code: str) -> str:
+    """从代码的元数据块中提取@version"""
+    match = re.search(r'//\s*@version\s+(\S+)', code)
+    return match.group(1) if match else ""
+
+def _extract_name(code: str) -> str:
+    """从代码的元数据块中提取@name"""
+    match = re.search(r'//\s*@name\s+(.+)', code)
+    return match.group(1).strip() if match else ""
+
+def parse_form_body(content_type: str, body: bytes) -> Dict[str, str]:
+    """解析application/x-www-form-urlencoded或multipart/form-data请求体"""
+    if content_type.startswith("multipart/form-data"):
+        message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+            b"Content-Type: " + content_type.encode("latin-1") + b"\r\n\r\n" + body
+        )
+        fields = {}
+        for part in message.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            if name is None:
+                continue
+            payload = part.get_payload(decode=True) or b""
+            if part.get_filename():
+                # 上传的文件以"字段名.filename"记录文件名
+                fields[name + ".filename"] = part.get_filename()
+            fields[name] = payload.decode("utf-8", errors="replace")
+        return fields
+    return dict(parse_qsl(body.decode("utf-8"), keep_blank_values=True))
+
+class MockGreasyForkState:
+    """模拟服务器的状态：用户、会话、脚本和提交记录"""
+
+    def __init__(self, username: str, password: str):
+        self.lock = threading.Lock()
+        self.users = {username: password}
+        # 会话ID -> {"csrf_token": ..., "user": 已登录的用户名或None}
+        self.sessions: Dict[str, Dict[str, Any]] = {}
+        # 脚本ID -> {"name", "code", "version", "additional_info", "modified", "versions": [...]}
+        self.scripts: Dict[str, Dict[str, Any]] = {}
+        # 所有成功的表单提交，按顺序记录
+        self.submissions: List[Dict[str, Any]] = []
+        # 请求计数，按路径统计
+        self.requests: Dict[str, int] = {}
+        self.next_script_id = 1000
+
+    def add_script(self, script_id: str, code: str = "", additional_info: str = "", name: str = "") -> None:
+        """预先放入一个已发布的脚本"""
+        with self.lock:
+            self.scripts[str(script_id)] = {
+                "name": name or _extract_name(code) or f"脚本{script_id}",
+                "code": code,
+                "version": _extract_version(code),
+                "additional_info": additional_info,
+                "modified": time.time(),
+                "versions": [],
+            }
+
+    def new_session(self) -> Tuple[str, Dict[str, Any]]:
+        session_id = secrets.token_hex(16)
+        session = {"csrf_token": secrets.token_urlsafe(32), "user": None}
+        with self.lock:
+            self.sessions[session_id] = session
+        return session_id, session
+
+class MockGreasyForkHandler(BaseHTTPRequestHandler):
+    """处理模拟Greasy Fork的请求"""
+
+    server_version = "MockGreasyFork/1.0"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def state(self) -> MockGreasyForkState:
+        return self.server.state
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    # ---- 会话 ----
+
+    def _load_session(self) -> Tuple[str, Dict[str, Any], bool]:
+        """读取请求中的会话Cookie，没有或无效时创建新会话"""
+        cookie_header = self.headers.get("Cookie", "")
+        for item in cookie_header.split(";"):
+            name, _, value = item.strip().partition("=")
+            if name == SESSION_COOKIE and value in self.state.sessions:
+                return value, self.state.sessions[value], False
+        session_id, session = self.state.new_session()
+        return session_id, session, True
+
+    # ---- 响应 ----
+
+    def _send(self, status: int, body: str = "", headers: Optional[Dict[str, str]] = None, content_type: str = "text/html; charset=utf-8") -> None:
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        if self._new_session:
+            self.send_header("Set-Cookie", f"{SESSION_COOKIE}={self._session_id}; path=/; HttpOnly; SameSite=Lax")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    def _redirect(self, location: str) -> None:
+        self._send(302, f'<html><body>You are being <a href="{html.escape(location)}">redirected</a>.</body></html>', {"Location": location})
+
+    def _page(self, title: str, body: str, status: int = 200) -> None:
+        if self._session["user"]:
+            nav = f'<a class="user-profile-link" href="/{self._locale}/users/1">{html.escape(self._session["user"])}</a>'
+        else:
+            nav = f'<a class="sign-in-link" href="/{self._locale}/users/sign_in">登录</a>'
+        self._send(status, PAGE_TEMPLATE.format(title=html.escape(title), csrf_token=self._session["csrf_token"], nav=nav, body=body))
+
+    def _read_form(self) -> Dict[str, str]:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        return parse_form_body(self.headers.get("Content-Type", ""), body)
+
+    def _require_login(self) -> bool:
+        if self._session["user"]:
+            return True
+        self._redirect(f"/{self._locale}/users/sign_in")
+        return False
+
+    def _check_csrf(self, form: Dict[str, str]) -> bool:
+        if form.get("authenticity_token") == self._session["csrf_token"]:
+            return True
+        self._send(422, "<h1>The change you wanted was rejected.</h1>")
+        return False
+
+    # ---- 路由 ----
+
+    def _dispatch(self) -> None:
+        if self.server.latency:
+            # 模拟网络往返延迟
+            time.sleep(self.server.latency)
+        path = urlsplit(self.path).path
+        self._session_id, self._session, self._new_session = self._load_session()
+        with self.state.lock:
+            key = f"{self.command} {path}"
+            self.state.requests[key] = self.state.requests.get(key, 0) + 1
+
+        match = ROUTE_PATTERN.match(path)
+        if not match:
+            self._locale = "zh-CN"
+            code_match = CODE_PATTERN.match(path)
+            if code_match and self.command in ("GET", "HEAD"):
+                self.handle_code(**code_match.groupdict())
+            elif path == "/":
+                self._redirect("/zh-CN")
+            else:
+                self._send(404, "<h1>Not Found</h1>")
+            return
+
+        self._locale = match.group("locale")
+        rest = (match.group("rest") or "/").rstrip("/") or "/"
+        method = "GET" if self.command == "HEAD" else self.command
+
+        routes = [
+            ("GET", r"/", self.handle_home),
+            ("GET", r"/users/sign_in", self.handle_sign_in_page),
+            ("POST", r"/users/sign_in", self.handle_sign_in),
+            ("GET", r"/scripts/new", self.handle_new_script_page),
+            ("POST", r"/scripts", self.handle_create_script),
+            ("GET", r"/scripts/(?P<script_id>\d+)[^/]*", self.handle_script_page),
+            ("GET", r"/scripts/(?P<script_id>\d+)[^/]*/versions/new", self.handle_new_version_page),
+            ("GET", r"/scripts/(?P<script_id>\d+)[^/]*/code/(?P<filename>[^/]+)", self.handle_code_redirect),
+            ("POST", r"/scripts/(?P<script_id>\d+)[^/]*/versions", self.handle_create_version),
+        ]
+        for route_method, pattern, handler in routes:
+            route_match = re.fullmatch(pattern, rest)
+            if route_method == method and route_match:
+                handler(**route_match.groupdict())
+                return
+        self._send(404, "<h1>Not Found</h1>")
+
+    def do_GET(self):
+        self._dispatch()
+
+    def do_HEAD(self):
+        self._dispatch()
+
+    def do_POST(self):
+        self._dispatch()
+
+    # ---- 页面 ----
+
+    def handle_home(self):
+        self._page("首页", "<h1>Greasy Fork</h1>")
+
+    def handle_sign_in_page(self, error: str = "", status: int = 200):
+        error_html = f'<div class="alert">{html.escape(error)}</div>' if error else ""
+        self._page("登录", SIGN_IN_FORM.format(locale=self._locale, csrf_token=self._session["csrf_token"], error=error_html), status)
+
+    def handle_sign_in(self):
+        form = self._read_form()
+        if not self._check_csrf(form):
+            return
+        email_value = form.get("user[email]", "")
+        if self.state.users.get(email_value) != form.get("user[password]"):
+            self.handle_sign_in_page("邮箱或密码错误。", status=422)
+            return
+        # 登录后更换会话ID和CSRF令牌
+        with self.state.lock:
+            self.state.sessions.pop(self._session_id, None)
+        self._session_id, self._session = self.state.new_session()
+        self._session["user"] = email_value
+        self._new_session = True
+        self._redirect(f"/{self._locale}")
+
+    def handle_new_script_page(self):
+        if not self._require_login():
+            return
+        self._page("发布新脚本", NEW_SCRIPT_FORM.format(locale=self._locale, csrf_token=self._session["csrf_token"]))
+
+    def handle_create_script(self):
+        if not self._require_login():
+            return
+        form = self._read_form()
+        if not self._check_csrf(form):
+            return
+        code = form.get("script[code]", "")
+        with self.state.lock:
+            script_id = str(self.state.next_script_id)
+            self.state.next_script_id += 1
+        self.state.add_script(script_id, code, form.get("script_version[additional_info][0][attribute_value]", ""), form.get("script[name]", ""))
+        with self.state.lock:
+            self.state.submissions.append({"type": "script", "script_id": script_id, "fields": form})
+        self._redirect(f"/{self._locale}/scripts/{script_id}")
+
+    def handle_script_page(self, script_id: str):
+        script = self.state.scripts.get(script_id)
+        if not script:
+            self._send(404, "<h1>Not Found</h1>")
+            return
+        self._page(script["name"], f'<h2 class="script-name">{html.escape(script["name"])}</h2><dd class="script-show-version">{html.escape(script["version"])}</dd>')
+
+    def handle_code_redirect(self, script_id: str, filename: str):
+        """站点内的代码地址重定向到代码下载地址（Greasy Fork重定向到update.greasyfork.org）"""
+        self._redirect(f"/scripts/{script_id}/{filename}")
+
+    def handle_code(self, script_id: str, filename: str, kind: str):
+        """下载已发布的代码或元数据块，支持If-None-Match和If-Modified-Since"""
+        script = self.state.scripts.get(script_id)
+        if not script:
+            self._send(404, "<h1>Not Found</h1>")
+            return
+        with self.state.lock:
+            code, modified = script["code"], script["modified"]
+        if kind == "meta":
+            match = METADATA_BLOCK_PATTERN.search(code)
+            code = match.group(0) + "\n" if match else ""
+        etag = f'"{hashlib.sha256(code.encode("utf-8")).hexdigest()[:32]}"'
+        headers = {"ETag": etag, "Last-Modified": email.utils.formatdate(int(modified), usegmt=True), "Cache-Control": "no-cache"}
+
+        # If-None-Match优先；没有时才比较If-Modified-Since
+        if_none_match = self.headers.get("If-None-Match")
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_none_match:
+            not_modified = etag in [tag.strip() for tag in if_none_match.split(",")]
+        elif if_modified_since:
+            try:
+                not_modified = int(modified) <= email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                not_modified = False
+        else:
+            not_modified = False
+        if not_modified:
+            self._send(304, "", headers)
+            return
+        self._send(200, code, headers, content_type="text/javascript; charset=utf-8")
+
+    def handle_new_version_page(self, script_id: str):
+        if not self._require_login():
+            return
+        script = self.state.scripts.get(script_id)
+        if not script:
+            self._send(404, "<h1>Not Found</h1>")
+            return
+        self._page("发布新版本", NEW_VERSION_FORM.format(
+            locale=self._locale,
+            script_id=script_id,
+            csrf_token=self._session["csrf_token"],
+            name=html.escape(script["name"]),
+            code=html.escape(script["code"]),
+            additional_info=html.escape(script["additional_info"]),
+        ))
+
+    def handle_create_version(self, script_id: str):
+        if not self._require_login():
+            return
+        form = self._read_form()
+        if not self._check_csrf(form):
+            return
+        script = self.state.scripts.get(script_id)
+        if not script:
+            self._send(404, "<h1>Not Found</h1>")
+            return
+        code = form.get("code_upload") if form.get("code_upload.filename") else form.get("script_version[code]", "")
+        if not code or not _extract_version(code):
+            self._page("发布新版本", '<div class="validation-errors">代码中缺少@version。</div>', status=422)
+            return
+        with self.state.lock:
+            script["versions"].append({"version": script["version"], "code": script["code"]})
+            script["code"] = code
+            script["version"] = _extract_version(code)
+            script["additional_info"] = form.get("script_version[additional_info][0][attribute_value]", script["additional_info"])
+            script["modified"] = time.time()
+            self.state.submissions.append({"type": "version", "script_id": script_id, "fields": form})
+        self._redirect(f"/{self._locale}/scripts/{script_id}")
+
+class MockGreasyForkServer(ThreadingHTTPServer):
+    """模拟Greasy Fork服务器"""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], username: str = "test@example.com", password: str = "secret", verbose: bool = False, latency: float = 0):
+        super().__init__(address, MockGreasyForkHandler)
+        self.state = MockGreasyForkState(username, password)
+        self.verbose = verbose
+        # 每个请求额外的延迟（秒）
+        self.latency = latency
+
+    @property
+    def base_url(self) -> str:
+        """上传工具使用的站点地址（包含语言路径）"""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/zh-CN"
+
+def start_mock_server(port: int = 0, username: str = "test@example.com", password: str = "secret", verbose: bool = False, latency: float = 0) -> MockGreasyForkServer:
+    """在后台线程中启动模拟服务器，port为0时自动选择空闲端口"""
+    server = MockGreasyForkServer(("127.0.0.1", port), username, password, verbose, latency)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Greasy Fork本地模拟服务器")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口（默认8765）")
+    parser.add_argument("--user", default="test@example.com", help="可登录的用户邮箱")
+    parser.add_argument("--password", default="secret", help="可登录的用户密码")
+    parser.add_argument("--script", action="append", default=[], metavar="ID", help="预先创建的脚本ID，可多次指定")
+    parser.add_argument("--latency-ms", type=float, default=0, help="每个请求额外的延迟，单位毫秒（模拟网络往返）")
+    args = parser.parse_args()
+
+    server = MockGreasyForkServer(("127.0.0.1", args.port), args.user, args.password, verbose=True, latency=args.latency_ms / 1000)
+    for script_id in args.script or ["1"]:
+        server.state.add_script(script_id, f"// ==UserScript==\n// @name 脚本{script_id}\n// @version 0.1\n// ==/UserScript==\n")
+    print(f"模拟Greasy Fork服务器已启动: {server.base_url}")
+    print(f"登录账号: {args.user} / {args.password}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+"""测试共用的fixture：加载上传工具并把所有状态文件指向临时目录，启动模拟服务器"""
+
+import os
+import sys
+import json
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "benchmarks"))
+
+from bench_common import load_uploader, isolate_state
+
+USERNAME = "test@example.com"
+PASSWORD = "secret"
+
+@pytest.fixture
+def uploader(tmp_path):
+    """每个测试使用新加载的上传工具，配置、会话和缓存都写在tmp_path/state下"""
+    module = load_uploader()
+    state_dir = tmp_path / "state"
+    state_dir.mkdir()
+    isolate_state(module, str(state_dir))
+    return module
+
+@pytest.fixture
+def mock_server():
+    """后台运行的模拟Greasy Fork服务器"""
+    from greasyfork_mock_server import start_mock_server
+    server = start_mock_server()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def site(uploader, mock_server):
+    """上传工具指向模拟服务器，不限速、不检查远程版本"""
+    uploader.GREASYFORK_URL = mock_server.base_url
+    uploader.POST_RATE_LIMITER.min_interval = 0
+    uploader.REMOTE_CHECK = False
+    return uploader, mock_server
+
+def publish(server, script_id: str, version: str = "0.9") -> None:
+    """在模拟服务器上放入一个已发布的脚本"""
+    server.state.add_script(script_id, f"// ==UserScript==\n// @name 脚本{script_id}\n// @version {version}\n// ==/UserScript==\n")
+
+def load_fingerprint_file(uploader):
+    with open(uploader.FINGERPRINT_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+def write_script(path, version: str = "1.0", name: str = "测试脚本", body: str = "console.log('test');\n") -> str:
+    """写入一个最小的油猴脚本，返回路径字符串"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(f"// ==UserScript==\n// @name {name}\n// @version {version}\n// @match *://example.com/*\n// ==/UserScript==\n{body}", encoding="utf-8")
+    return str(path)
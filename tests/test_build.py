@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+
+"""构建阶段的保守压缩（strip_js）"""
+
+import time
+
+import pytest
+
+@pytest.mark.parametrize("source", [
+    "r = i++ / 2 + '/// keep';\n",
+    "r = x-- / y + '/// keep';\n",
+    "r = a[i]++ / 2 + '/// keep';\n",
+    "r = f(x)-- / 2 + '/// keep';\n",
+])
+def test_division_after_postfix_operator(uploader, source):
+    # 如果把/当成正则表达式，字符串中的///会被当成注释删除
+    assert uploader.strip_js(source) == source
+
+def test_prefix_operator_keeps_operand_rules(uploader):
+    assert uploader.strip_js("a = b + ++c / 2 + '/// keep';\n") == "a = b + ++c / 2 + '/// keep';\n"
+
+def test_regex_after_keyword_and_operator(uploader):
+    source = "function f(s) {\n    // 注释\n    if (typeof /x/ === 'object') return /a\\/b+/g.test(s) + 1;\n    return s.split(/,/) / 2;\n}\n"
+    assert uploader.strip_js(source) == "function f(s) {\nif (typeof /x/ === 'object') return /a\\/b+/g.test(s) + 1;\nreturn s.split(/,/) / 2;\n}\n"
+
+def test_identifier_containing_keyword_is_not_keyword(uploader):
+    # returnValue不是return，之后的/是除号
+    assert uploader.strip_js("x = returnValue / 2 + '/// keep';\n") == "x = returnValue / 2 + '/// keep';\n"
+
+def test_large_bundle_is_linear(uploader):
+    # 每个/都重新拼接已扫描的代码时，这样的文件需要几十秒
+    source = "    total = total / count + offset; // 注释\n" * 20000
+    start = time.perf_counter()
+    output = uploader.strip_js(source)
+    assert time.perf_counter() - start < 5
+    assert output == "total = total / count + offset;\n" * 20000
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+"""守护进程工作线程（_daemon_serve_jobs）：每个任务都要返回结果，出错后继续处理后续任务"""
+
+import io
+import queue
+import threading
+
+def run_jobs(uploader, requests):
+    """在工作线程中依次处理requests，返回每个任务的最终结果"""
+    jobs = queue.Queue()
+    output = uploader.DaemonOutput(io.StringIO())
+    worker = threading.Thread(target=uploader._daemon_serve_jobs, args=("worker-1", object(), jobs, output), daemon=True)
+    worker.start()
+
+    results = []
+    for request in requests:
+        events = queue.Queue()
+        jobs.put((request, events))
+        while True:
+            # 没有结果时客户端会一直等待，这里用超时代替
+            event = events.get(timeout=10)
+            if event["type"] == "result":
+                results.append(event)
+                break
+    jobs.put(None)
+    worker.join(timeout=10)
+    assert not worker.is_alive()
+    return results
+
+def test_bad_script_path_returns_error_and_worker_survives(uploader, tmp_path, monkeypatch):
+    monkeypatch.setitem(uploader.DAEMON_HANDLERS, "ping_context", lambda context, request: {"ok": True})
+    missing = str(tmp_path / "missing.user.js")
+    results = run_jobs(uploader, [
+        {"action": "update", "script_id": "1", "script_path": missing},
+        {"action": "create", "script_path": missing},
+        {"action": "ping_context"},
+    ])
+    assert [result["ok"] for result in results] == [False, False, True]
+    assert "missing.user.js" in results[0]["error"]
+    assert "missing.user.js" in results[1]["error"]
+
+def test_system_exit_in_handler_ends_only_that_job(uploader, monkeypatch):
+    def exit_handler(context, request):
+        raise SystemExit(1)
+    monkeypatch.setitem(uploader.DAEMON_HANDLERS, "exit", exit_handler)
+    monkeypatch.setitem(uploader.DAEMON_HANDLERS, "ping_context", lambda context, request: {"ok": True})
+    results = run_jobs(uploader, [{"action": "exit"}, {"action": "exit"}, {"action": "ping_context"}])
+    assert [result["ok"] for result in results] == [False, False, True]
+    assert results[0]["error"] == "已退出 (状态 1)"
+
+def test_progress_is_forwarded_before_result(uploader, monkeypatch):
+    def noisy_handler(context, request):
+        print("正在填写")
+        return {"ok": True}
+    monkeypatch.setitem(uploader.DAEMON_HANDLERS, "noisy", noisy_handler)
+    jobs = queue.Queue()
+    output = uploader.DaemonOutput(io.StringIO())
+    monkeypatch.setattr(uploader.sys, "stdout", output)
+    worker = threading.Thread(target=uploader._daemon_serve_jobs, args=("worker-1", object(), jobs, output), daemon=True)
+    worker.start()
+    events = queue.Queue()
+    jobs.put(({"action": "noisy"}, events))
+    received = [events.get(timeout=10)]
+    while received[-1]["type"] != "result":
+        received.append(events.get(timeout=10))
+    jobs.put(None)
+    worker.join(timeout=10)
+    assert "".join(event["text"] for event in received[:-1]) == "正在填写\n"
+    assert received[-1] == {"type": "result", "ok": True}
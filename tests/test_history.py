@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+"""上传历史：只读命令不导入旧版Markdown表格，写入时才导入"""
+
+import os
+
+from conftest import write_script
+
+LEGACY_MARKDOWN = """# 脚本上传历史记录
+
+## 上传记录
+
+| 日期 | 时间 | 脚本名称 | 脚本ID | 版本号 | 操作类型 | 备注 |
+|------|------|---------|-------|------|---------|------|
+| 2024-05-02 | 10:00 | 旧脚本 | 123 | 1.1 | 更新 | |
+| 2024-05-01 | 09:00 | 旧脚本 | 123 | 1.0 | 新建 | |
+"""
+
+def write_legacy(uploader):
+    with open(uploader.UPLOAD_HISTORY_FILE, "w", encoding="utf-8") as f:
+        f.write(LEGACY_MARKDOWN)
+
+def test_read_commands_do_not_migrate(uploader, capsys):
+    write_legacy(uploader)
+    uploader.command_status([])
+    uploader.command_history([])
+    assert uploader.query_upload_history("123") == []
+    assert not os.path.exists(uploader.UPLOAD_HISTORY_STORE)
+    with open(uploader.UPLOAD_HISTORY_FILE, encoding="utf-8") as f:
+        assert f.read() == LEGACY_MARKDOWN
+    assert "上传历史记录: 0 条" in capsys.readouterr().out
+
+def test_missing_store_is_empty_history(uploader):
+    assert uploader.read_upload_history() == []
+    assert uploader.get_last_upload("123") is None
+    assert not os.path.exists(uploader.UPLOAD_HISTORY_STORE)
+
+def test_recording_upload_migrates_legacy_history(uploader, tmp_path):
+    write_legacy(uploader)
+    script = write_script(tmp_path / "旧脚本.user.js", version="1.2")
+    uploader.record_upload_history(script, "123", "更新")
+    assert [record["version"] for record in uploader.query_upload_history("123")] == ["1.2", "1.1", "1.0"]
+
+def test_markdown_export_migrates_first(uploader):
+    write_legacy(uploader)
+    assert uploader.export_history_markdown() == 2
+    assert [record["version"] for record in uploader.read_upload_history()] == ["1.1", "1.0"]
+    with open(uploader.UPLOAD_HISTORY_FILE, encoding="utf-8") as f:
+        assert "| 2024-05-02 | 10:00 | 旧脚本 | 123 | 1.1 | 更新 |" in f.read()
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+"""HTTP提交引擎（http_login / http_fill_version / http_batch_update）与模拟服务器"""
+
+import threading
+
+from conftest import USERNAME, PASSWORD, publish, load_fingerprint_file, write_script
+
+def test_login_with_form_then_reuses_session(site):
+    uploader, server = site
+    assert uploader.http_login(uploader.GreasyForkHttpSession(), USERNAME, PASSWORD)
+    assert server.state.requests.get("POST /zh-CN/users/sign_in") == 1
+
+    # 第二个会话从保存的Cookie恢复，不再提交登录表单
+    assert uploader.http_login(uploader.GreasyForkHttpSession(), USERNAME, PASSWORD)
+    assert server.state.requests.get("POST /zh-CN/users/sign_in") == 1
+
+def test_login_with_wrong_password(site):
+    uploader, server = site
+    assert not uploader.http_login(uploader.GreasyForkHttpSession(), USERNAME, "wrong")
+
+def test_fill_version_prepares_then_submits(site, tmp_path):
+    uploader, server = site
+    publish(server, "101")
+    metadata, content = uploader.extract_metadata(write_script(tmp_path / "a.user.js", version="1.0"))
+    session = uploader.GreasyForkHttpSession()
+    assert uploader.http_login(session, USERNAME, PASSWORD)
+
+    # 未指定submit时只获取并填写表单
+    assert not uploader.http_fill_version(session, "101", metadata, content, "# 说明", submit=False)
+    assert server.state.submissions == []
+
+    assert uploader.http_fill_version(session, "101", metadata, content, "# 说明", submit=True)
+    script = server.state.scripts["101"]
+    assert script["code"] == content
+    assert script["version"] == "1.0"
+    assert script["additional_info"] == "# 说明"
+
+def test_batch_update_submits_all_and_records_fingerprints(site, tmp_path):
+    uploader, server = site
+    jobs = []
+    for index in range(8):
+        script_id = str(200 + index)
+        publish(server, script_id)
+        jobs.append({"script_id": script_id, "script_path": write_script(tmp_path / f"s{index}" / "s.user.js", name=f"脚本{script_id}", version="1.0")})
+
+    results = []
+    submitted = uploader.http_batch_update(jobs, concurrency=4, submit=True, username=USERNAME, password=PASSWORD,
+                                           on_result=lambda job, state, error=None: results.append((job["script_id"], state)))
+    assert sorted(job["script_id"] for job in submitted) == sorted(job["script_id"] for job in jobs)
+    assert sorted(results) == sorted((job["script_id"], "done") for job in jobs)
+    assert all(server.state.scripts[job["script_id"]]["version"] == "1.0" for job in jobs)
+    # 并发完成的任务都要记录指纹，否则下次运行会重复上传
+    assert set(load_fingerprint_file(uploader)) == {job["script_id"] for job in jobs}
+
+    # 再次运行时所有脚本都没有变化
+    assert uploader.http_batch_update(jobs, concurrency=4, submit=True, username=USERNAME, password=PASSWORD) == []
+    assert len(server.state.submissions) == len(jobs)
+
+def test_batch_update_without_submit_prepares_only(site, tmp_path):
+    uploader, server = site
+    publish(server, "300")
+    jobs = [{"script_id": "300", "script_path": write_script(tmp_path / "a.user.js")}]
+    results = []
+    assert uploader.http_batch_update(jobs, submit=False, username=USERNAME, password=PASSWORD,
+                                      on_result=lambda job, state, error=None: results.append(state)) == []
+    assert results == ["prepared"]
+    assert server.state.submissions == []
+
+def test_concurrent_record_fingerprint_keeps_every_entry(uploader):
+    fingerprint = {"code": "c", "readme": "r", "name": "n", "description": "d", "version": "1"}
+    threads = [threading.Thread(target=uploader.record_fingerprint, args=(str(index), fingerprint)) for index in range(32)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert set(load_fingerprint_file(uploader)) == {str(index) for index in range(32)}
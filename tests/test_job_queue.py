@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+"""持久化任务队列（UploadJobQueue / run_job_queue）与模拟服务器"""
+
+import json
+
+from conftest import USERNAME, PASSWORD, publish, load_fingerprint_file, write_script
+
+def make_jobs(server, tmp_path, count: int):
+    jobs = []
+    for index in range(count):
+        script_id = str(500 + index)
+        publish(server, script_id)
+        jobs.append({"script_id": script_id, "script_path": write_script(tmp_path / f"s{index}" / "s.user.js", name=f"脚本{script_id}", version="1.0")})
+    return jobs
+
+def test_queue_is_written_to_redirected_path(uploader, tmp_path):
+    job_queue = uploader.UploadJobQueue.create([{"script_id": "1", "script_path": str(tmp_path / "a.user.js")}], {})
+    assert job_queue.path == uploader.JOB_QUEUE_FILE
+    assert uploader.UploadJobQueue.load().jobs[0]["script_id"] == "1"
+
+def test_concurrent_queue_records_every_fingerprint(site, tmp_path):
+    uploader, server = site
+    jobs = make_jobs(server, tmp_path, 10)
+    job_queue = uploader.UploadJobQueue.create(jobs, {"engine": "http", "concurrency": 5, "submit": True})
+    uploader.run_job_queue(job_queue, username=USERNAME, password=PASSWORD)
+
+    assert job_queue.counts() == {"done": len(jobs)}
+    with open(uploader.JOB_QUEUE_FILE, encoding="utf-8") as f:
+        assert all(job["state"] == "done" for job in json.load(f)["jobs"])
+    assert set(load_fingerprint_file(uploader)) == {job["script_id"] for job in jobs}
+
+    # 所有指纹都已保存，再次运行时全部跳过
+    job_queue = uploader.UploadJobQueue.create(jobs, {"engine": "http", "concurrency": 5, "submit": True})
+    uploader.run_job_queue(job_queue, username=USERNAME, password=PASSWORD)
+    assert job_queue.counts() == {"skipped": len(jobs)}
+    assert len(server.state.submissions) == len(jobs)
+
+def test_resume_runs_only_unfinished_jobs(site, tmp_path):
+    uploader, server = site
+    jobs = make_jobs(server, tmp_path, 3)
+    job_queue = uploader.UploadJobQueue.create(jobs, {"engine": "http", "concurrency": 2, "submit": True})
+    # 模拟上次运行在第一个任务完成、第二个任务执行中时崩溃
+    job_queue.update(job_queue.jobs[0], state="done")
+    job_queue.update(job_queue.jobs[1], state="running", attempts=1)
+
+    resumed = uploader.UploadJobQueue.load()
+    assert [job["state"] for job in resumed.jobs] == ["done", "pending", "pending"]
+    uploader.run_job_queue(resumed, username=USERNAME, password=PASSWORD)
+    assert resumed.counts() == {"done": 3}
+    assert sorted(submission["script_id"] for submission in server.state.submissions) == ["501", "502"]
+
+def test_missing_script_fails_without_stopping_queue(site, tmp_path):
+    uploader, server = site
+    jobs = make_jobs(server, tmp_path, 2)
+    jobs.insert(1, {"script_id": "599", "script_path": str(tmp_path / "missing.user.js")})
+    job_queue = uploader.UploadJobQueue.create(jobs, {"engine": "http", "concurrency": 2, "submit": True})
+    uploader.run_job_queue(job_queue, username=USERNAME, password=PASSWORD)
+
+    # 文件不存在不可重试，只尝试一次，其余任务照常完成
+    assert [job["state"] for job in job_queue.jobs] == ["done", "failed", "done"]
+    assert job_queue.jobs[1]["attempts"] == 1
+    assert "missing.user.js" in job_queue.jobs[1]["error"]
+
+    # --resume时没有未完成的任务
+    assert uploader.UploadJobQueue.load().unfinished() == []
+
+def test_unbuildable_script_fails_in_browser_batch(uploader, tmp_path):
+    # 浏览器引擎也在启动浏览器之前读取脚本，失败的任务不会让batch_update退出
+    uploader.BUILD_OPTIONS = {"inline": False, "minify": True}
+    jobs = [{"script_id": "1", "script_path": write_script(tmp_path / "a.user.js")},
+            {"script_id": "2", "script_path": str(tmp_path / "missing.user.js")}]
+    results = []
+    assert uploader.batch_update(jobs, on_result=lambda job, state, error=None: results.append((job["script_id"], state, type(error).__name__))) == []
+    assert results == [("1", "failed", "BuildError"), ("2", "failed", "FileNotFoundError")]
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+"""更新前的预检（Preflight）：登录会话和已发布版本的检查只在需要上传时进行，并与浏览器启动重叠"""
+
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from conftest import write_script
+
+class FakeBrowser:
+    def __init__(self):
+        self.closed = False
+
+    def new_context(self, **kwargs):
+        raise AssertionError("已发布的版本相同时不应打开页面")
+
+    def close(self):
+        self.closed = True
+
+@pytest.fixture
+def fake_browser(site, monkeypatch):
+    """替换Playwright和浏览器启动，launch_browser在返回前记录已发布版本的请求数"""
+    uploader, server = site
+    launched = []
+
+    @contextmanager
+    def fake_sync_playwright():
+        yield object()
+
+    def fake_launch_browser(p, chrome_path):
+        # 等待后台的远程检查发出请求，证明它与浏览器启动同时进行
+        deadline = time.monotonic() + 5
+        while not any(key.endswith(".meta.js") for key in server.state.requests) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        browser = FakeBrowser()
+        launched.append((browser, dict(server.state.requests)))
+        return browser
+
+    monkeypatch.setattr(uploader, "sync_playwright", fake_sync_playwright)
+    monkeypatch.setattr(uploader, "launch_browser", fake_launch_browser)
+    monkeypatch.setattr(uploader, "resolve_chrome_path", lambda path: "chrome")
+    return launched
+
+def test_unchanged_script_starts_no_network_checks(site, tmp_path, fake_browser, monkeypatch):
+    uploader, server = site
+    uploader.REMOTE_CHECK = True
+    script = write_script(tmp_path / "a.user.js")
+    metadata, content = uploader.extract_metadata(script)
+    uploader.record_fingerprint("900", uploader.compute_fingerprint(metadata, content, ""))
+
+    started = []
+    monkeypatch.setattr(uploader.Preflight, "start_session_check", lambda self: started.append("session"))
+    monkeypatch.setattr(uploader.Preflight, "start_drift_check", lambda self, *args: started.append("drift"))
+
+    assert uploader.update_script("900", script) is False
+    assert started == []
+    assert fake_browser == []
+    assert server.state.requests == {}
+
+def test_drift_check_overlaps_browser_launch(site, tmp_path, fake_browser):
+    uploader, server = site
+    uploader.REMOTE_CHECK = True
+    script = write_script(tmp_path / "a.user.js")
+    with open(script, encoding="utf-8") as f:
+        server.state.add_script("900", f.read())
+
+    # 本地指纹没有记录，需要上传；已发布的代码相同，浏览器启动后不再打开页面
+    assert uploader.update_script("900", script) is False
+    assert len(fake_browser) == 1
+    browser, requests_at_launch = fake_browser[0]
+    assert any(key.endswith(".meta.js") for key in requests_at_launch)
+    assert browser.closed
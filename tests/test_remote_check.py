@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+"""更新前的远程版本检查（RemoteScriptChecker / check_remote_drift）与模拟服务器"""
+
+import os
+
+import pytest
+
+from conftest import load_fingerprint_file
+
+def make_script(version: str, body: str = "console.log('v');\n") -> str:
+    return f"// ==UserScript==\n// @name 远程脚本\n// @description 说明\n// @version {version}\n// ==/UserScript==\n{body}"
+
+@pytest.fixture
+def remote(site):
+    """开启远程检查，模拟服务器上已发布版本1.0"""
+    uploader, server = site
+    uploader.REMOTE_CHECK = True
+    server.state.add_script("900", make_script("1.0"))
+    return uploader, server
+
+def local(uploader, version: str, body: str = "console.log('v');\n", readme: str = ""):
+    """返回check_remote_drift需要的(元数据, 内容, README, 指纹)"""
+    content = make_script(version, body)
+    metadata = {"name": "远程脚本", "description": "说明", "version": version}
+    return metadata, content, readme, uploader.compute_fingerprint(metadata, content, readme)
+
+def code_requests(server, kind: str) -> int:
+    return server.state.requests.get(f"GET /scripts/900/script.{kind}.js", 0)
+
+def test_200_then_etag_304(remote):
+    uploader, server = remote
+    metadata, content, *_ = local(uploader, "1.0")
+
+    checker = uploader.RemoteScriptChecker()
+    assert checker.check("900", metadata, content)["status"] == "current"
+    assert checker.not_modified == 0
+    checker.save()
+    assert os.path.exists(uploader.REMOTE_CACHE_FILE)
+    assert code_requests(server, "meta") == 1 and code_requests(server, "user") == 1
+
+    # 新的检查器从缓存文件读取ETag，直接请求上次重定向到的地址，服务器返回304
+    checker = uploader.RemoteScriptChecker()
+    assert checker.check("900", metadata, content)["status"] == "current"
+    assert checker.not_modified == 2
+    assert checker.requests == 2
+    assert code_requests(server, "meta") == 2 and code_requests(server, "user") == 2
+
+def test_changed_remote_returns_200_again(remote):
+    uploader, server = remote
+    metadata, content, *_ = local(uploader, "1.0")
+    checker = uploader.RemoteScriptChecker()
+    assert checker.check("900", metadata, content)["status"] == "current"
+
+    server.state.add_script("900", make_script("1.1"))
+    result = checker.check("900", metadata, content)
+    assert result == {"remote_version": "1.1", "status": "regression"}
+    assert checker.not_modified == 0
+
+def test_newer_remote_refuses_update(remote):
+    uploader, server = remote
+    server.state.add_script("900", make_script("2.0"))
+    metadata, content, readme, fingerprint = local(uploader, "1.5")
+    assert uploader.RemoteScriptChecker().check("900", metadata, content)["status"] == "regression"
+    assert not uploader.check_remote_drift("900", metadata, content, readme, fingerprint)
+    # --force时只警告
+    assert uploader.check_remote_drift("900", metadata, content, readme, fingerprint, force=True)
+
+def test_same_version_different_code_continues(remote):
+    uploader, server = remote
+    metadata, content, readme, fingerprint = local(uploader, "1.0", body="console.log('changed');\n")
+    assert uploader.RemoteScriptChecker().check("900", metadata, content)["status"] == "unbumped"
+    assert uploader.check_remote_drift("900", metadata, content, readme, fingerprint)
+
+def test_local_newer_continues(remote):
+    uploader, server = remote
+    metadata, content, readme, fingerprint = local(uploader, "1.1")
+    assert uploader.RemoteScriptChecker().check("900", metadata, content)["status"] == "outdated"
+    assert uploader.check_remote_drift("900", metadata, content, readme, fingerprint)
+    # 不需要下载完整代码
+    assert code_requests(server, "user") == 0
+
+def test_current_version_skips_and_records_fingerprint(remote):
+    uploader, server = remote
+    metadata, content, readme, fingerprint = local(uploader, "1.0")
+    assert not uploader.check_remote_drift("900", metadata, content, readme, fingerprint)
+    assert "900" in load_fingerprint_file(uploader)
+    assert uploader.get_changed_fields("900", fingerprint) == []
+
+def test_current_code_with_readme_continues(remote):
+    uploader, server = remote
+    metadata, content, readme, fingerprint = local(uploader, "1.0", readme="# 新的说明")
+    # 附加信息无法通过代码地址获取，README有变化时仍然更新
+    assert uploader.check_remote_drift("900", metadata, content, readme, fingerprint)
+
+def test_unknown_script_continues(remote):
+    uploader, server = remote
+    metadata, content, readme, fingerprint = local(uploader, "1.0")
+    assert uploader.RemoteScriptChecker().check("404", metadata, content)["status"] == "unknown"
+    assert uploader.check_remote_drift("404", metadata, content, readme, fingerprint)
+
+def test_published_download_urls_are_ignored(remote):
+    uploader, server = remote
+    # Greasy Fork在发布的代码中替换@downloadURL/@updateURL
+    published = make_script("1.0").replace("// ==/UserScript==", "// @downloadURL https://update.greasyfork.org/scripts/900/script.user.js\n// ==/UserScript==")
+    server.state.add_script("900", published)
+    metadata, content, *_ = local(uploader, "1.0")
+    assert uploader.RemoteScriptChecker().check("900", metadata, content)["status"] == "current"
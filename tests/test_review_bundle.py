@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+"""无头审核包（save_review_bundle / approve_review_bundles）"""
+
+import os
+
+from conftest import USERNAME, PASSWORD, write_script
+
+PUBLISHED = "// ==UserScript==\n// @name 脚本700\n// @version 0.9\n// ==/UserScript==\nconsole.log('old');\n"
+
+class UploadedPage:
+    """用upload方式注入代码后的页面：代码在文件输入框中，代码编辑框里仍是已发布的代码"""
+
+    def __init__(self, readme: str):
+        self.fields = {
+            "code": {"name": "script_version[code]", "value": PUBLISHED},
+            "changelog": {"name": "script_version[changelog]", "value": "更新到版本 1.0"},
+            "additional_info": {"name": "script_version[additional_info][0][attribute_value]", "value": readme},
+        }
+
+    def screenshot(self, path, full_page=False):
+        with open(path, "wb") as f:
+            f.write(b"png")
+
+def test_bundle_records_uploaded_code_not_textarea(site, tmp_path, monkeypatch):
+    uploader, server = site
+    server.state.add_script("700", PUBLISHED)
+    metadata, content = uploader.extract_metadata(write_script(tmp_path / "a.user.js", name="脚本700", version="1.0"))
+    page = UploadedPage("# 说明")
+    monkeypatch.setattr(uploader, "read_form_values", lambda page, form_key: {field: dict(item) for field, item in page.fields.items()})
+
+    baseline = {"code": {"name": "script_version[code]", "value": PUBLISHED}}
+    path = uploader.save_review_bundle(page, "update", str(tmp_path / "a.user.js"), metadata, content, {"code": "x"}, script_id="700", baseline=baseline)
+
+    with open(os.path.join(path, "code.js"), encoding="utf-8") as f:
+        assert f.read() == content
+    with open(os.path.join(path, "diff.txt"), encoding="utf-8") as f:
+        assert "+// @version 1.0" in f.read()
+
+    bundles = uploader.load_review_bundles("pending")
+    assert uploader.approve_review_bundles(bundles, USERNAME, PASSWORD) == 1
+    assert server.state.scripts["700"]["code"] == content
+    assert server.state.scripts["700"]["version"] == "1.0"
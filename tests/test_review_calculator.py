@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+"""亚马逊评论批量计算器（review_calculator）：与油猴脚本中的公式结果一致，CSV按块读取"""
+
+import os
+import sys
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, "亚马逊差评计算器"))
+
+import review_calculator
+
+TARGETS = [4, 4.3, 4.5, 5]
+
+# 各星级数量（5星到1星）、页面上的总评论数，以及在node中运行脚本里
+# calculateWeightedAverage()和calculateRequiredReviews()得到的[平均分, 各目标所需的好评数]
+JS_CASES = [
+    ([10, 2, 1, 0, 3], 16, [4, 0, 7, 16, 16]),
+    # 已达到目标时为0；目标为5时脚本用 ceil(总评论数 * (5 - 当前评分))，浮点误差下为1
+    ([9, 1, 0, 0, 0], 10, [4.9, 0, 0, 0, 1]),
+    ([5, 0, 0, 0, 0], 5, [5, 0, 0, 0, 0]),
+    ([0, 0, 0, 0, 0], 0, [0, 0, 0, 0, 0]),
+    ([3, 0, 0, 0, 1], 4, [4, 0, 2, 4, 4]),
+    # 页面上的总评论数与各星级之和不同
+    ([120, 30, 10, 5, 35], 250, [3.975, 7, 117, 263, 257]),
+    ([0, 0, 0, 0, 7], 7, [1, 21, 33, 49, 28]),
+]
+
+def test_matches_userscript_formulas():
+    counts = np.array([case[0] for case in JS_CASES])
+    totals = np.array([case[1] for case in JS_CASES])
+    result = review_calculator.calculate(counts, TARGETS, totals)
+    assert result["average"].tolist() == [case[2][0] for case in JS_CASES]
+    assert result["required"].tolist() == [case[2][1:] for case in JS_CASES]
+
+def test_target_five_unreachable_uses_script_formula():
+    # 已有非五星评价时平均分永远达不到5，脚本仍返回抵消非五星评价所需的数量，这里保持一致
+    result = review_calculator.calculate(np.array([[10, 2, 1, 0, 3]]), [5])
+    assert result["required"].tolist() == [[16]]
+    # 目标超出范围时与getTargetScore()一样限制到5
+    assert review_calculator.calculate(np.array([[10, 2, 1, 0, 3]]), [7])["required"].tolist() == [[16]]
+
+def test_csv_chunks(tmp_path):
+    path = tmp_path / "ratings.csv"
+    # 列顺序与STAR_COLUMNS不同，ASIN带引号和逗号，空行跳过
+    path.write_text('one_star,ASIN,5_star,four_star,three_star,two_star,total_reviews\n'
+                    '3,"B01,X",10,2,1,0,16\n\n'
+                    '0,B02,9,1,0,0,10\n'
+                    '35,B03,120,30,10,5,250\n', encoding="utf-8")
+    chunks = list(review_calculator.iter_csv_chunks(str(path), chunk_rows=2))
+    assert [len(asins) for asins, _, _ in chunks] == [1, 2]
+    asins = np.concatenate([chunk[0] for chunk in chunks])
+    counts = np.concatenate([chunk[1] for chunk in chunks])
+    totals = np.concatenate([chunk[2] for chunk in chunks])
+    assert asins.tolist() == ["B01,X", "B02", "B03"]
+    assert counts.tolist() == [[10, 2, 1, 0, 3], [9, 1, 0, 0, 0], [120, 30, 10, 5, 35]]
+    assert totals.tolist() == [16, 10, 250]
+
+def test_process_file(tmp_path):
+    input_path = tmp_path / "ratings.csv"
+    input_path.write_text("asin,five_star,four_star,three_star,two_star,one_star\nB01,10,2,1,0,3\nB02,0,0,0,0,0\n", encoding="utf-8")
+    output_path = tmp_path / "result.csv"
+    assert review_calculator.process_file(str(input_path), [4.3, 5], str(output_path)) == 2
+    assert output_path.read_text(encoding="utf-8").splitlines() == [
+        "asin,total_reviews,average,required_4.3,required_5",
+        "B01,16,4.0,7,16",
+        "B02,0,0.0,0,0",
+    ]
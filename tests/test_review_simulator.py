@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+"""亚马逊评分走势模拟（review_simulator）：固定随机数种子的轨迹和分位数结果"""
+
+import os
+import sys
+import subprocess
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CALCULATOR_DIR = os.path.join(ROOT_DIR, "亚马逊差评计算器")
+SIMULATOR = os.path.join(CALCULATOR_DIR, "review_simulator.py")
+sys.path.insert(0, CALCULATOR_DIR)
+
+import review_simulator
+
+# 改进后的新评价分布（5星到1星）
+IMPROVED = np.array([0.8, 0.1, 0.04, 0.02, 0.04])
+
+COUNTS = np.array([[10, 2, 1, 0, 3], [0, 0, 0, 0, 1], [40, 10, 5, 5, 20]])
+TARGETS = np.array([4.3, 4.5])
+
+def test_all_five_star_trajectory_is_exact():
+    # 只有五星新评价时每条轨迹都相同：一条一星评价需要3条五星才能达到4分
+    counts = np.array([[0, 0, 0, 0, 1], [3, 0, 0, 0, 1]])
+    distributions = np.broadcast_to(np.array([1.0, 0, 0, 0, 0]), (2, 1, 5))
+    passage = review_simulator.simulate_passage(counts, distributions, np.array([4.0, 5.0]), 3, 1000, np.random.default_rng(0))
+    assert passage[:, 0, :, 0].tolist() == [[3, 3, 3], [0, 0, 0]]
+    # 已有非五星评价时永远达不到5分
+    assert (passage[:, 0, :, 1] == -1).all()
+
+def test_seeded_trajectories():
+    distributions = review_simulator.build_distributions(COUNTS, [("improved", IMPROVED)])
+    passage = review_simulator.simulate_passage(COUNTS, distributions, TARGETS, 8, 10000, np.random.default_rng(42))
+    assert passage.shape == (3, 2, 8, 2)
+    assert passage[:, 1, :, 0].tolist() == [
+        [20, 7, 7, 13, 7, 9, 7, 12],
+        [5, 5, 9, 19, 9, 8, 21, 29],
+        [252, 288, 173, 203, 196, 153, 156, 232],
+    ]
+    assert passage[:, 1, :, 1].tolist() == [
+        [160, 30, 196, 24, 16, 44, 24, 22],
+        [21, 7, 25, 29, 21, 11, 49, 69],
+        [1160, 866, 444, 832, 708, 470, 548, 598],
+    ]
+    # 商品自身的分布：第一行偶尔达到4.3，只有一星评价的第二行永远达不到
+    assert passage[0, 0, :, 0].tolist() == [-1, -1, -1, -1, 27, 13, -1, -1]
+    assert (passage[1:, 0] == -1).all()
+    # 全部是五星是最好的情况，达到时所需的评价数不会少于公式的结果
+    formula = review_simulator.calculate(COUNTS, TARGETS)["required"]
+    reached = passage >= 0
+    assert (np.where(reached, passage, formula[:, None, None, :]) >= formula[:, None, None, :]).all()
+
+def test_summary_quantiles():
+    passage = np.array([1, 2, 3, -1]).reshape(1, 1, 4, 1)
+    summary = review_simulator.summarize_passage(passage, (5, 50, 95))
+    assert summary["reach"].tolist() == [[[0.75]]]
+    # 没有达到的轨迹按无穷大计入分位数
+    assert summary["quantiles"][:, 0, 0, 0].tolist() == [1, 2, float("inf")]
+
+def run_cli(tmp_path, workers: int) -> str:
+    input_path = tmp_path / "ratings.csv"
+    input_path.write_text("asin,five_star,four_star,three_star,two_star,one_star\nB001,10,2,1,0,3\nB002,0,0,0,0,1\n", encoding="utf-8")
+    result = subprocess.run(
+        [sys.executable, SIMULATOR, str(input_path), "--target", "4.3", "--target", "4.5", "--scenario", "improved=0.8,0.1,0.04,0.02,0.04",
+         "--simulations", "200", "--max-reviews", "2000", "--seed", "7", "--workers", str(workers), "--batch-asins", "1"],
+        cwd=str(tmp_path), capture_output=True, text=True, check=True,
+    )
+    return result.stdout
+
+def test_seeded_percentile_output(tmp_path):
+    output = run_cli(tmp_path, 1)
+    assert output.splitlines() == [
+        "asin,scenario,target,formula,reach_probability,p5,p50,p95",
+        "B001,current,4.3,7,0.1800,7,,",
+        "B001,current,4.5,16,0.0050,,,",
+        "B001,improved,4.3,7,1.0000,7,13,36",
+        "B001,improved,4.5,16,1.0000,18,54,188",
+        "B002,current,4.3,5,0.0000,,,",
+        "B002,current,4.5,7,0.0000,,,",
+        "B002,improved,4.3,5,1.0000,5,8,35",
+        "B002,improved,4.5,7,1.0000,7,15,125",
+    ]
+    # 每批的随机数由种子派生，结果与进程数无关
+    assert run_cli(tmp_path, 2) == output
+
+def test_import_from_other_directory(tmp_path):
+    code = ("import importlib.util; spec = importlib.util.spec_from_file_location('review_simulator', %r); "
+            "module = importlib.util.module_from_spec(spec); spec.loader.exec_module(module); print(module.DEFAULT_SIMULATIONS)" % SIMULATOR)
+    result = subprocess.run([sys.executable, "-c", code], cwd=str(tmp_path), capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == str(review_simulator.DEFAULT_SIMULATIONS)
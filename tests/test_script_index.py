@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+"""油猴脚本索引（refresh_script_index / find_latest_script）"""
+
+import os
+
+from conftest import write_script
+
+def make_project(uploader, tmp_path):
+    project = tmp_path / "project"
+    project.mkdir()
+    uploader.PROJECT_DIR = str(project)
+    return project
+
+def test_quick_lookup_finds_new_script_in_changed_directory(uploader, tmp_path, monkeypatch):
+    project = make_project(uploader, tmp_path)
+    old = write_script(project / "a" / "old.user.js")
+    other = write_script(project / "b" / "other.user.js")
+    os.utime(old, (1000, 1000))
+    os.utime(other, (1000, 1000))
+    for path in (project, project / "a", project / "b"):
+        os.utime(path, (1000, 1000))
+    uploader.refresh_script_index()
+
+    # 只stat目录和修改时间变化的目录中的脚本，只重新列出变化的目录
+    stat_calls = []
+    real_stat = os.stat
+    def record_stat(path, *args, **kwargs):
+        stat_calls.append(str(path))
+        return real_stat(path, *args, **kwargs)
+    scanned = []
+    real_scandir = os.scandir
+    def record_scandir(path):
+        scanned.append(str(path))
+        return real_scandir(path)
+    monkeypatch.setattr(uploader.os, "stat", record_stat)
+    monkeypatch.setattr(uploader.os, "scandir", record_scandir)
+
+    new = write_script(project / "b" / "new.user.js")
+    assert uploader.find_latest_script() == new
+    assert scanned == [str(project / "b")]
+    files = sorted(path for path in stat_calls if path.startswith(str(project)) and path.endswith(".js"))
+    assert files == sorted([new, other])
+    assert set(uploader.load_script_index()["scripts"]) == {old, other, new}
+
+def test_quick_lookup_falls_back_to_scan_without_index(uploader, tmp_path):
+    project = make_project(uploader, tmp_path)
+    script = write_script(project / "a" / "only.user.js")
+    assert uploader.find_latest_script() == script
+
+def test_removed_header_drops_script(uploader, tmp_path):
+    project = make_project(uploader, tmp_path)
+    keep = write_script(project / "a" / "keep.user.js")
+    gone = write_script(project / "a" / "gone.user.js")
+    os.utime(keep, (1000, 1000))
+    index = uploader.refresh_script_index()
+    assert set(index["scripts"]) == {keep, gone}
+
+    # 删除元数据块，但保持目录修改时间不变（只改文件内容不会改变目录的mtime）
+    with open(gone, "w", encoding="utf-8") as f:
+        f.write("console.log('not a userscript');\n")
+    index = uploader.refresh_script_index()
+    assert set(index["scripts"]) == {keep}
+    assert index["dirs"][str(project / "a")]["files"] == ["keep.user.js"]
+    assert index["latest"] == keep
+
+def test_quick_lookup_drops_deleted_script(uploader, tmp_path):
+    project = make_project(uploader, tmp_path)
+    keep = write_script(project / "a" / "keep.user.js")
+    gone = write_script(project / "a" / "gone.user.js")
+    os.utime(keep, (1000, 1000))
+    os.utime(project / "a", (1000, 1000))
+    assert uploader.refresh_script_index()["latest"] == gone
+
+    os.remove(gone)
+    assert uploader.find_latest_script() == keep
+    index = uploader.load_script_index()
+    assert gone not in index["scripts"]
+    assert index["dirs"][str(project / "a")]["files"] == ["keep.user.js"]
+
+def test_new_script_found_by_full_refresh(uploader, tmp_path):
+    project = make_project(uploader, tmp_path)
+    old = write_script(project / "a" / "old.user.js")
+    os.utime(old, (1000, 1000))
+    uploader.refresh_script_index()
+
+    new = write_script(project / "c" / "new.user.js")
+    assert uploader.refresh_script_index()["latest"] == new
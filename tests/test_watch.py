@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+
+"""监视模式重新读取文件（reload_watched_files）：读取或构建失败时不能退出监视"""
+
+from conftest import write_script
+
+def test_reload_returns_script_and_readme(uploader, tmp_path):
+    script = write_script(tmp_path / "a.user.js", version="2.0")
+    (tmp_path / "README.md").write_text("# 说明", encoding="utf-8")
+    metadata, content, readme = uploader.reload_watched_files(script)
+    assert metadata["version"] == "2.0"
+    assert content.startswith("// ==UserScript==")
+    assert readme == "# 说明"
+
+def test_reload_survives_missing_file(uploader, tmp_path, capsys):
+    # 编辑器保存时先删除再写入，中间可能短暂不存在
+    assert uploader.reload_watched_files(str(tmp_path / "gone.user.js")) is None
+    assert "等待下一次保存" in capsys.readouterr().out
+
+def test_reload_survives_half_written_file(uploader, tmp_path, capsys):
+    script = tmp_path / "a.user.js"
+    # 多字节字符只写了一半
+    script.write_bytes("// ==UserScript==\n// @name 测试".encode("utf-8")[:-1])
+    assert uploader.reload_watched_files(str(script)) is None
+    assert "读取脚本失败" in capsys.readouterr().out
+
+def test_reload_survives_broken_build(uploader, tmp_path, capsys):
+    uploader.BUILD_OPTIONS = {"inline": False, "minify": True}
+    # 缺少@description，构建时的元数据校验不通过
+    script = write_script(tmp_path / "a.user.js")
+    assert uploader.reload_watched_files(script) is None
+    assert "构建失败" in capsys.readouterr().out
+
+    # 修好之后下一次保存可以正常读取
+    (tmp_path / "a.user.js").write_text("// ==UserScript==\n// @name 测试\n// @description 说明\n// @version 1.1\n// ==/UserScript==\n// 注释\n    console.log(1);\n", encoding="utf-8")
+    metadata, content, _ = uploader.reload_watched_files(script)
+    assert metadata["version"] == "1.1"
+    assert content.endswith("// ==/UserScript==\nconsole.log(1);\n")
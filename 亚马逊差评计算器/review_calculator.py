@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+亚马逊评论批量计算器
+------------------------
+使用与油猴脚本中calculateWeightedAverage()和calculateRequiredReviews()完全相同的公式，
+批量计算整个商品目录每个ASIN的加权平均分，以及达到一个或多个目标评分所需的五星好评数。
+
+输入为CSV或Parquet文件，每行一个ASIN，包含各星级的评价数量（列名见STAR_COLUMNS），
+可选total_reviews列（页面上显示的总评论数，与脚本一样用于计算所需好评数；没有时使用各星级数量之和）。
+文件按块流式读取和写出，几百万行的文件也不需要全部载入内存。
+
+用法:
+    python review_calculator.py ratings.csv --target 4.3 --target 4.5 --target 5 [--output result.csv]
+
+输出列: asin, total_reviews, average, required_<目标评分>...（不指定--output时输出到标准输出）
+"""
+
+import os
+import sys
+import csv
+import time
+import argparse
+import itertools
+from typing import Optional, Dict, List, Iterator, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    print("错误: 请先安装NumPy")
+    print("运行: pip install numpy")
+    sys.exit(1)
+
+# 与油猴脚本一致的默认目标评分
+DEFAULT_TARGET_SCORE = 4.3
+
+# 各星级评价数量的列名（按5星到1星的顺序，与脚本中ratings数组的顺序一致），每个星级接受多种写法
+STAR_COLUMNS = {
+    5: ("five_star", "5_star", "star_5", "stars_5", "5"),
+    4: ("four_star", "4_star", "star_4", "stars_4", "4"),
+    3: ("three_star", "3_star", "star_3", "stars_3", "3"),
+    2: ("two_star", "2_star", "star_2", "stars_2", "2"),
+    1: ("one_star", "1_star", "star_1", "stars_1", "1"),
+}
+ASIN_COLUMNS = ("asin", "ASIN")
+TOTAL_COLUMNS = ("total_reviews", "total")
+
+# 星级权重，顺序与STAR_COLUMNS一致
+STAR_WEIGHTS = np.array([5, 4, 3, 2, 1], dtype=np.int64)
+
+# 每次读取和计算的行数
+DEFAULT_CHUNK_ROWS = 500_000
+
+def clamp_target(score: float) -> float:
+    """与脚本中getTargetScore()一致，把目标评分限制在1-5之间"""
+    return min(5.0, max(1.0, float(score)))
+
+def weighted_average(counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """calculateWeightedAverage()的向量化版本
+
+    counts为(行数, 5)的整数数组，列按5星到1星排列。整数求和在2^53以内是精确的，
+    与脚本中逐项累加的双精度结果相同，之后只做一次除法。
+
+    Returns:
+        (各星级数量之和, 加权平均分)，没有评价的行平均分为0
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    total = counts.sum(axis=1)
+    weighted = counts @ STAR_WEIGHTS
+    average = np.zeros(len(counts), dtype=np.float64)
+    np.divide(weighted, total, out=average, where=total > 0)
+    return total, average
+
+def required_reviews(current: np.ndarray, total_reviews: np.ndarray, targets: Sequence[float]) -> np.ndarray:
+    """calculateRequiredReviews()的向量化版本，一次计算所有目标评分
+
+    运算顺序与脚本完全一致（先分别相乘再相减，最后除以5-目标评分并向上取整），
+    目标评分为5时使用脚本中的特殊公式 ceil(总评论数 * (5 - 当前评分))。
+
+    Returns:
+        (行数, 目标评分数)的int64数组
+    """
+    current = np.asarray(current, dtype=np.float64)[:, None]
+    total = np.asarray(total_reviews, dtype=np.float64)[:, None]
+    target = np.array([clamp_target(score) for score in targets], dtype=np.float64)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        regular = np.ceil((target * total - current * total) / (5 - target))
+    perfect = np.ceil(total * (5 - current))
+    required = np.where(target >= 5, perfect, regular)
+    required = np.where(current >= target, 0, required)
+    return required.astype(np.int64)
+
+def calculate(counts: np.ndarray, targets: Sequence[float], total_reviews: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """计算一批ASIN的结果
+
+    Args:
+        counts: (行数, 5)的各星级评价数量，按5星到1星排列
+        targets: 目标评分列表
+        total_reviews: 页面上的总评论数，为None时使用各星级数量之和
+
+    Returns:
+        {"total_reviews", "average", "required"}，required的列与targets对应
+    """
+    star_total, average = weighted_average(counts)
+    total = star_total if total_reviews is None else np.asarray(total_reviews, dtype=np.int64)
+    return {
+        "total_reviews": total,
+        "average": average,
+        "required": required_reviews(average, total, targets),
+    }
+
+def _find_column(header: List[str], names: Sequence[str], required: bool = True) -> Optional[int]:
+    lowered = [name.strip().lower() for name in header]
+    for name in names:
+        if name.lower() in lowered:
+            return lowered.index(name.lower())
+    if required:
+        raise ValueError(f"缺少列: {names[0]}（可用的列名: {', '.join(names)}）")
+    return None
+
+def _resolve_columns(header: List[str]) -> Tuple[int, List[int], Optional[int]]:
+    """返回(ASIN列, 5星到1星的列, 总评论数列或None)的位置"""
+    asin = _find_column(header, ASIN_COLUMNS)
+    stars = [_find_column(header, STAR_COLUMNS[star]) for star in (5, 4, 3, 2, 1)]
+    total = _find_column(header, TOTAL_COLUMNS, required=False)
+    return asin, stars, total
+
+def iter_csv_chunks(path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]]:
+    """按块读取CSV，每块产生(ASIN数组, (行数, 5)的数量数组, 总评论数数组或None)
+
+    每块的行由NumPy的C解析器（loadtxt）一次转换成结构化数组（ASIN列和各数量列），
+    不逐行在Python中解析，也不重复解析。
+    """
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        header = next(csv.reader([f.readline()]))
+        asin_column, star_columns, total_column = _resolve_columns(header)
+        number_columns = star_columns + ([total_column] if total_column is not None else [])
+        row_dtype = np.dtype([("asin", object), ("numbers", np.int64, (len(number_columns),))])
+
+        while True:
+            lines = list(itertools.islice(f, chunk_rows))
+            if not lines:
+                return
+            lines = [line for line in lines if line.strip()]
+            if not lines:
+                continue
+            rows = np.loadtxt(lines, delimiter=",", quotechar='"', usecols=[asin_column] + number_columns, dtype=row_dtype, ndmin=1)
+            numbers = rows["numbers"]
+            yield rows["asin"].astype(str), numbers[:, :5], numbers[:, 5] if total_column is not None else None
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        print("错误: 读写Parquet文件需要安装pyarrow")
+        print("运行: pip install pyarrow")
+        sys.exit(1)
+    return pyarrow
+
+def iter_parquet_chunks(path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]]:
+    """按行组批次读取Parquet，只读取需要的列，产生与iter_csv_chunks相同的结构"""
+    pyarrow = _import_pyarrow()
+    parquet_file = pyarrow.parquet.ParquetFile(path)
+    header = parquet_file.schema_arrow.names
+    asin_column, star_columns, total_column = _resolve_columns(header)
+    names = [header[index] for index in [asin_column] + star_columns + ([total_column] if total_column is not None else [])]
+
+    for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=names):
+        asins = batch.column(0).to_numpy(zero_copy_only=False).astype(str)
+        counts = np.column_stack([batch.column(index).to_numpy(zero_copy_only=False) for index in range(1, 6)]).astype(np.int64)
+        totals = batch.column(6).to_numpy(zero_copy_only=False).astype(np.int64) if total_column is not None else None
+        yield asins, counts, totals
+
+def iter_chunks(path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS):
+    """根据扩展名选择CSV或Parquet读取方式"""
+    if path.lower().endswith((".parquet", ".pq")):
+        return iter_parquet_chunks(path, chunk_rows)
+    return iter_csv_chunks(path, chunk_rows)
+
+def target_label(score: float) -> str:
+    """输出列名，如 required_4.3"""
+    return f"required_{clamp_target(score):g}"
+
+class CsvResultWriter:
+    """把计算结果逐块写成CSV（平均分以最短的精确表示写出，可以无损读回）"""
+
+    def __init__(self, f, targets: Sequence[float]):
+        self.f = f
+        self.f.write(",".join(["asin", "total_reviews", "average"] + [target_label(score) for score in targets]) + "\n")
+
+    def write(self, asins: np.ndarray, result: Dict[str, np.ndarray]) -> None:
+        # 按列转换成字符串再逐行拼接，比逐行格式化快
+        columns = [asins.tolist(), list(map(str, result["total_reviews"].tolist())), list(map(repr, result["average"].tolist()))]
+        columns += [list(map(str, column)) for column in result["required"].T.tolist()]
+        self.f.write("\n".join(map(",".join, zip(*columns))) + "\n")
+
+    def close(self) -> None:
+        self.f.flush()
+
+class ParquetResultWriter:
+    """把计算结果逐块写成Parquet的行组"""
+
+    def __init__(self, path: str, targets: Sequence[float]):
+        self.pyarrow = _import_pyarrow()
+        self.labels = [target_label(score) for score in targets]
+        self.writer = None
+        self.path = path
+
+    def write(self, asins: np.ndarray, result: Dict[str, np.ndarray]) -> None:
+        columns = {"asin": asins, "total_reviews": result["total_reviews"], "average": result["average"]}
+        for index, label in enumerate(self.labels):
+            columns[label] = result["required"][:, index]
+        table = self.pyarrow.table(columns)
+        if self.writer is None:
+            self.writer = self.pyarrow.parquet.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+
+def process_file(input_path: str, targets: Sequence[float], output=None, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> int:
+    """流式处理整个文件，返回处理的行数
+
+    Args:
+        output: 输出文件路径（.parquet写成Parquet，其他写成CSV），为None时以CSV写到标准输出
+    """
+    # 先读取表头和第一块，列名不对时不创建输出文件
+    chunks = iter_chunks(input_path, chunk_rows)
+    first = next(chunks, None)
+
+    if output is None:
+        writer = CsvResultWriter(sys.stdout, targets)
+    elif output.lower().endswith((".parquet", ".pq")):
+        writer = ParquetResultWriter(output, targets)
+    else:
+        writer = CsvResultWriter(open(output, "w", encoding="utf-8", newline=""), targets)
+
+    rows = 0
+    try:
+        for asins, counts, totals in itertools.chain([first] if first else [], chunks):
+            writer.write(asins, calculate(counts, targets, totals))
+            rows += len(asins)
+    finally:
+        writer.close()
+        if output is not None and isinstance(writer, CsvResultWriter):
+            writer.f.close()
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="批量计算亚马逊商品的加权平均分和达到目标评分所需的五星好评数")
+    parser.add_argument("input", help="CSV或Parquet文件，每行一个ASIN及5星到1星的评价数量")
+    parser.add_argument("--target", type=float, action="append", help=f"目标评分（1-5），可多次指定（默认{DEFAULT_TARGET_SCORE}）")
+    parser.add_argument("--output", help="输出文件（.parquet写成Parquet，其他写成CSV；默认输出到标准输出）")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help=f"每次读取和计算的行数（默认{DEFAULT_CHUNK_ROWS}）")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"错误: 文件 '{args.input}' 不存在", file=sys.stderr)
+        sys.exit(1)
+
+    # 限制到1-5之后相同的目标评分只计算一次
+    targets = list(dict.fromkeys(clamp_target(score) for score in args.target or [DEFAULT_TARGET_SCORE]))
+    start = time.perf_counter()
+    try:
+        rows = process_file(args.input, targets, args.output, max(1, args.chunk_rows))
+    except ValueError as e:
+        print(f"错误: {e}", file=sys.stderr)
+        sys.exit(1)
+    duration = time.perf_counter() - start
+    if args.output:
+        print(f"已处理 {rows} 个ASIN，耗时 {duration:.2f} 秒（{rows / max(duration, 1e-9):,.0f} 行/秒），结果已写入 {args.output}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
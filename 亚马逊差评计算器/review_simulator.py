@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+亚马逊评分走势蒙特卡洛模拟
+------------------------
+calculateRequiredReviews()假设之后的每条评价都是五星，实际上新评价会按商品自己的星级分布到来。
+本工具从每个ASIN当前的星级分布（以及可选的改进后分布）中随机抽取之后的评价，
+估计平均分达到各目标评分需要多少条新评价，并给出分位数区间和在上限内达到的概率。
+
+每条模拟轨迹按评价逐条推进的结果是精确的，但不逐条抽样：
+离目标还远时，根据calculateRequiredReviews()的公式算出全部是五星也不可能达到目标的评价数，
+一次按多项分布抽取这么多条评价；接近目标时才逐条抽取。
+同一批ASIN的所有场景和轨迹在NumPy中一起计算，各批在多个进程中并行。
+
+输入文件格式与review_calculator.py相同。
+
+用法:
+    python review_simulator.py ratings.csv --target 4.3 --target 4.5 --scenario improved=0.8,0.1,0.04,0.02,0.04 [--output result.csv]
+
+输出列: asin, scenario, target, formula（全部是五星时所需的评价数）, reach_probability, p5, p50, p95...
+"""
+
+import os
+import sys
+import time
+import argparse
+import itertools
+from typing import Optional, Dict, Sequence, Tuple
+from concurrent.futures import ProcessPoolExecutor
+
+# 从其他目录运行或导入时也能找到同目录下的review_calculator
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from review_calculator import STAR_WEIGHTS, DEFAULT_TARGET_SCORE, DEFAULT_CHUNK_ROWS, clamp_target, calculate, iter_chunks
+
+import numpy as np
+
+# 每条轨迹默认的模拟次数
+DEFAULT_SIMULATIONS = 1000
+
+# 每条轨迹最多模拟的新评价数，超过时视为未达到
+DEFAULT_MAX_REVIEWS = 100_000
+
+# 输出的分位数（百分比）
+DEFAULT_QUANTILES = (5, 50, 95)
+
+# 每个进程任务包含的ASIN数量
+DEFAULT_BATCH_ASINS = 256
+
+# 使用商品自身星级分布的场景名称
+CURRENT_SCENARIO = "current"
+
+def parse_scenario(spec: str) -> Tuple[str, np.ndarray]:
+    """解析"名称=5星,4星,3星,2星,1星"格式的场景（比例会归一化）"""
+    name, _, values = spec.partition("=")
+    try:
+        weights = np.array([float(value) for value in values.split(",")], dtype=np.float64)
+    except ValueError:
+        raise ValueError(f"场景格式错误: {spec}（应为 名称=5星,4星,3星,2星,1星）")
+    if not name or name == CURRENT_SCENARIO or len(weights) != 5 or (weights < 0).any() or weights.sum() <= 0:
+        raise ValueError(f"场景格式错误: {spec}（应为 名称=5星,4星,3星,2星,1星，名称不能是{CURRENT_SCENARIO}）")
+    return name, weights / weights.sum()
+
+def simulate_passage(counts: np.ndarray, distributions: np.ndarray, targets: np.ndarray, simulations: int,
+                     max_reviews: int, rng: np.random.Generator) -> np.ndarray:
+    """模拟每条轨迹的平均分第一次达到各目标评分时的新评价数
+
+    Args:
+        counts: (ASIN数, 5)的当前各星级数量，按5星到1星排列
+        distributions: (ASIN数, 场景数, 5)的新评价星级概率，某行全为0表示无法模拟
+        targets: 升序排列的目标评分
+        simulations: 每个ASIN和场景的轨迹数
+
+    Returns:
+        (ASIN数, 场景数, 轨迹数, 目标数)的int64数组，在max_reviews内没有达到的为-1
+    """
+    asins, scenarios = distributions.shape[:2]
+    per_asin = scenarios * simulations
+    rows = asins * per_asin
+    probabilities = np.repeat(distributions.reshape(asins * scenarios, 5), simulations, axis=0)
+    star_sum = np.repeat(counts @ STAR_WEIGHTS, per_asin)
+    reviews = np.repeat(counts.sum(axis=1), per_asin)
+    added = np.zeros(rows, dtype=np.int64)
+    # 每条轨迹还没有达到的最低目标（目标升序，达到高的目标时一定已经达到低的目标）
+    level = np.zeros(rows, dtype=np.int64)
+    passage = np.full((rows, len(targets)), -1, dtype=np.int64)
+    # 目标之后追加一个哨兵，level等于目标数时不会再达到
+    bounds = np.append(targets, np.inf)
+
+    def record(index):
+        """记录index中已经达到当前目标的轨迹，一次可能连续达到多个目标"""
+        while len(index):
+            average = np.zeros(len(index))
+            np.divide(star_sum[index], reviews[index], out=average, where=reviews[index] > 0)
+            hit = index[average >= bounds[level[index]]]
+            passage[hit, level[hit]] = added[hit]
+            level[hit] += 1
+            index = hit
+
+    def reachable(index):
+        """五星目标只有还没有任何评价时才能达到（有评价却未达到说明已有非五星评价）"""
+        bound = bounds[level[index]]
+        return (bound < 5) | ((bound == 5) & (reviews[index] == 0))
+
+    record(np.arange(rows))
+    # 无法模拟的行不参与
+    active = np.flatnonzero(reachable(slice(None)) & (probabilities.sum(axis=1) > 0))
+
+    while len(active):
+        target = targets[level[active]]
+        # 与calculateRequiredReviews()相同：全部是五星时至少还需要ceil(差额 / (5 - 目标))条评价，
+        # 前ceil - 1条不可能达到目标，可以一次抽取；浮点误差可能让ceil多算1条，
+        # 所以再减1条（共减2），以免一次抽取越过第一次达到目标的那一条
+        deficit = target * reviews[active] - star_sum[active]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            steps = np.ceil(deficit / (5 - target)) - 2
+        steps = np.where(target < 5, np.maximum(steps, 1), 1).astype(np.int64)
+        steps = np.minimum(steps, max_reviews - added[active])
+
+        draws = rng.multinomial(steps, probabilities[active])
+        star_sum[active] += draws @ STAR_WEIGHTS
+        reviews[active] += steps
+        added[active] += steps
+        record(active)
+
+        active = active[reachable(active) & (added[active] < max_reviews)]
+
+    return passage.reshape(asins, scenarios, simulations, len(targets))
+
+def summarize_passage(passage: np.ndarray, quantiles: Sequence[float]) -> Dict[str, np.ndarray]:
+    """把轨迹结果汇总为达到概率和分位数（没有达到的轨迹按无穷大计入分位数）
+
+    Returns:
+        {"reach": (ASIN数, 场景数, 目标数), "quantiles": (分位数个数, ASIN数, 场景数, 目标数)}
+    """
+    reached = passage >= 0
+    values = np.where(reached, passage, np.inf)
+    return {
+        "reach": reached.mean(axis=2),
+        "quantiles": np.quantile(values, np.asarray(quantiles) / 100, axis=2, method="inverted_cdf"),
+    }
+
+def simulate_batch(task: tuple) -> Dict[str, np.ndarray]:
+    """进程池任务：模拟一批ASIN并汇总（只把汇总结果传回主进程）"""
+    counts, distributions, targets, simulations, max_reviews, quantiles, seed = task
+    rng = np.random.default_rng(seed)
+    passage = simulate_passage(counts, distributions, targets, simulations, max_reviews, rng)
+    return summarize_passage(passage, quantiles)
+
+def build_distributions(counts: np.ndarray, scenarios: Sequence[Tuple[str, np.ndarray]]) -> np.ndarray:
+    """每个ASIN各场景的新评价星级概率：current为商品自身的分布，其余场景所有ASIN相同"""
+    totals = counts.sum(axis=1, keepdims=True)
+    current = np.zeros(counts.shape, dtype=np.float64)
+    np.divide(counts, totals, out=current, where=totals > 0)
+    distributions = [current] + [np.broadcast_to(weights, counts.shape) for _, weights in scenarios]
+    return np.stack(distributions, axis=1)
+
+class ResultWriter:
+    """把模拟结果逐块写成CSV"""
+
+    def __init__(self, f, quantiles: Sequence[float]):
+        self.f = f
+        self.f.write(",".join(["asin", "scenario", "target", "formula", "reach_probability"] + [f"p{quantile:g}" for quantile in quantiles]) + "\n")
+
+    def write(self, asins: np.ndarray, scenario_names: Sequence[str], targets: np.ndarray, formula: np.ndarray, summary: Dict[str, np.ndarray]) -> None:
+        reach = summary["reach"].tolist()
+        quantiles = np.moveaxis(summary["quantiles"], 0, -1).tolist()
+        formula = formula.tolist()
+        lines = []
+        for row, asin in enumerate(asins.tolist()):
+            for scenario, name in enumerate(scenario_names):
+                for column, target in enumerate(targets.tolist()):
+                    values = ",".join("" if value == float("inf") else str(int(value)) for value in quantiles[row][scenario][column])
+                    lines.append(f"{asin},{name},{target:g},{formula[row][column]},{reach[row][scenario][column]:.4f},{values}\n")
+        self.f.writelines(lines)
+
+def run_simulation(input_path: str, targets: Sequence[float], scenarios: Sequence[Tuple[str, np.ndarray]], output=None,
+                   simulations: int = DEFAULT_SIMULATIONS, max_reviews: int = DEFAULT_MAX_REVIEWS,
+                   quantiles: Sequence[float] = DEFAULT_QUANTILES, workers: Optional[int] = None, seed: int = 0,
+                   batch_asins: int = DEFAULT_BATCH_ASINS, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> int:
+    """流式读取文件，分批并行模拟，返回处理的ASIN数
+
+    每批使用由seed派生的独立随机数，结果与进程数无关。
+    """
+    targets = np.array(sorted({clamp_target(score) for score in targets}), dtype=np.float64)
+    scenario_names = [CURRENT_SCENARIO] + [name for name, _ in scenarios]
+    workers = workers or os.cpu_count() or 1
+    seeds = np.random.SeedSequence(seed)
+
+    # 先读取表头和第一块，列名不对时不创建输出文件
+    chunks = iter_chunks(input_path, chunk_rows)
+    first = next(chunks, None)
+
+    f = sys.stdout if output is None else open(output, "w", encoding="utf-8", newline="")
+    writer = ResultWriter(f, quantiles)
+    rows = 0
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for asins, counts, totals in itertools.chain([first] if first else [], chunks):
+            formula = calculate(counts, targets, totals)["required"]
+            distributions = build_distributions(counts, scenarios)
+            tasks = [
+                (counts[start:start + batch_asins], distributions[start:start + batch_asins], targets, simulations, max_reviews, quantiles, child)
+                for start, child in zip(range(0, len(counts), batch_asins), seeds.spawn((len(counts) + batch_asins - 1) // batch_asins))
+            ]
+            results = executor.map(simulate_batch, tasks) if executor else map(simulate_batch, tasks)
+            for (batch_counts, *_), start, summary in zip(tasks, range(0, len(counts), batch_asins), results):
+                end = start + len(batch_counts)
+                writer.write(asins[start:end], scenario_names, targets, formula[start:end], summary)
+            rows += len(asins)
+    finally:
+        if executor:
+            executor.shutdown()
+        f.flush()
+        if output is not None:
+            f.close()
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="蒙特卡洛模拟亚马逊商品平均分达到目标评分所需的新评价数")
+    parser.add_argument("input", help="CSV或Parquet文件，每行一个ASIN及5星到1星的评价数量")
+    parser.add_argument("--target", type=float, action="append", help=f"目标评分（1-5），可多次指定（默认{DEFAULT_TARGET_SCORE}）")
+    parser.add_argument("--scenario", action="append", default=[], metavar="NAME=P5,P4,P3,P2,P1", help=f"改进后的新评价星级分布，可多次指定（{CURRENT_SCENARIO}场景始终使用商品自身的分布）")
+    parser.add_argument("--simulations", type=int, default=DEFAULT_SIMULATIONS, help=f"每个ASIN和场景的模拟次数（默认{DEFAULT_SIMULATIONS}）")
+    parser.add_argument("--max-reviews", type=int, default=DEFAULT_MAX_REVIEWS, help=f"每次模拟最多的新评价数，超过视为未达到（默认{DEFAULT_MAX_REVIEWS}）")
+    parser.add_argument("--quantiles", default=",".join(map(str, DEFAULT_QUANTILES)), help="输出的分位数百分比（默认5,50,95）")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="进程数（默认为CPU核心数）")
+    parser.add_argument("--seed", type=int, default=0, help="随机数种子（默认0）")
+    parser.add_argument("--batch-asins", type=int, default=DEFAULT_BATCH_ASINS, help=f"每个进程任务的ASIN数（默认{DEFAULT_BATCH_ASINS}）")
+    parser.add_argument("--output", help="输出CSV文件（默认输出到标准输出）")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"错误: 文件 '{args.input}' 不存在", file=sys.stderr)
+        sys.exit(1)
+    try:
+        scenarios = [parse_scenario(spec) for spec in args.scenario]
+        quantiles = [float(value) for value in args.quantiles.split(",")]
+    except ValueError as e:
+        print(f"错误: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    start = time.perf_counter()
+    try:
+        rows = run_simulation(args.input, args.target or [DEFAULT_TARGET_SCORE], scenarios, args.output, max(1, args.simulations),
+                              max(1, args.max_reviews), quantiles, max(1, args.workers), args.seed, max(1, args.batch_asins))
+    except ValueError as e:
+        print(f"错误: {e}", file=sys.stderr)
+        sys.exit(1)
+    duration = time.perf_counter() - start
+    if args.output:
+        print(f"已模拟 {rows} 个ASIN，耗时 {duration:.2f} 秒，结果已写入 {args.output}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()